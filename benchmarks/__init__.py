@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Benchmarks de FuerzApp (ver benchmarks/carga.py).
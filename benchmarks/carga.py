@@ -0,0 +1,346 @@
+# benchmarks/carga.py
+###########################################################################################################################
+# Benchmark de la app completa contra un PostgreSQL local.
+# Levanta un cluster temporal (initdb/pg_ctl, o el paquete pgserver si se corre como root) o usa --dsn, crea el
+# esquema con las migraciones, carga usuarios sintéticos con --dias de historial y ejecuta Fuerzapp.py sin navegador
+# (streamlit.testing AppTest) en cada escenario: login, Inicio, las tres páginas de registro (enviando el
+# formulario), Reportes, Progreso e Historial.
+# Informa p50/p95/p99 de cada rerun, consultas por rerun (fuerzapp.metricas) y el pico de memoria
+# (tracemalloc). Los resultados se pueden guardar como línea de base y comparar en la siguiente corrida:
+#
+#   python -m benchmarks.carga --usuarios 20 --dias 730 --guardar benchmarks/base.json
+#   python -m benchmarks.carga --usuarios 20 --dias 730 --comparar benchmarks/base.json   # sale con 1 si hay regresiones
+#######################################################
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import psycopg2
+
+RAIZ = Path(__file__).resolve().parents[1]
+APP = RAIZ / "Fuerzapp.py"
+PASSWORD = "benchmark"
+ESCENARIOS = ("login", "inicio", "entrenamiento", "comida", "medidas", "reportes", "progreso", "historial", "cohortes")
+
+
+#######################################################
+####################################################### Base de datos temporal
+#######################################################
+def _buscar_binario(nombre, carpeta=None):
+    if carpeta:
+        ruta = Path(carpeta) / nombre
+        return str(ruta) if ruta.exists() else None
+    encontrado = shutil.which(nombre)
+    if encontrado:
+        return encontrado
+    try:
+        bindir = subprocess.run(["pg_config", "--bindir"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    ruta = Path(bindir) / nombre
+    return str(ruta) if ruta.exists() else None
+
+
+class ClusterTemporal:
+    """
+    Cluster de PostgreSQL en una carpeta temporal, accesible solo por socket Unix; se borra al salir.
+    """
+
+    def __init__(self, carpeta_binarios=None):
+        self.carpeta_binarios = carpeta_binarios
+        self.directorio = None
+        self._pgserver = None
+        self.dsn = None
+
+    def __enter__(self):
+        self.directorio = tempfile.mkdtemp(prefix="fuerzapp-bench-")
+        initdb = _buscar_binario("initdb", self.carpeta_binarios)
+        pg_ctl = _buscar_binario("pg_ctl", self.carpeta_binarios)
+        if initdb and pg_ctl and os.geteuid() != 0:
+            datos = os.path.join(self.directorio, "datos")
+            subprocess.run([initdb, "-D", datos, "-U", "postgres", "-A", "trust", "--no-sync"],
+                           check=True, capture_output=True)
+            with socket.socket() as s:
+                s.bind(("127.0.0.1", 0))
+                puerto = s.getsockname()[1]
+            opciones = f"-c listen_addresses='' -c unix_socket_directories={self.directorio} -p {puerto} -c fsync=off"
+            subprocess.run([pg_ctl, "-D", datos, "-o", opciones, "-l", os.path.join(self.directorio, "log"), "-w", "start"],
+                           check=True, capture_output=True)
+            self._pg_ctl, self._datos = pg_ctl, datos
+            self.dsn = f"postgresql://postgres@/postgres?host={self.directorio}&port={puerto}"
+            return self
+        try:
+            # initdb se niega a correr como root; pgserver crea un usuario de sistema para el servidor
+            import pgserver
+        except ImportError:
+            shutil.rmtree(self.directorio, ignore_errors=True)
+            raise SystemExit("No se encontró initdb/pg_ctl (o se corre como root sin el paquete pgserver). "
+                             "Indicá --pg-bin o una base existente con --dsn.")
+        self._pgserver = pgserver.get_server(self.directorio, cleanup_mode="delete")
+        self.dsn = self._pgserver.get_uri()
+        return self
+
+    def __exit__(self, *exc):
+        if self._pgserver is not None:
+            self._pgserver.cleanup()
+        else:
+            subprocess.run([self._pg_ctl, "-D", self._datos, "-m", "immediate", "stop"], capture_output=True)
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+
+#######################################################
+####################################################### Datos sintéticos
+#######################################################
+def sembrar(dsn, usuarios, dias, semilla=1):
+    """
+    Crea el esquema y `usuarios` usuarios bench<i>@fuerzapp.test con `dias` días de historial cada uno:
+    un entrenamiento y tres comidas por día y una medida por semana; cada uno es coach de una cohorte con todos.
+    Devuelve los ids de los usuarios.
+    """
+    from fuerzapp import resumenes
+    from fuerzapp.contrasenas import HasherScrypt
+    from fuerzapp.migraciones import aplicar_migraciones
+
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn:
+            cursor = conn.cursor()
+            aplicar_migraciones(conn)
+            cursor.execute("SELECT setseed(%s)", (1 / (semilla + 1),))
+            cursor.execute("DELETE FROM usuarios WHERE email LIKE 'bench%%@fuerzapp.test'")
+            # Un solo hash para todos: la verificación en el login cuesta lo mismo
+            contrasena = HasherScrypt().generar(PASSWORD)
+            cursor.execute("""
+                INSERT INTO usuarios (nombre, email, contraseña)
+                SELECT 'Bench ' || i, 'bench' || i || '@fuerzapp.test', %s FROM generate_series(1, %s) i
+                RETURNING id
+            """, (contrasena, usuarios))
+            ids = [fila[0] for fila in cursor.fetchall()]
+            cursor.execute("""
+                INSERT INTO entrenamientos (usuario_id, fecha, tipo, duracion, calorias, notas)
+                SELECT u, current_date - d,
+                       (ARRAY['Fuerza', 'Cardio', 'Funcional', 'Movilidad', 'Otro'])[1 + floor(random() * 5)::int],
+                       20 + floor(random() * 70)::int, 100 + floor(random() * 600)::int, ''
+                FROM unnest(%(ids)s) u CROSS JOIN generate_series(0, %(dias)s - 1) d
+            """, {"ids": ids, "dias": dias})
+            # Alimentos al azar del catálogo (migración 7), de una a tres porciones
+            cursor.execute("""
+                INSERT INTO comidas (usuario_id, fecha, tipo_comida, alimento, calorias, notas, alimento_id)
+                SELECT s.u, s.fecha, a.tipo_comida, a.nombre, a.calorias * s.porciones, '', a.id
+                FROM (
+                    SELECT u, current_date - d AS fecha, 1 + floor(random() * 3)::int AS porciones,
+                           c.ids[1 + floor(random() * cardinality(c.ids))::int] AS alimento_id
+                    FROM (SELECT array_agg(id) AS ids FROM alimentos WHERE usuario_id IS NULL) c
+                    CROSS JOIN unnest(%(ids)s) u CROSS JOIN generate_series(0, %(dias)s - 1) d
+                    CROSS JOIN generate_series(1, 3)
+                ) s
+                JOIN alimentos a ON a.id = s.alimento_id
+            """, {"ids": ids, "dias": dias})
+            cursor.execute("""
+                INSERT INTO medidas (usuario_id, fecha, abdomen, cintura, brazo, pecho, pierna, peso, notas)
+                SELECT u, current_date - d, 80 + random() * 10, 75 + random() * 10, 30 + random() * 5,
+                       100 + random() * 10, 55 + random() * 5, 70 + random() * 10, ''
+                FROM unnest(%(ids)s) u CROSS JOIN generate_series(0, %(dias)s - 1, 7) d
+            """, {"ids": ids, "dias": dias})
+            # Cada usuario es coach de una cohorte con todos los usuarios del benchmark
+            cursor.execute("UPDATE usuarios SET rol = 'coach' WHERE id = ANY(%s)", (ids,))
+            cursor.execute("""
+                WITH nuevas AS (
+                    INSERT INTO cohortes (nombre, coach_id) SELECT 'Bench', u FROM unnest(%(ids)s) u RETURNING id
+                )
+                INSERT INTO cohorte_miembros (cohorte_id, usuario_id)
+                SELECT n.id, u FROM nuevas n CROSS JOIN unnest(%(ids)s) u
+            """, {"ids": ids})
+            resumenes.reconstruir(cursor)
+            cursor.execute("ANALYZE")
+    finally:
+        conn.close()
+    return ids
+
+
+#######################################################
+####################################################### Escenarios
+#######################################################
+def _app(dsn, secretos):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP), default_timeout=120)
+    at.secrets["db_connection_string"] = dsn
+    for clave, valor in secretos.items():
+        at.secrets[clave] = valor
+    return at
+
+
+def _boton(elementos, inicio):
+    return next(b for b in elementos if b.label.startswith(inicio))
+
+
+def _con_usuario(dsn, secretos, usuario, menu):
+    at = _app(dsn, secretos)
+    at.session_state["usuario"] = usuario
+    at.session_state["menu"] = menu
+    return at
+
+
+def preparar(escenario, dsn, secretos, usuario):
+    """
+    Devuelve (AppTest listo, función que ejecuta el rerun que se mide).
+    """
+    if escenario == "login":
+        at = _app(dsn, secretos)
+        at.run()
+        at.text_input[0].input(usuario[2])
+        at.text_input[1].input(PASSWORD)
+        return at, lambda: (_boton(at.button, "Iniciar sesión").click(), at.run())
+    if escenario in ("entrenamiento", "comida", "medidas"):
+        menu = {"entrenamiento": "Registrar Entrenamiento", "comida": "Registrar Comida", "medidas": "Registrar Medidas"}
+        at = _con_usuario(dsn, secretos, usuario, menu[escenario])
+        at.run()
+        return at, lambda: (_boton(at.button, "Guardar").click(), at.run())
+    menu = {"inicio": "Inicio", "reportes": "Reportes", "progreso": "Progreso", "historial": "Historial",
+            "cohortes": "Cohortes"}[escenario]
+    at = _con_usuario(dsn, secretos, usuario, menu)
+    return at, at.run
+
+
+def medir(escenario, dsn, secretos, usuarios, iteraciones, memoria):
+    """
+    Ejecuta el escenario `iteraciones` veces, rotando entre `usuarios` (las primeras visitas de cada usuario no
+    encuentran nada en la caché de consultas). Devuelve las estadísticas del escenario.
+    """
+    from fuerzapp.metricas import consultas_ejecutadas
+
+    tiempos, consultas, errores = [], [], 0
+    for i in range(iteraciones):
+        at, accion = preparar(escenario, dsn, secretos, usuarios[i % len(usuarios)])
+        antes = consultas_ejecutadas()
+        comienzo = time.perf_counter()
+        accion()
+        tiempos.append((time.perf_counter() - comienzo) * 1000)
+        consultas.append(consultas_ejecutadas() - antes)
+        errores += len(at.exception)
+    pico = 0.0
+    for i in range(memoria):
+        at, accion = preparar(escenario, dsn, secretos, usuarios[(iteraciones + i) % len(usuarios)])
+        tracemalloc.start()
+        try:
+            accion()
+            pico = max(pico, tracemalloc.get_traced_memory()[1] / 1024**2)
+        finally:
+            tracemalloc.stop()
+    percentiles = statistics.quantiles(tiempos, n=100, method="inclusive") if len(tiempos) > 1 else tiempos * 99
+    return {
+        "iteraciones": iteraciones,
+        "p50_ms": round(percentiles[49], 2),
+        "p95_ms": round(percentiles[94], 2),
+        "p99_ms": round(percentiles[98], 2),
+        "consultas_por_rerun": round(statistics.mean(consultas), 2),
+        "pico_memoria_mb": round(pico, 2),
+        "errores": errores,
+    }
+
+
+#######################################################
+####################################################### Línea de base
+#######################################################
+def comparar(resultados, base, tolerancia):
+    """
+    Lista de regresiones respecto de `base`: p95 o memoria más de `tolerancia` por encima, o más consultas por rerun.
+    """
+    regresiones = []
+    for escenario, actual in resultados.items():
+        anterior = base.get(escenario)
+        if anterior is None:
+            continue
+        for metrica in ("p95_ms", "pico_memoria_mb"):
+            if anterior[metrica] and actual[metrica] > anterior[metrica] * (1 + tolerancia):
+                regresiones.append(f"{escenario}: {metrica} {anterior[metrica]} -> {actual[metrica]}")
+        if actual["consultas_por_rerun"] > anterior["consultas_por_rerun"] + 0.5:
+            regresiones.append(f"{escenario}: consultas_por_rerun {anterior['consultas_por_rerun']} -> "
+                               f"{actual['consultas_por_rerun']}")
+        if actual["errores"] > anterior["errores"]:
+            regresiones.append(f"{escenario}: errores {anterior['errores']} -> {actual['errores']}")
+    return regresiones
+
+
+def imprimir(resultados):
+    print(f"\n{'escenario':<15}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'consultas':>11}{'pico MB':>10}{'errores':>9}")
+    for escenario, r in resultados.items():
+        print(f"{escenario:<15}{r['iteraciones']:>5}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+              f"{r['consultas_por_rerun']:>11.1f}{r['pico_memoria_mb']:>10.1f}{r['errores']:>9}")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark de FuerzApp con AppTest contra un PostgreSQL local.")
+    parser.add_argument("--dsn", help="base existente (se crean usuarios bench*@fuerzapp.test); si no, cluster temporal")
+    parser.add_argument("--pg-bin", help="carpeta con initdb y pg_ctl")
+    parser.add_argument("--usuarios", type=int, default=10)
+    parser.add_argument("--dias", type=int, default=365, help="días de historial por usuario")
+    parser.add_argument("--iteraciones", type=int, default=30, help="reruns medidos por escenario")
+    parser.add_argument("--memoria", type=int, default=3, help="reruns extra con tracemalloc por escenario")
+    parser.add_argument("--escenarios", nargs="+", choices=ESCENARIOS, default=list(ESCENARIOS))
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--guardar", help="guardar los resultados como línea de base (JSON)")
+    parser.add_argument("--comparar", help="línea de base (JSON) contra la que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="aumento relativo tolerado de p95 y memoria")
+    args = parser.parse_args(argumentos)
+
+    os.chdir(RAIZ)  # las rutas de los avatares son relativas a la raíz del repo
+    sys.path.insert(0, str(RAIZ))
+    random.seed(args.semilla)
+    # Sin límite de intentos de login: todas las sesiones de AppTest vienen del mismo "cliente"
+    secretos = {"login_rafaga_cliente": 10**9, "login_rafaga_email": 10**9}
+
+    cluster = None
+    dsn = args.dsn
+    if dsn is None:
+        cluster = ClusterTemporal(args.pg_bin).__enter__()
+        dsn = cluster.dsn
+    os.environ["FUERZAPP_DB_URL"] = dsn
+    try:
+        comienzo = time.perf_counter()
+        ids = sembrar(dsn, args.usuarios, args.dias, args.semilla)
+        print(f"Sembrados {len(ids)} usuarios con {args.dias} días de historial en {time.perf_counter() - comienzo:.1f} s")
+        usuarios = [(i, f"Bench {n}", f"bench{n}@fuerzapp.test", None, None) for n, i in enumerate(ids, start=1)]
+        random.shuffle(usuarios)
+
+        # Un rerun de calentamiento: imports, pool de conexiones y migraciones no cuentan en las mediciones
+        _con_usuario(dsn, secretos, usuarios[0], "Inicio").run()
+        resultados = {}
+        for escenario in args.escenarios:
+            resultados[escenario] = medir(escenario, dsn, secretos, usuarios, args.iteraciones, args.memoria)
+            print(f"  {escenario}: p95 {resultados[escenario]['p95_ms']:.1f} ms")
+    finally:
+        if cluster is not None:
+            cluster.__exit__(None, None, None)
+
+    imprimir(resultados)
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump({"parametros": {"usuarios": args.usuarios, "dias": args.dias, "iteraciones": args.iteraciones},
+                       "resultados": resultados}, f, indent=2)
+        print(f"\nLínea de base guardada en {args.guardar}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(resultados, base["resultados"], args.tolerancia)
+        if regresiones:
+            print("\nRegresiones respecto de la línea de base:")
+            for regresion in regresiones:
+                print(f"  {regresion}")
+            sys.exit(1)
+        print("\nSin regresiones respecto de la línea de base.")
+
+
+if __name__ == "__main__":
+    main()
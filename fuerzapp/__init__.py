@@ -0,0 +1,3 @@
+# fuerzapp/__init__.py
+# Paquete con la lógica de soporte de FuerzApp (acceso a datos, caché, reportes...).
+# La interfaz de Streamlit sigue viviendo en Fuerzapp.py.
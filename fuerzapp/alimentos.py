@@ -0,0 +1,294 @@
+# fuerzapp/alimentos.py
+###########################################################################################################################
+# Catálogo de alimentos y búsqueda en memoria (por prefijo y tolerante a errores de tipeo).
+# La tabla alimentos guarda cada alimento una sola vez, por su nombre normalizado (minúsculas, sin acentos ni espacios
+# de más), con su tipo de comida y las calorías de una porción. Cada comida guarda el id del alimento (alimento_id),
+# así los reportes por alimento agrupan y filtran por un entero indexado en lugar de comparar textos.
+# IndiceAlimentos tiene el catálogo en memoria, una vez por proceso y compartido por todas las sesiones:
+#   - listas ordenadas de nombres y de palabras, para buscar por prefijo con bisect;
+#   - trigramas (como pg_trgm), para encontrar el alimento aunque el texto tenga errores de tipeo.
+# Los alimentos que no están en el catálogo se agregan al guardar la comida (resolver), pero como propios del usuario
+# (alimentos.usuario_id): no aparecen en la búsqueda de los demás ni sus calorías pasan a ser la porción de todos.
+# El catálogo compartido (usuario_id NULL) son las semillas y lo que se aprueba desde consola:
+#   FUERZAPP_DB_URL=postgresql://... python -m fuerzapp.alimentos --pendientes
+#   FUERZAPP_DB_URL=postgresql://... python -m fuerzapp.alimentos --aprobar "Tarta de verdura"
+#######################################################
+import argparse
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from itertools import chain, islice
+
+import psycopg2
+import streamlit as st
+from psycopg2.extras import execute_values
+
+from fuerzapp.cache import obtener_cache
+from fuerzapp.db import cadena_conexion, get_connection
+
+INDICE_TTL = 600     # segundos hasta recargar el catálogo (incorpora los alimentos agregados por otros procesos)
+LIMITE = 8           # resultados por búsqueda
+SIMILITUD_MINIMA = 0.3
+PORCION = "1 porción"
+PENDIENTES = 20      # alimentos propios que lista --pendientes
+
+Alimento = namedtuple("Alimento", "id nombre tipo_comida porcion calorias")
+
+# Las tablas y el catálogo inicial los crean las migraciones 7 y 11 (fuerzapp.migraciones).
+# Destino de ON CONFLICT para el índice único de nombres (uno compartido y uno por usuario)
+CONFLICTO = "((COALESCE(usuario_id, 0)), nombre_normalizado)"
+
+
+def normalizar(texto):
+    """
+    'Brócoli  al Vapor' -> 'brocoli al vapor': minúsculas, sin acentos ni espacios de más.
+    """
+    sin_acentos = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode()
+    return " ".join(sin_acentos.lower().split())
+
+
+def trigramas(normalizado):
+    """
+    Trigramas de cada palabra, con dos espacios delante y uno detrás (como pg_trgm).
+    """
+    resultado = set()
+    for palabra in normalizado.split():
+        relleno = f"  {palabra} "
+        resultado.update(relleno[i:i + 3] for i in range(len(relleno) - 2))
+    return resultado
+
+
+#######################################################
+####################################################### Índice en memoria
+#######################################################
+class IndiceAlimentos:
+    """
+    Índice de solo lectura de una lista de alimentos (el catálogo compartido o los propios de un usuario).
+    """
+
+    def __init__(self, alimentos=()):
+        self._construir(list(alimentos))
+
+    def _construir(self, alimentos):
+        por_id = {a.id: a for a in alimentos}
+        por_nombre = {normalizar(a.nombre): a for a in alimentos}
+        palabras_por_id = {a.id: n.split() for n, a in por_nombre.items()}
+        nombres = sorted((n, a.id) for n, a in por_nombre.items())
+        palabras = sorted({(p, i) for i, lista in palabras_por_id.items() for p in lista})
+        # Trigramas por palabra: la similitud se mide contra la palabra más parecida del nombre (como word_similarity)
+        entradas = []
+        por_trigrama = {}
+        for i, lista in palabras_por_id.items():
+            for palabra in set(lista):
+                propios = trigramas(palabra)
+                for trigrama in propios:
+                    por_trigrama.setdefault(trigrama, []).append(len(entradas))
+                entradas.append((i, len(propios)))
+        self._estado = (por_id, por_nombre, palabras_por_id, nombres, palabras, entradas, por_trigrama)
+
+    def __len__(self):
+        return len(self._estado[0])
+
+    def por_nombre(self, nombre):
+        """
+        El alimento con ese nombre (normalizado), o None.
+        """
+        return self._estado[1].get(normalizar(nombre))
+
+    @staticmethod
+    def _prefijo(ordenada, prefijo):
+        # Los ids de las tuplas (texto, id) que empiezan con `prefijo`, sin recorrer las demás
+        inicio = bisect_left(ordenada, (prefijo,))
+        for i in range(inicio, len(ordenada)):
+            if not ordenada[i][0].startswith(prefijo):
+                break
+            yield ordenada[i][1]
+
+    def buscar(self, texto, limite=LIMITE):
+        """
+        Hasta `limite` alimentos para `texto`: primero los que empiezan así, después los que tienen una palabra que
+        empieza así (todas las palabras de la búsqueda deben aparecer) y, si faltan, los más parecidos por trigramas.
+        """
+        consulta = normalizar(texto)
+        if not consulta:
+            return []
+        por_id, _, palabras_por_id, nombres, palabras, entradas, por_trigrama = self._estado
+        encontrados = []
+        vistos = set()
+
+        def sumar(ids, orden=lambda i: (len(por_id[i].nombre), por_id[i].nombre)):
+            for i in sorted(ids, key=orden):
+                if len(encontrados) >= limite:
+                    return
+                if i not in vistos:
+                    vistos.add(i)
+                    encontrados.append(por_id[i])
+
+        sumar(islice(self._prefijo(nombres, consulta), limite))
+        if len(encontrados) < limite:
+            terminos = consulta.split()
+            candidatos = self._prefijo(palabras, max(terminos, key=len))
+            sumar({i for i in candidatos
+                   if all(any(p.startswith(t) for p in palabras_por_id[i]) for t in terminos)})
+        if len(encontrados) < limite:
+            # Cuenta los trigramas compartidos con cada palabra del catálogo (Counter recorre las listas en C)
+            propios = trigramas(consulta)
+            comunes = Counter(chain.from_iterable(por_trigrama.get(t, ()) for t in propios))
+            similitud = {}
+            for entrada, cantidad in comunes.items():
+                i, total = entradas[entrada]
+                valor = cantidad / (len(propios) + total - cantidad)
+                if valor >= SIMILITUD_MINIMA and valor > similitud.get(i, 0):
+                    similitud[i] = valor
+            sumar(similitud, orden=lambda i: (-similitud[i], len(por_id[i].nombre)))
+        return encontrados
+
+
+def _cargar(cursor, usuario_id=None):
+    cursor.execute("""
+        SELECT id, nombre, tipo_comida, porcion, calorias FROM alimentos WHERE usuario_id IS NOT DISTINCT FROM %s
+    """, (usuario_id,))
+    return [Alimento(*fila) for fila in cursor.fetchall()]
+
+
+@st.cache_resource(show_spinner=False, ttl=INDICE_TTL)
+def obtener_indice():
+    """
+    Índice del catálogo compartido, cargado una vez por proceso (se recarga cada INDICE_TTL segundos).
+    Si la base no responde lanza el error (no se guarda en la caché): ver fuerzapp.replica.leer_postgres.
+    """
+    with get_connection(detener=False) as conn:
+        return IndiceAlimentos(_cargar(conn.cursor()))
+
+
+def indice_propio(usuario_id):
+    """
+    Índice de los alimentos propios del usuario. Se guarda en la caché de consultas bajo la tabla comidas: los
+    alimentos propios se crean al guardar comidas, que ya invalidan esa tabla.
+    """
+    def consultar():
+        with get_connection(detener=False) as conn:
+            return IndiceAlimentos(_cargar(conn.cursor(), usuario_id))
+
+    return obtener_cache().obtener_o_calcular(usuario_id, "comidas", ("alimentos_propios",), consultar)
+
+
+#######################################################
+####################################################### Catálogo en la base
+#######################################################
+def resolver(cursor, filas):
+    """
+    Ids del catálogo para `filas` (iterable de (usuario_id, alimento, tipo_comida, calorías)), en el mismo orden;
+    None si el alimento está vacío. Se usa el alimento compartido con ese nombre o, si no hay, el propio del usuario,
+    que se crea con esas calorías como porción si todavía no existe.
+    """
+    filas = [(usuario_id, normalizar(alimento), alimento, tipo_comida, calorias)
+             for usuario_id, alimento, tipo_comida, calorias in filas]
+    nombres = sorted({normalizado for _, normalizado, _, _, _ in filas if normalizado})
+    if not nombres:
+        return [None] * len(filas)
+    cursor.execute("SELECT nombre_normalizado, id FROM alimentos WHERE usuario_id IS NULL AND nombre_normalizado = ANY(%s)",
+                   (nombres,))
+    compartidos = dict(cursor.fetchall())
+    nuevos = {}
+    for usuario_id, normalizado, alimento, tipo_comida, calorias in filas:
+        if normalizado and normalizado not in compartidos and (usuario_id, normalizado) not in nuevos:
+            nuevos[(usuario_id, normalizado)] = (usuario_id, " ".join(str(alimento).split()), normalizado,
+                                                 tipo_comida or "Otro", PORCION, int(calorias or 0))
+    propios = {}
+    if nuevos:
+        # Orden fijo: dos transacciones que agregan los mismos alimentos toman los bloqueos en el mismo orden
+        execute_values(cursor, f"""
+            INSERT INTO alimentos (usuario_id, nombre, nombre_normalizado, tipo_comida, porcion, calorias)
+            VALUES %s
+            ON CONFLICT {CONFLICTO} DO NOTHING
+        """, [nuevos[clave] for clave in sorted(nuevos)])
+        cursor.execute("""
+            SELECT a.usuario_id, a.nombre_normalizado, a.id
+            FROM alimentos a JOIN unnest(%s::int[], %s::text[]) AS p (usuario_id, nombre_normalizado)
+                ON a.usuario_id = p.usuario_id AND a.nombre_normalizado = p.nombre_normalizado
+        """, ([u for u, _ in nuevos], [n for _, n in nuevos]))
+        propios = {(u, n): i for u, n, i in cursor.fetchall()}
+    return [compartidos.get(normalizado) or propios.get((usuario_id, normalizado))
+            for usuario_id, normalizado, _, _, _ in filas]
+
+
+#######################################################
+####################################################### Revisión del catálogo
+#######################################################
+def pendientes(cursor, limite=PENDIENTES):
+    """
+    Alimentos propios que registró más gente (candidatos a sumar al catálogo compartido):
+    (nombre, usuarios, calorías medianas por porción).
+    """
+    cursor.execute("""
+        SELECT MIN(nombre), COUNT(*), percentile_disc(0.5) WITHIN GROUP (ORDER BY calorias)
+        FROM alimentos
+        WHERE usuario_id IS NOT NULL AND nombre_normalizado NOT IN (SELECT nombre_normalizado FROM alimentos WHERE usuario_id IS NULL)
+        GROUP BY nombre_normalizado
+        ORDER BY COUNT(*) DESC, MIN(nombre)
+        LIMIT %s
+    """, (limite,))
+    return cursor.fetchall()
+
+
+def aprobar(cursor, nombre, tipo_comida=None, porcion=PORCION, calorias=None):
+    """
+    Suma un alimento al catálogo compartido y pasa a él las comidas de los alimentos propios con ese nombre.
+    Sin tipo ni calorías se usan los más comunes entre los propios. Devuelve el id, o None si no había datos.
+    """
+    normalizado = normalizar(nombre)
+    cursor.execute("""
+        SELECT mode() WITHIN GROUP (ORDER BY tipo_comida), percentile_disc(0.5) WITHIN GROUP (ORDER BY calorias)
+        FROM alimentos WHERE usuario_id IS NOT NULL AND nombre_normalizado = %s
+    """, (normalizado,))
+    tipo_comun, calorias_comunes = cursor.fetchone()
+    tipo_comida = tipo_comida or tipo_comun
+    calorias = calorias if calorias is not None else calorias_comunes
+    if tipo_comida is None or calorias is None:
+        return None
+    cursor.execute(f"""
+        INSERT INTO alimentos (nombre, nombre_normalizado, tipo_comida, porcion, calorias)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT {CONFLICTO} DO UPDATE SET tipo_comida = excluded.tipo_comida, porcion = excluded.porcion,
+            calorias = excluded.calorias
+        RETURNING id
+    """, (" ".join(nombre.split()), normalizado, tipo_comida, porcion, calorias))
+    (alimento_id,) = cursor.fetchone()
+    cursor.execute("""
+        UPDATE comidas c SET alimento_id = %s
+        FROM alimentos p
+        WHERE c.alimento_id = p.id AND p.usuario_id IS NOT NULL AND p.nombre_normalizado = %s
+    """, (alimento_id, normalizado))
+    cursor.execute("DELETE FROM alimentos WHERE usuario_id IS NOT NULL AND nombre_normalizado = %s", (normalizado,))
+    return alimento_id
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Revisión del catálogo compartido de alimentos.")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--pendientes", action="store_true", help="alimentos propios registrados por más usuarios")
+    grupo.add_argument("--aprobar", metavar="NOMBRE", help="sumar un alimento al catálogo compartido")
+    parser.add_argument("--tipo", help="tipo de comida (por defecto, el más usado)")
+    parser.add_argument("--porcion", default=PORCION, help="descripción de la porción")
+    parser.add_argument("--calorias", type=int, help="calorías por porción (por defecto, la mediana registrada)")
+    args = parser.parse_args(argumentos)
+
+    conn = psycopg2.connect(cadena_conexion())
+    try:
+        with conn:
+            cursor = conn.cursor()
+            if args.pendientes:
+                for nombre, usuarios, calorias in pendientes(cursor):
+                    print(f"{nombre}: {usuarios} usuario(s), {calorias} kcal")
+            else:
+                alimento_id = aprobar(cursor, args.aprobar, args.tipo, args.porcion, args.calorias)
+                if alimento_id is None:
+                    parser.error(f"Nadie registró '{args.aprobar}': indicá --tipo y --calorias.")
+                print(f"'{args.aprobar}' agregado al catálogo (id {alimento_id}).")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
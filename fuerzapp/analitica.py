@@ -0,0 +1,251 @@
+# fuerzapp/analitica.py
+###########################################################################################################################
+# Analítica de entrenamiento precalculada por usuario, para la página Progreso.
+#   analitica_diaria  -> por día: carga (minutos), carga aguda (media de 7 días), crónica (media de 28 días),
+#                        ACWR (aguda / crónica), balance calórico medio de 7 y 28 días y racha de días entrenando
+#   analitica_semanal -> minutos y sesiones por semana y tipo de entrenamiento
+#   analitica_estado  -> hasta qué día está calculado, la marca de agua de los resúmenes ya procesados y la racha máxima
+# Se calcula desde los resúmenes diarios (fuerzapp.resumenes), nunca desde los registros crudos, y de forma
+# incremental: cada fila de resumen_diario lleva `actualizado`, y solo se recalcula desde el día más viejo que cambió
+# después de la marca de agua (o desde el último día calculado, para extender la serie hasta hoy). Las ventanas
+# móviles se calculan con pandas sobre ese tramo más los 27 días previos.
+# La página lee el estado y unas pocas filas recientes (no depende del largo del historial) y el resultado queda
+# en la caché de consultas hasta la próxima escritura.
+# numpy y pandas se importan recién al calcular.
+#
+# Cálculo completo (por ejemplo, después de `python -m fuerzapp.resumenes`):
+#   FUERZAPP_DB_URL=postgresql://... python -m fuerzapp.analitica [--usuario ID]
+#######################################################
+import argparse
+from datetime import date, timedelta
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from fuerzapp.cache import obtener_cache
+from fuerzapp.db import cadena_conexion, get_connection
+
+VENTANA_AGUDA = 7
+VENTANA_CRONICA = 28
+DIAS_SERIE = 90        # días de la serie que se muestran en Progreso
+SEMANAS_VOLUMEN = 12   # semanas del gráfico de volumen
+# Una transacción que empezó antes que la lectura puede confirmar después con un `actualizado` anterior: la marca
+# de agua nunca avanza más allá de ahora menos este margen, así esos cambios se ven en el cálculo siguiente
+MARGEN_MARCA = timedelta(minutes=5)
+# Clave (junto con el usuario_id) del advisory lock que evita dos cálculos simultáneos del mismo usuario
+CLAVE_BLOQUEO = 7302
+
+# Las tablas las crea la migración 6 de fuerzapp.migraciones
+
+
+#######################################################
+####################################################### Cálculo
+#######################################################
+def rachas(entreno, previa=0):
+    """
+    Para cada día, cuántos días seguidos lleva entrenando (0 si ese día no entrenó).
+    `entreno`: array booleano por día; `previa`: racha del día anterior al primero.
+    """
+    import numpy as np
+
+    entreno = np.asarray(entreno, dtype=bool)
+    posiciones = np.arange(1, len(entreno) + 1)
+    # Posición (1..n) del último día sin entrenar hasta cada día; antes del primero, 0 menos la racha previa
+    cortes = np.maximum.accumulate(np.where(entreno, 0, posiciones))
+    cortes = np.where(cortes == 0, -previa, cortes)
+    return np.where(entreno, posiciones - cortes, 0)
+
+
+def calcular_series(diario, desde, hasta, racha_previa=0):
+    """
+    Métricas diarias de `desde` a `hasta` (inclusive). `diario` es un DataFrame indexado por fecha con
+    minutos, sesiones, calorias_consumidas y calorias_quemadas, que debe cubrir también los 27 días previos a
+    `desde` (los días sin fila cuentan como 0).
+    """
+    import pandas as pd
+
+    calendario = pd.date_range(desde - timedelta(days=VENTANA_CRONICA - 1), hasta, freq="D")
+    diario = diario.reindex(calendario, fill_value=0)
+    carga = diario["minutos"].astype("int64")
+    balance = (diario["calorias_consumidas"] - diario["calorias_quemadas"]).astype("float64")
+    aguda = carga.rolling(VENTANA_AGUDA, min_periods=1).sum() / VENTANA_AGUDA
+    cronica = carga.rolling(VENTANA_CRONICA, min_periods=1).sum() / VENTANA_CRONICA
+    series = pd.DataFrame({
+        "carga": carga,
+        "carga_aguda": aguda,
+        "carga_cronica": cronica,
+        "acwr": (aguda / cronica).where(cronica > 0),
+        "balance_7": balance.rolling(VENTANA_AGUDA, min_periods=1).mean(),
+        "balance_28": balance.rolling(VENTANA_CRONICA, min_periods=1).mean(),
+    })
+    series = series.loc[pd.Timestamp(desde):]
+    series["racha"] = rachas(diario["sesiones"].loc[pd.Timestamp(desde):].to_numpy() > 0, racha_previa)
+    return series
+
+
+def actualizar(cursor, usuario_id, hoy=None):
+    """
+    Pone al día la analítica del usuario desde su último cálculo. Debe ejecutarse dentro de una transacción
+    (la confirma quien llama). Devuelve el primer día recalculado, o None si ya estaba al día.
+    """
+    import pandas as pd
+
+    hoy = hoy or date.today()
+    cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", (CLAVE_BLOQUEO, usuario_id))
+    cursor.execute("SELECT marca, calculado_hasta, racha_maxima FROM analitica_estado WHERE usuario_id = %s",
+                   (usuario_id,))
+    estado = cursor.fetchone()
+    marca, calculado_hasta, racha_maxima = estado or (None, None, 0)
+
+    # Días de los resúmenes que cambiaron desde el último cálculo (todos, la primera vez)
+    cursor.execute("""
+        SELECT MIN(fecha), MAX(fecha), LEAST(MAX(actualizado), now() - %s) FROM resumen_diario
+        WHERE usuario_id = %s AND actualizado > %s
+    """, (MARGEN_MARCA, usuario_id, marca or "-infinity"))
+    primer_cambio, ultimo_cambio, nueva_marca = cursor.fetchone()
+    candidatos = [primer_cambio] if primer_cambio else []
+    if calculado_hasta is not None and calculado_hasta < hoy:
+        candidatos.append(calculado_hasta + timedelta(days=1))
+    if not candidatos:
+        return None
+    desde = min(candidatos)
+    hasta = max(hoy, ultimo_cambio or hoy, calculado_hasta or hoy)
+
+    cursor.execute("""
+        SELECT fecha, minutos_entrenamiento, sesiones, calorias_consumidas, calorias_quemadas FROM resumen_diario
+        WHERE usuario_id = %s AND fecha BETWEEN %s AND %s
+    """, (usuario_id, desde - timedelta(days=VENTANA_CRONICA - 1), hasta))
+    diario = pd.DataFrame.from_records(
+        cursor.fetchall(), columns=["fecha", "minutos", "sesiones", "calorias_consumidas", "calorias_quemadas"])
+    diario["fecha"] = pd.to_datetime(diario["fecha"])
+    cursor.execute("SELECT racha FROM analitica_diaria WHERE usuario_id = %s AND fecha = %s",
+                   (usuario_id, desde - timedelta(days=1)))
+    previa = cursor.fetchone()
+    series = calcular_series(diario.set_index("fecha"), desde, hasta, previa[0] if previa else 0)
+
+    cursor.execute("DELETE FROM analitica_diaria WHERE usuario_id = %s AND fecha >= %s", (usuario_id, desde))
+    execute_values(cursor, """
+        INSERT INTO analitica_diaria (usuario_id, fecha, carga, carga_aguda, carga_cronica, acwr,
+                                      balance_7, balance_28, racha)
+        VALUES %s
+    """, [
+        (usuario_id, fecha.date(), int(f.carga), float(f.carga_aguda), float(f.carga_cronica),
+         None if pd.isna(f.acwr) else float(f.acwr), float(f.balance_7), float(f.balance_28), int(f.racha))
+        for fecha, f in zip(series.index, series.itertuples(index=False))
+    ], page_size=1000)
+
+    # Volumen semanal: se rehacen las semanas desde la del primer día recalculado
+    semana = desde - timedelta(days=desde.weekday())
+    cursor.execute("DELETE FROM analitica_semanal WHERE usuario_id = %s AND semana >= %s", (usuario_id, semana))
+    cursor.execute("""
+        INSERT INTO analitica_semanal (usuario_id, semana, tipo, minutos, sesiones)
+        SELECT usuario_id, date_trunc('week', fecha)::date, tipo, SUM(minutos), SUM(sesiones)
+        FROM resumen_diario_entrenamiento
+        WHERE usuario_id = %s AND fecha >= %s
+        GROUP BY usuario_id, date_trunc('week', fecha), tipo
+    """, (usuario_id, semana))
+
+    # Si solo se agregaron días al final, la racha máxima anterior sigue valiendo; si cambió el pasado, se recalcula
+    if calculado_hasta is not None and desde > calculado_hasta:
+        racha_maxima = max(racha_maxima, int(series["racha"].max()))
+    else:
+        cursor.execute("SELECT COALESCE(MAX(racha), 0) FROM analitica_diaria WHERE usuario_id = %s", (usuario_id,))
+        racha_maxima = cursor.fetchone()[0]
+    cursor.execute("""
+        INSERT INTO analitica_estado (usuario_id, marca, calculado_hasta, racha_maxima)
+        VALUES (%(u)s, COALESCE(%(marca)s, '-infinity'), %(hasta)s, %(racha)s)
+        ON CONFLICT (usuario_id) DO UPDATE SET
+            marca = GREATEST(analitica_estado.marca, EXCLUDED.marca),
+            calculado_hasta = EXCLUDED.calculado_hasta,
+            racha_maxima = EXCLUDED.racha_maxima
+    """, {"u": usuario_id, "marca": nueva_marca or marca, "hasta": hasta, "racha": racha_maxima})
+    return desde
+
+
+#######################################################
+####################################################### Lectura para la página
+#######################################################
+def progreso(usuario_id):
+    """
+    Analítica del usuario para la página Progreso, puesta al día si hace falta:
+    {"racha_actual", "racha_maxima", "hoy" (dict con la fila de hoy de analitica_diaria o None), "serie" (últimos DIAS_SERIE días),
+     "volumen" (minutos por semana y tipo de las últimas SEMANAS_VOLUMEN semanas)}.
+    """
+    import pandas as pd
+
+    hoy = date.today()
+
+    def consultar():
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            actualizar(cursor, usuario_id, hoy)
+            cursor.execute("SELECT racha_maxima FROM analitica_estado WHERE usuario_id = %s", (usuario_id,))
+            estado = cursor.fetchone()
+            cursor.execute("""
+                SELECT fecha, carga, carga_aguda, carga_cronica, acwr, balance_7, balance_28, racha
+                FROM analitica_diaria
+                WHERE usuario_id = %s AND fecha > %s AND fecha <= %s
+                ORDER BY fecha
+            """, (usuario_id, hoy - timedelta(days=DIAS_SERIE), hoy))
+            serie = pd.DataFrame.from_records(cursor.fetchall(), columns=[
+                "fecha", "carga", "carga_aguda", "carga_cronica", "acwr", "balance_7", "balance_28", "racha"])
+            cursor.execute("""
+                SELECT semana, tipo, minutos, sesiones FROM analitica_semanal
+                WHERE usuario_id = %s AND semana > %s
+                ORDER BY semana, tipo
+            """, (usuario_id, hoy - timedelta(weeks=SEMANAS_VOLUMEN)))
+            volumen = pd.DataFrame.from_records(cursor.fetchall(), columns=["semana", "tipo", "minutos", "sesiones"])
+        dia = None
+        if not serie.empty and serie["fecha"].iloc[-1] == hoy:
+            dia = {clave: (None if pd.isna(valor) else valor) for clave, valor in serie.iloc[-1].items()}
+        # La racha sigue viva si hoy todavía no entrenó pero ayer sí
+        racha_actual = 0
+        if dia is not None:
+            racha_actual = int(dia["racha"]) or (int(serie["racha"].iloc[-2]) if len(serie) > 1 else 0)
+        return {
+            "racha_actual": racha_actual,
+            "racha_maxima": estado[0] if estado else 0,
+            "hoy": dia,
+            "serie": serie,
+            "volumen": volumen,
+        }
+
+    # Depende de entrenamientos y comidas: se guarda bajo las dos para que cualquier escritura lo invalide
+    cache = obtener_cache()
+    tablas = ("entrenamientos", "comidas")
+    forma = ("progreso", hoy)
+    encontrados = [cache.obtener(usuario_id, tabla, forma) for tabla in tablas]
+    if all(encontrado for encontrado, _ in encontrados):
+        return encontrados[0][1]
+    resultado = consultar()
+    for tabla in tablas:
+        cache.guardar(usuario_id, tabla, forma, resultado)
+    return resultado
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Pone al día la analítica de entrenamiento desde los resúmenes.")
+    parser.add_argument("--usuario", type=int, help="calcular solo este usuario_id")
+    parser.add_argument("--completo", action="store_true", help="descartar lo calculado y recalcular desde cero")
+    args = parser.parse_args(argumentos)
+
+    conn = psycopg2.connect(cadena_conexion())
+    try:
+        with conn:
+            cursor = conn.cursor()
+            if args.usuario:
+                usuarios = [args.usuario]
+            else:
+                cursor.execute("SELECT DISTINCT usuario_id FROM resumen_diario ORDER BY 1")
+                usuarios = [fila[0] for fila in cursor.fetchall()]
+            for usuario_id in usuarios:
+                if args.completo:
+                    cursor.execute("DELETE FROM analitica_estado WHERE usuario_id = %s", (usuario_id,))
+                actualizar(cursor, usuario_id)
+        print(f"Analítica actualizada para {len(usuarios)} usuario(s).")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# fuerzapp/arranque.py
+###########################################################################################################################
+# Medición del arranque de la app.
+# Cronometro registra cuánto tarda cada paso de un rerun (imports, esquema, página, ...) y qué librerías se cargaron
+# por primera vez en ese paso, para ver qué le cuesta a una sesión que solo llega al login y qué suma cada página.
+# El informe se imprime en el log de cada rerun y, con mostrar_tiempos = true en secrets, también en el sidebar.
+#
+# Costo en frío (proceso nuevo, como un contenedor recién levantado) de importar cada página:
+#   python -m fuerzapp.arranque
+#######################################################
+import argparse
+import logging
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# Librerías cuyo costo de carga interesa seguir
+PESADAS = ("pandas", "numpy", "plotly", "pyarrow")
+
+
+def _cargadas():
+    return {nombre.partition(".")[0] for nombre in sys.modules}
+
+
+class Cronometro:
+    """
+    Acumula la duración de los pasos de un rerun. `inicio` es el perf_counter() del comienzo del script.
+    """
+
+    def __init__(self, inicio=None):
+        self.inicio = time.perf_counter() if inicio is None else inicio
+        self.pasos = []
+
+    @contextmanager
+    def paso(self, nombre):
+        antes = _cargadas()
+        comienzo = time.perf_counter()
+        try:
+            yield
+        finally:
+            nuevas = sorted(_cargadas() - antes)
+            self.pasos.append((nombre, time.perf_counter() - comienzo, nuevas))
+
+    def total(self):
+        return time.perf_counter() - self.inicio
+
+    def informe(self):
+        """
+        Una línea por paso: "nombre: 12.3 ms (+pandas, +plotly)". Solo se nombran las librerías de PESADAS;
+        el resto de los paquetes nuevos se cuenta.
+        """
+        lineas = []
+        for nombre, duracion, nuevas in self.pasos:
+            pesadas = [f"+{n}" for n in nuevas if n in PESADAS]
+            otras = len(nuevas) - len(pesadas)
+            if otras:
+                pesadas.append(f"+{otras} paquetes")
+            detalle = f" ({', '.join(pesadas)})" if pesadas else ""
+            lineas.append(f"{nombre}: {duracion * 1000:.1f} ms{detalle}")
+        lineas.append(f"total: {self.total() * 1000:.1f} ms")
+        return lineas
+
+    def informar(self, mostrar=False):
+        """
+        Imprime el informe en el log y, si `mostrar`, lo muestra en un desplegable del sidebar.
+        """
+        lineas = self.informe()
+        log.debug("Tiempos del rerun", extra={"pasos": lineas})
+        if mostrar:
+            import streamlit as st
+
+            cargadas = [n for n in PESADAS if n in sys.modules]
+            with st.sidebar.expander("⏱️ Tiempos de arranque"):
+                st.markdown("\n".join(f"- {linea}" for linea in lineas))
+                st.caption(f"Librerías pesadas en memoria: {', '.join(cargadas) or 'ninguna'}")
+
+
+#######################################################
+####################################################### Costo en frío por módulo
+#######################################################
+# Módulos que se miden por defecto: lo que carga toda sesión y cada página
+MODULOS = (
+    "fuerzapp.paginas.login",
+    "fuerzapp.paginas.inicio",
+    "fuerzapp.paginas.entrenamiento",
+    "fuerzapp.paginas.reportes",
+    "fuerzapp.paginas.importar",
+    "fuerzapp.paginas.exportar",
+    "pandas",
+    "plotly.express",
+)
+
+# Se ejecuta en un proceso nuevo: streamlit ya está cargado en la app, así que se importa antes de medir
+_MEDICION = """
+import resource, sys, time
+import streamlit
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+comienzo = time.perf_counter()
+__import__(sys.argv[1])
+duracion = time.perf_counter() - comienzo
+memoria = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+print(f"{duracion * 1000:.1f} {memoria / 1024:.1f}")
+"""
+
+
+def medir_en_frio(modulo):
+    """
+    Importa `modulo` en un intérprete nuevo (con streamlit ya cargado) y devuelve (milisegundos, MB de memoria extra).
+    """
+    salida = subprocess.run([sys.executable, "-c", _MEDICION, modulo], capture_output=True, text=True, check=True)
+    milisegundos, megas = salida.stdout.split()
+    return float(milisegundos), float(megas)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Mide el costo en frío de importar cada página de FuerzApp.")
+    parser.add_argument("modulos", nargs="*", default=MODULOS, help="módulos a medir")
+    parser.add_argument("--repeticiones", type=int, default=3, help="se informa la mediana")
+    args = parser.parse_args(argumentos)
+
+    print(f"{'módulo':<34}{'ms':>9}{'MB':>8}")
+    for modulo in args.modulos:
+        medidas = sorted(medir_en_frio(modulo) for _ in range(args.repeticiones))
+        milisegundos, megas = medidas[len(medidas) // 2]
+        print(f"{modulo:<34}{milisegundos:>9.1f}{megas:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
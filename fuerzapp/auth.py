@@ -0,0 +1,108 @@
+# fuerzapp/auth.py
+###########################################################################################################################
+# Usuarios: validación del login y registro.
+# get_connection() presta una conexión del pool compartido; se usa como `with get_connection() as conn:`
+# y confirma la transacción al salir del bloque.
+# Las contraseñas se verifican en Python (fuerzapp.contrasenas), no en el WHERE: el hash lleva sal y parámetros.
+# Los emails que no existen se recuerdan unos segundos en la caché de consultas (bajo usuario_id None y la tabla
+# "usuarios"), para que repetir intentos con emails inventados no consulte la base cada vez.
+#######################################################
+import logging
+
+import psycopg2
+import streamlit as st
+
+from fuerzapp import contrasenas
+from fuerzapp.cache import obtener_cache
+from fuerzapp.datos import invalidar
+from fuerzapp.db import get_connection, leer_secreto
+from fuerzapp.replica import leer_postgres
+
+log = logging.getLogger(__name__)
+
+CACHE_NEGATIVA = 60  # segundos que se recuerda un email inexistente
+ROLES_COACH = ("coach", "admin")  # roles que ven la página de cohortes (ver fuerzapp.cohortes)
+
+
+# Función para convertir una contraseña en un hash irreversible, para no guardar texto plano. Usa scrypt con sal.
+def hash_password(password):
+    """
+    Convierte una contraseña en un hash scrypt (ver fuerzapp.contrasenas).
+    """
+    return contrasenas.generar_hash(password)
+
+# Validar login (Busca el usuario por email y verifica la contraseña contra el hash guardado.)
+def validar_usuario(email, password):
+    """
+    Valida un usuario buscándolo por email y verificando la contraseña contra su hash.
+    Si el hash es de un formato viejo (SHA-256) o con otros parámetros, lo reemplaza por uno nuevo.
+    """
+    cache = obtener_cache()
+    forma = ("email_desconocido", email)
+    desconocido, _ = cache.obtener(None, "usuarios", forma)
+    user = None
+    if not desconocido:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, nombre, email, contraseña, foto FROM usuarios WHERE email = %s", (email,))
+            user = cursor.fetchone()
+        if user is None:
+            cache.guardar(None, "usuarios", forma, True, ttl=float(leer_secreto("login_cache_negativa", CACHE_NEGATIVA)))
+    # Con email desconocido también se verifica (contra un hash ficticio): el tiempo de respuesta no lo delata
+    correcta, necesita_rehash = contrasenas.verificar(password, user[3] if user else None)
+    if not correcta:
+        log.info("Login rechazado", extra={"email_conocido": user is not None})
+        return None
+    if necesita_rehash:
+        nuevo_hash = hash_password(password)
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            # Solo si nadie lo cambió mientras tanto (otro login simultáneo ya lo pudo haber actualizado)
+            cursor.execute("UPDATE usuarios SET contraseña = %s WHERE id = %s AND contraseña = %s",
+                           (nuevo_hash, user[0], user[3]))
+        user = (user[0], user[1], user[2], nuevo_hash, user[4])
+        invalidar(user[0], "usuarios")
+        log.info("Hash de contraseña actualizado", extra={"usuario_id": user[0]})
+    # Nunca se loguea la tupla del usuario: trae el hash de la contraseña
+    log.info("Login correcto", extra={"usuario_id": user[0]})
+    return user
+
+# Registrar nuevo usuario (Registra un nuevo usuario. Si el email ya existe, devuelve False. Guarda la contraseña cifrada.)
+def registrar_usuario(nombre, email, password):
+    """
+    Registra un nuevo usuario en la base de datos.
+    Devuelve True si el registro es exitoso, False si el email ya existe o hay otro error.
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            # Insertar usuario con foto por defecto (None)
+            cursor.execute("INSERT INTO usuarios (nombre, email, contraseña, foto) VALUES (%s, %s, %s, %s)", (nombre, email, hash_password(password), None))
+        # El email deja de ser desconocido (se descartan todas las entradas negativas)
+        invalidar(None, "usuarios")
+        log.info("Usuario registrado")
+        return True
+    except psycopg2.IntegrityError:
+        # Error de integridad ocurre si el email ya existe (UNIQUE NOT NULL)
+        st.error("El email ya está registrado. Por favor, usá otro o iniciá sesión.")
+        log.info("Registro rechazado: email ya registrado")
+        return False
+    except Exception as e:
+        st.error(f"Error al registrar usuario: {e}")
+        log.error("Registro fallido", extra={"error": str(e)})
+        return False
+
+
+def rol(usuario_id):
+    """
+    Rol del usuario ('atleta', 'coach' o 'admin'); se guarda en la caché de consultas.
+    Sin conexión con la base (réplica activada) vale 'atleta': las páginas de coach no funcionan sin PostgreSQL.
+    """
+    def consultar():
+        with get_connection(detener=False) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT rol FROM usuarios WHERE id = %s", (usuario_id,))
+            fila = cursor.fetchone()
+        return fila[0] if fila else "atleta"
+
+    return leer_postgres(lambda: obtener_cache().obtener_o_calcular(usuario_id, "usuarios", ("rol",), consultar), "atleta")
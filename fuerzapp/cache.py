@@ -0,0 +1,121 @@
+# fuerzapp/cache.py
+###########################################################################################################################
+# Caché de consultas por usuario, compartida por todas las sesiones del proceso.
+# Cada entrada se identifica por (usuario_id, tabla, forma de la consulta), vence a los `ttl` segundos y,
+# cuando se llena, se desaloja la usada hace más tiempo (LRU).
+# Las escrituras invalidan solo las entradas del usuario y la tabla afectados.
+#######################################################
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from fuerzapp.db import leer_secreto
+
+CACHE_MAX_ENTRADAS = 2048  # entradas como máximo (por proceso)
+CACHE_TTL = 300            # segundos de vida de una entrada
+
+
+class CacheConsultas:
+    """
+    Caché TTL + LRU thread-safe para resultados de consultas.
+    Los valores guardados se comparten entre sesiones: quien los lee no debe modificarlos.
+    """
+
+    def __init__(self, maximo=CACHE_MAX_ENTRADAS, ttl=CACHE_TTL):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # clave -> (vence_en, valor)
+        self._por_tabla = {}            # (usuario_id, tabla) -> claves cacheadas
+        self.aciertos = 0
+        self.fallos = 0
+        self.vencidas = 0
+        self.desalojadas = 0
+        self.invalidadas = 0
+
+    def obtener(self, usuario_id, tabla, forma):
+        """
+        Devuelve (True, valor) si hay una entrada vigente, o (False, None) si no.
+        """
+        clave = (usuario_id, tabla, forma)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] > time.monotonic():
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return True, entrada[1]
+            if entrada is not None:
+                self._quitar(clave)
+                self.vencidas += 1
+            self.fallos += 1
+            return False, None
+
+    def guardar(self, usuario_id, tabla, forma, valor, ttl=None):
+        clave = (usuario_id, tabla, forma)
+        vence_en = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entradas[clave] = (vence_en, valor)
+            self._entradas.move_to_end(clave)
+            self._por_tabla.setdefault((usuario_id, tabla), set()).add(clave)
+            while len(self._entradas) > self.maximo:
+                self._quitar(next(iter(self._entradas)))
+                self.desalojadas += 1
+
+    def obtener_o_calcular(self, usuario_id, tabla, forma, calcular, ttl=None):
+        """
+        Devuelve el valor cacheado o lo calcula con `calcular()` y lo guarda.
+        """
+        encontrado, valor = self.obtener(usuario_id, tabla, forma)
+        if not encontrado:
+            valor = calcular()
+            self.guardar(usuario_id, tabla, forma, valor, ttl)
+        return valor
+
+    def invalidar(self, usuario_id, tabla=None):
+        """
+        Borra las entradas de `usuario_id` para `tabla` (o para todas sus tablas si no se indica).
+        """
+        with self._lock:
+            grupos = [g for g in self._por_tabla if g[0] == usuario_id and (tabla is None or g[1] == tabla)]
+            for grupo in grupos:
+                for clave in list(self._por_tabla.get(grupo, ())):
+                    self._quitar(clave)
+                    self.invalidadas += 1
+
+    def _quitar(self, clave):
+        self._entradas.pop(clave, None)
+        grupo = clave[:2]
+        claves = self._por_tabla.get(grupo)
+        if claves is not None:
+            claves.discard(clave)
+            if not claves:
+                del self._por_tabla[grupo]
+
+    def estadisticas(self):
+        """
+        Contadores de uso de la caché.
+        """
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "vencidas": self.vencidas,
+                "desalojadas": self.desalojadas,
+                "invalidadas": self.invalidadas,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_cache():
+    """
+    Caché única por proceso. Se configura con cache_max_entradas y cache_ttl en st.secrets.
+    """
+    return CacheConsultas(
+        maximo=int(leer_secreto("cache_max_entradas", CACHE_MAX_ENTRADAS)),
+        ttl=float(leer_secreto("cache_ttl", CACHE_TTL)),
+    )
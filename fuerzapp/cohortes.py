@@ -0,0 +1,321 @@
+# fuerzapp/cohortes.py
+###########################################################################################################################
+# Cohortes: grupos de usuarios que un coach (o un admin) sigue en conjunto.
+#   usuarios.rol      -> 'atleta' (por defecto), 'coach' o 'admin'
+#   cohortes          -> nombre y coach; `modificada` cambia con cada alta o baja de miembros
+#   cohorte_miembros  -> (cohorte_id, usuario_id)
+# Las métricas de una cohorte salen de una sola consulta sobre resumen_diario (fuerzapp.resumenes) que junta a todos
+# los miembros y agrupa por usuario y semana: el costo crece con miembros × semanas, no con una consulta por usuario.
+# El resumen por miembro (adherencia, balance, tendencia del peso) se calcula con pandas/numpy; en cohortes grandes
+# los miembros se reparten en bloques entre procesos (ProcessPoolExecutor).
+# El resultado queda en la caché de consultas bajo (cohorte, rango, objetivo, marca): la marca es el último
+# `actualizado` de los resúmenes de los miembros más la última modificación de la cohorte, así cualquier registro
+# nuevo de un miembro (de cualquier proceso) produce otra clave.
+# numpy y pandas se importan recién al calcular.
+#
+# Cambiar el rol de un usuario desde consola:
+#   FUERZAPP_DB_URL=postgresql://... python -m fuerzapp.cohortes --email coach@mail.com --rol coach
+#######################################################
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import types
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+
+import psycopg2
+import streamlit as st
+
+from fuerzapp.cache import obtener_cache
+from fuerzapp.datos import invalidar
+from fuerzapp.db import cadena_conexion, get_connection, leer_secreto
+
+log = logging.getLogger(__name__)
+
+ROLES = ("atleta", "coach", "admin")
+SEMANAS = 12              # semanas del rango por defecto
+OBJETIVO_SESIONES = 3     # sesiones por semana para contar la semana como cumplida
+UMBRAL_PROCESOS = 5000    # miembros a partir de los cuales el resumen se reparte entre procesos
+PROCESOS = 4              # procesos como máximo
+
+# Las tablas las crea la migración 8 de fuerzapp.migraciones
+
+
+#######################################################
+####################################################### Cohortes y miembros
+#######################################################
+def visibles(usuario_id, rol):
+    """
+    Cohortes que puede ver el usuario: todas para un admin, las propias para un coach.
+    Lista de (id, nombre, nombre del coach, miembros).
+    """
+    if rol not in ("coach", "admin"):
+        return []
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT c.id, c.nombre, u.nombre, (SELECT COUNT(*) FROM cohorte_miembros m WHERE m.cohorte_id = c.id)
+            FROM cohortes c
+            JOIN usuarios u ON u.id = c.coach_id
+            WHERE %(admin)s OR c.coach_id = %(usuario_id)s
+            ORDER BY c.nombre, c.id
+        """, {"admin": rol == "admin", "usuario_id": usuario_id})
+        return cursor.fetchall()
+
+
+def crear(coach_id, nombre):
+    """
+    Crea una cohorte vacía y devuelve su id.
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO cohortes (nombre, coach_id) VALUES (%s, %s) RETURNING id", (nombre.strip(), coach_id))
+        return cursor.fetchone()[0]
+
+
+def miembros(cohorte_id):
+    """
+    Miembros de la cohorte: lista de (usuario_id, nombre, email).
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT u.id, u.nombre, u.email
+            FROM cohorte_miembros m
+            JOIN usuarios u ON u.id = m.usuario_id
+            WHERE m.cohorte_id = %s
+            ORDER BY u.nombre, u.id
+        """, (cohorte_id,))
+        return cursor.fetchall()
+
+
+def agregar_miembros(cohorte_id, emails):
+    """
+    Suma a la cohorte los usuarios con esos emails. Devuelve (agregados, emails que no existen).
+    """
+    emails = sorted({e.strip().lower() for e in emails if e.strip()})
+    if not emails:
+        return 0, []
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, lower(email) FROM usuarios WHERE lower(email) = ANY(%s)", (emails,))
+        encontrados = cursor.fetchall()
+        cursor.execute("""
+            INSERT INTO cohorte_miembros (cohorte_id, usuario_id)
+            SELECT %s, unnest(%s::int[])
+            ON CONFLICT DO NOTHING
+        """, (cohorte_id, [usuario_id for usuario_id, _ in encontrados]))
+        agregados = cursor.rowcount
+        cursor.execute("UPDATE cohortes SET modificada = now() WHERE id = %s", (cohorte_id,))
+    invalidar(None, "cohortes")
+    conocidos = {email for _, email in encontrados}
+    return agregados, [e for e in emails if e not in conocidos]
+
+
+def quitar_miembros(cohorte_id, usuario_ids):
+    """
+    Quita usuarios de la cohorte.
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM cohorte_miembros WHERE cohorte_id = %s AND usuario_id = ANY(%s)",
+                       (cohorte_id, list(usuario_ids)))
+        cursor.execute("UPDATE cohortes SET modificada = now() WHERE id = %s", (cohorte_id,))
+    invalidar(None, "cohortes")
+
+
+#######################################################
+####################################################### Métricas
+#######################################################
+def _resumir_bloque(filas, semanas, objetivo):
+    """
+    Resumen por miembro a partir de sus filas semanales (usuario_id, semana, dias_entreno, sesiones, balance, peso).
+    Corre en el proceso de la app o en uno del pool: recibe y devuelve solo tipos simples.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame.from_records(filas, columns=["usuario_id", "semana", "dias_entreno", "sesiones", "balance", "peso"])
+    # Las semanas sin ningún registro no tienen fila: cuentan como no cumplidas al dividir por `semanas`
+    df["cumplida"] = df["sesiones"] >= objetivo
+    # Tendencia del peso: pendiente de mínimos cuadrados (kg por semana) con sumas por grupo, sin recorrer usuarios
+    df["x"] = (pd.to_datetime(df["semana"]) - pd.to_datetime(df["semana"]).min()).dt.days / 7
+    df["peso"] = df["peso"].astype("float64")
+    con_peso = df["peso"].notna()
+    df["n"] = con_peso.astype("int64")
+    df["x_peso"] = df["x"].where(con_peso)
+    df["xx"] = df["x_peso"] ** 2
+    df["xy"] = df["x_peso"] * df["peso"]
+    grupos = df.groupby("usuario_id", sort=False).agg(
+        cumplidas=("cumplida", "sum"), sesiones=("sesiones", "sum"), balance=("balance", "mean"),
+        ultima_semana=("semana", "max"), n=("n", "sum"), sx=("x_peso", "sum"), sy=("peso", "sum"),
+        sxx=("xx", "sum"), sxy=("xy", "sum"))
+    denominador = grupos["n"] * grupos["sxx"] - grupos["sx"] ** 2
+    tendencia = ((grupos["n"] * grupos["sxy"] - grupos["sx"] * grupos["sy"]) / denominador).where(
+        (grupos["n"] >= 2) & (denominador > 0))
+    return [
+        (int(usuario_id), cumplidas / semanas, sesiones / semanas,
+         None if pd.isna(balance) else float(balance), None if pd.isna(pendiente) else float(pendiente), ultima)
+        for usuario_id, cumplidas, sesiones, balance, pendiente, ultima in zip(
+            grupos.index, grupos["cumplidas"], grupos["sesiones"], grupos["balance"], tendencia, grupos["ultima_semana"])
+    ]
+
+
+def _cantidad_procesos():
+    return int(leer_secreto("cohortes_procesos", min(PROCESOS, os.cpu_count() or 1)))
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_procesos():
+    """
+    Pool de procesos (spawn) para resumir cohortes grandes, uno por proceso de la app.
+    Streamlit corre el script de la app como __main__ y spawn lo volvería a ejecutar en cada proceso hijo: los
+    procesos se crean todos acá, con un __main__ vacío mientras arrancan, y quedan vivos para las llamadas siguientes.
+    """
+    cantidad = _cantidad_procesos()
+    procesos = ProcessPoolExecutor(max_workers=cantidad, mp_context=multiprocessing.get_context("spawn"))
+    principal = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        # Mientras ningún proceso terminó su tarea, cada submit arranca uno nuevo
+        arranques = [procesos.submit(os.getpid) for _ in range(cantidad)]
+    finally:
+        sys.modules["__main__"] = principal
+    wait(arranques)
+    return procesos
+
+
+def _resumir(filas, semanas, objetivo):
+    """
+    Reparte las filas (ordenadas por usuario) en bloques de miembros completos y junta los resúmenes.
+    """
+    usuarios = list(dict.fromkeys(fila[0] for fila in filas))
+    if len(usuarios) < int(leer_secreto("cohortes_umbral_procesos", UMBRAL_PROCESOS)):
+        return _resumir_bloque(filas, semanas, objetivo)
+    cantidad = _cantidad_procesos()
+    por_bloque = -(-len(usuarios) // cantidad)
+    bloque_de = {usuario_id: i // por_bloque for i, usuario_id in enumerate(usuarios)}
+    bloques = [[] for _ in range(cantidad)]
+    for fila in filas:
+        bloques[bloque_de[fila[0]]].append(fila)
+    bloques = [b for b in bloques if b]
+    try:
+        parciales = list(obtener_procesos().map(_resumir_bloque, bloques, [semanas] * len(bloques), [objetivo] * len(bloques)))
+    except BrokenProcessPool:
+        # Un proceso del pool murió (por ejemplo, por falta de memoria): se rearma la próxima vez y ahora se hace acá
+        log.warning("Pool de procesos de cohortes roto; se resume en el proceso de la app")
+        obtener_procesos.clear()
+        parciales = [_resumir_bloque(bloque, semanas, objetivo) for bloque in bloques]
+    return [resumen for parcial in parciales for resumen in parcial]
+
+
+def _marca(cursor, cohorte_id):
+    # Usa el índice (usuario_id, actualizado) de resumen_diario: una lectura por miembro
+    cursor.execute("""
+        SELECT c.modificada, (
+            SELECT MAX(r.actualizado)
+            FROM cohorte_miembros m
+            JOIN resumen_diario r ON r.usuario_id = m.usuario_id
+            WHERE m.cohorte_id = c.id
+        )
+        FROM cohortes c
+        WHERE c.id = %s
+    """, (cohorte_id,))
+    return cursor.fetchone()
+
+
+def metricas(cohorte_id, desde=None, hasta=None, objetivo=OBJETIVO_SESIONES):
+    """
+    Métricas de la cohorte entre `desde` y `hasta` (por defecto, las últimas SEMANAS semanas):
+      - "miembros": DataFrame por miembro (adherencia, sesiones por semana, balance medio, tendencia del peso)
+      - "semanal": DataFrame por semana (adherencia de la cohorte, balance medio, miembros con registros)
+      - "resumen": dict con los promedios de la cohorte
+    La adherencia es la fracción de semanas con al menos `objetivo` sesiones.
+    """
+    hasta = hasta or date.today()
+    desde = desde or hasta - timedelta(weeks=SEMANAS) + timedelta(days=1)
+    # Semanas (de lunes a domingo) que toca el rango
+    semanas = ((hasta - timedelta(days=hasta.weekday())) - (desde - timedelta(days=desde.weekday()))).days // 7 + 1
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        marca = _marca(cursor, cohorte_id)
+
+    def consultar():
+        import pandas as pd
+
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT m.usuario_id, date_trunc('week', r.fecha)::date AS semana,
+                       COUNT(*) FILTER (WHERE r.sesiones > 0) AS dias_entreno,
+                       COALESCE(SUM(r.sesiones), 0) AS sesiones,
+                       AVG(r.calorias_consumidas - r.calorias_quemadas) FILTER (WHERE r.calorias_consumidas > 0) AS balance,
+                       AVG(r.peso) AS peso
+                FROM cohorte_miembros m
+                JOIN resumen_diario r ON r.usuario_id = m.usuario_id AND r.fecha BETWEEN %(desde)s AND %(hasta)s
+                WHERE m.cohorte_id = %(cohorte_id)s
+                GROUP BY m.usuario_id, semana
+                ORDER BY m.usuario_id, semana
+            """, {"cohorte_id": cohorte_id, "desde": desde, "hasta": hasta})
+            filas = [(u, s, d, int(n), None if b is None else float(b), p) for u, s, d, n, b, p in cursor.fetchall()]
+        lista = miembros(cohorte_id)
+
+        resumenes = pd.DataFrame.from_records(
+            _resumir(filas, semanas, objetivo),
+            columns=["usuario_id", "adherencia", "sesiones_semana", "balance", "tendencia_peso", "ultima_semana"])
+        por_miembro = pd.DataFrame.from_records(lista, columns=["usuario_id", "nombre", "email"]).merge(
+            resumenes, on="usuario_id", how="left")
+        # Quien no registró nada en el rango tiene adherencia 0
+        por_miembro = por_miembro.fillna({"adherencia": 0.0, "sesiones_semana": 0.0})
+
+        semanal = pd.DataFrame.from_records(filas, columns=["usuario_id", "semana", "dias_entreno", "sesiones", "balance", "peso"])
+        if semanal.empty:
+            semanal = pd.DataFrame(columns=["semana", "adherencia", "balance", "activos"])
+        else:
+            semanal["cumplida"] = semanal["sesiones"] >= objetivo
+            semanal = semanal.groupby("semana", as_index=False).agg(
+                cumplidas=("cumplida", "sum"), balance=("balance", "mean"), activos=("usuario_id", "nunique"))
+            semanal["adherencia"] = semanal["cumplidas"] / max(len(lista), 1)
+            semanal["semana"] = pd.to_datetime(semanal["semana"])
+            semanal = semanal[["semana", "adherencia", "balance", "activos"]]
+
+        return {
+            "miembros": por_miembro,
+            "semanal": semanal,
+            "resumen": {
+                "miembros": len(lista),
+                "adherencia": float(por_miembro["adherencia"].mean()) if lista else None,
+                "balance": float(por_miembro["balance"].mean()) if por_miembro["balance"].notna().any() else None,
+                "tendencia_peso": float(por_miembro["tendencia_peso"].median()) if por_miembro["tendencia_peso"].notna().any() else None,
+            },
+            "desde": desde,
+            "hasta": hasta,
+        }
+
+    forma = ("metricas", cohorte_id, desde, hasta, objetivo, marca)
+    return obtener_cache().obtener_o_calcular(None, "cohortes", forma, consultar)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Cambia el rol de un usuario de FuerzApp.")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--rol", required=True, choices=ROLES)
+    args = parser.parse_args(argumentos)
+
+    conn = psycopg2.connect(cadena_conexion())
+    try:
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE usuarios SET rol = %s WHERE lower(email) = lower(%s)", (args.rol, args.email))
+            if cursor.rowcount == 0:
+                parser.error(f"No existe un usuario con email {args.email}.")
+        print(f"{args.email} ahora es {args.rol}.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
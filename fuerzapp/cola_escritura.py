@@ -0,0 +1,329 @@
+# fuerzapp/cola_escritura.py
+###########################################################################################################################
+# Escritura diferida (write-behind) de los formularios de entrenamientos, comidas y medidas.
+# Con escritura_diferida = true en st.secrets, cada envío se agrega a un archivo local (WAL, con fsync) y a una cola
+# en memoria, y la página responde enseguida con el envío "pendiente". Un hilo junta los envíos en lotes y los
+# inserta con execute_values (un INSERT de varias filas por tabla), actualiza los resúmenes diarios y confirma todo
+# con un solo commit; recién ahí el envío pasa a "confirmado".
+# Si el proceso se reinicia con envíos sin confirmar, se vuelven a encolar desde el WAL al arrancar. Cada envío tiene
+# un id que se registra en escrituras_aplicadas dentro de la misma transacción: un envío que ya llegó a la base
+# antes de la caída no se inserta dos veces.
+# Un envío que no se puede escribir (la base lo rechaza, o el registro del WAL está mal formado) queda en "error" y
+# sale del WAL, para no trabar a los que vienen detrás; solo los errores de conexión se reintentan.
+# El WAL es de un solo proceso (la app de Streamlit corre en uno); escritura_wal indica su ruta.
+# Con la réplica local (fuerzapp.replica) la cola se activa siempre: lo que se registra sin conexión con PostgreSQL
+# queda en el WAL y se escribe al volver la conexión. Por eso el pool se pide recién en el hilo de escritura (como en
+# la réplica): si la base no responde al arrancar, la cola igual se crea y los envíos esperan en el WAL.
+#######################################################
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import date
+
+import psycopg2
+import streamlit as st
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+
+from fuerzapp import alimentos, resumenes
+from fuerzapp.datos import ESQUEMAS, invalidar
+from fuerzapp.db import leer_secreto, obtener_pool
+
+log = logging.getLogger(__name__)
+
+# Valores por defecto, configurables desde st.secrets
+MAXIMO = 1000          # envíos pendientes como máximo
+LOTE = 200             # envíos por transacción como máximo
+ESPERA_LOTE = 0.2      # segundos que se espera a que lleguen más envíos antes de escribir un lote
+REINTENTO = 2          # segundos entre reintentos si la base no responde (se duplica hasta REINTENTO_MAXIMO)
+REINTENTO_MAXIMO = 60
+WAL = "cola_escritura.jsonl"
+MAX_ESTADOS = 10_000   # estados de envíos recordados
+
+PENDIENTE, CONFIRMADO, ERROR = "pendiente", "confirmado", "error"
+# Errores de la base que dependen del envío y no de la conexión: reintentar no sirve
+RECHAZOS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+
+class ColaLlenaError(RuntimeError):
+    """
+    Hay demasiados envíos pendientes; conviene reintentar en unos segundos.
+    """
+
+
+def _a_json(valor):
+    return valor.isoformat() if isinstance(valor, date) else valor
+
+
+class ColaEscritura:
+    """
+    Cola de envíos con WAL en `ruta_wal` y un hilo que los escribe en lotes con conexiones del pool que devuelve
+    `obtener_pool()`. `al_confirmar(usuario_id, tabla)` se llama después de cada commit (para invalidar la caché).
+    """
+
+    def __init__(self, obtener_pool, ruta_wal, al_confirmar=None, maximo=MAXIMO, lote=LOTE, espera_lote=ESPERA_LOTE):
+        self.obtener_pool = obtener_pool
+        self.ruta_wal = ruta_wal
+        self.al_confirmar = al_confirmar
+        self.maximo = maximo
+        self.lote = lote
+        self.espera_lote = espera_lote
+        self._condicion = threading.Condition()
+        self._pendientes = deque()       # envíos {"id", "tabla", "fila"} en orden de llegada
+        self._estados = OrderedDict()    # id -> (estado, detalle)
+        self._lock_wal = threading.Lock()
+        self._limpiada = False           # escrituras_aplicadas se limpia con la primera conexión que funcione
+        self._reproducir_wal()
+        self._wal = open(self.ruta_wal, "a", encoding="utf-8")
+        self._hilo = threading.Thread(target=self._trabajar, name="cola-escritura", daemon=True)
+        self._hilo.start()
+
+    #######################################################
+    # WAL
+    #######################################################
+    def _reproducir_wal(self):
+        """
+        Vuelve a encolar los envíos del WAL que no tienen confirmación y lo reescribe solo con ellos.
+        """
+        if not os.path.exists(self.ruta_wal):
+            return
+        envios, confirmados = OrderedDict(), set()
+        with open(self.ruta_wal, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue  # última línea cortada por una caída a mitad de escritura
+                if not isinstance(registro, dict):
+                    log.error("Registro del WAL descartado", extra={"registro": linea[:200]})
+                elif "confirmados" in registro:
+                    confirmados.update(registro["confirmados"])
+                elif isinstance(registro.get("id"), str):
+                    envios[registro["id"]] = registro
+                else:
+                    # Sin id no se puede seguir ni confirmar; el resto de un envío mal formado lo rechaza el hilo
+                    log.error("Registro del WAL descartado", extra={"registro": linea[:200]})
+        pendientes = [e for i, e in envios.items() if i not in confirmados]
+        temporal = self.ruta_wal + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            for envio in pendientes:
+                f.write(json.dumps(envio) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta_wal)
+        for envio in pendientes:
+            self._pendientes.append(envio)
+            self._estados[envio["id"]] = (PENDIENTE, None)
+        if pendientes:
+            log.info("Envíos recuperados del WAL", extra={"envios": len(pendientes)})
+
+    def _escribir_wal(self, registro):
+        with self._lock_wal:
+            self._wal.write(json.dumps(registro) + "\n")
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+
+    def _compactar_wal(self):
+        # Sin envíos pendientes, todo lo del WAL está confirmado: se puede vaciar
+        with self._condicion, self._lock_wal:
+            if not self._pendientes:
+                self._wal.truncate(0)
+                self._wal.seek(0)
+
+    #######################################################
+    # API
+    #######################################################
+    def encolar(self, tabla, fila):
+        """
+        Agrega un envío (`fila`: dict con usuario_id y las columnas de `tabla`) y devuelve su id.
+        El envío queda en el WAL antes de volver. Lanza ColaLlenaError si hay demasiados pendientes.
+        """
+        if tabla not in ESQUEMAS:
+            raise ValueError(f"Tabla desconocida: {tabla}")
+        envio = {"id": uuid.uuid4().hex, "tabla": tabla, "fila": {c: _a_json(v) for c, v in fila.items()}}
+        with self._condicion:
+            if len(self._pendientes) >= self.maximo:
+                raise ColaLlenaError(f"Hay {len(self._pendientes)} envíos pendientes de guardar.")
+            self._escribir_wal(envio)
+            self._pendientes.append(envio)
+            self._recordar(envio["id"], PENDIENTE)
+            self._condicion.notify()
+        return envio["id"]
+
+    def estado(self, id_envio):
+        """
+        (estado, detalle) de un envío: "pendiente", "confirmado" o "error" (con el mensaje). None si no se conoce.
+        """
+        with self._condicion:
+            return self._estados.get(id_envio)
+
+    def pendientes(self):
+        with self._condicion:
+            return len(self._pendientes)
+
+    def _recordar(self, id_envio, estado, detalle=None):
+        self._estados[id_envio] = (estado, detalle)
+        self._estados.move_to_end(id_envio)
+        while len(self._estados) > MAX_ESTADOS:
+            self._estados.popitem(last=False)
+
+    #######################################################
+    # Hilo de escritura
+    #######################################################
+    def _tomar_lote(self):
+        with self._condicion:
+            while not self._pendientes:
+                self._condicion.wait()
+            # Se espera un poco a que se junten más envíos (los de un pico llegan casi a la vez)
+            limite = time.monotonic() + self.espera_lote
+            while len(self._pendientes) < self.lote and (restante := limite - time.monotonic()) > 0:
+                self._condicion.wait(restante)
+            return [self._pendientes[i] for i in range(min(self.lote, len(self._pendientes)))]
+
+    def _limpiar_aplicadas(self):
+        # Los ids solo hacen falta mientras el envío pueda seguir en un WAL
+        if self._limpiada:
+            return
+        try:
+            pool = self.obtener_pool()
+            conn = pool.obtener()
+            try:
+                with conn:
+                    conn.cursor().execute("DELETE FROM escrituras_aplicadas WHERE aplicada < now() - interval '7 days'")
+            finally:
+                pool.devolver(conn)
+            self._limpiada = True
+        except psycopg2.Error as e:
+            log.error("No se pudo limpiar escrituras_aplicadas", extra={"error": str(e)})
+
+    def _trabajar(self):
+        self._limpiar_aplicadas()
+        reintento = REINTENTO
+        while True:
+            lote = self._tomar_lote()
+            try:
+                self._aplicar(lote)
+                resultados = {envio["id"]: (CONFIRMADO, None) for envio in lote}
+                reintento = REINTENTO
+            except RECHAZOS:
+                # Algún envío es inválido: se aplican de a uno para no perder los demás
+                resultados = self._aplicar_de_a_uno(lote)
+            except psycopg2.Error as e:
+                # Base caída (también al crear el pool) o pool agotado: los envíos siguen en la cola y en el WAL
+                log.error("Error al escribir un lote; se reintenta", extra={"error": str(e), "reintento_s": reintento})
+                time.sleep(reintento)
+                reintento = min(reintento * 2, REINTENTO_MAXIMO)
+                continue
+            except Exception:
+                # Un envío mal formado (fecha inválida, columnas que faltan...): tampoco depende de la base
+                resultados = self._aplicar_de_a_uno(lote)
+            if not resultados:
+                continue
+            self._limpiar_aplicadas()
+            self._escribir_wal({"confirmados": list(resultados)})
+            with self._condicion:
+                quitados = 0
+                while self._pendientes and self._pendientes[0]["id"] in resultados:
+                    self._pendientes.popleft()
+                    quitados += 1
+                for id_envio, (estado, detalle) in resultados.items():
+                    self._recordar(id_envio, estado, detalle)
+            self._compactar_wal()
+            if self.al_confirmar:
+                confirmados = {(e["fila"]["usuario_id"], e["tabla"]) for e in lote
+                               if resultados.get(e["id"], (None,))[0] == CONFIRMADO}
+                for usuario_id, tabla in confirmados:
+                    self.al_confirmar(usuario_id, tabla)
+
+    def _aplicar_de_a_uno(self, lote):
+        """
+        Aplica los envíos del lote en transacciones separadas. Devuelve {id: (estado, detalle)} de los resueltos;
+        si se corta la conexión, los que faltan quedan pendientes para el próximo lote.
+        """
+        resultados = {}
+        for envio in lote:
+            try:
+                self._aplicar([envio])
+                resultados[envio["id"]] = (CONFIRMADO, None)
+            except RECHAZOS as e:
+                resultados[envio["id"]] = (ERROR, str(e).strip().splitlines()[0])
+                log.error("Envío descartado", extra={"envio": envio["id"], "error": str(e)})
+            except psycopg2.Error:
+                break
+            except Exception as e:
+                resultados[envio["id"]] = (ERROR, f"Envío mal formado ({type(e).__name__}: {e})")
+                log.exception("Envío mal formado descartado", extra={"envio": envio["id"]})
+        return resultados
+
+    def _aplicar(self, lote):
+        """
+        Inserta el lote en una transacción: registra los ids en escrituras_aplicadas (saltea los ya aplicados),
+        hace un INSERT de varias filas por tabla y actualiza los resúmenes diarios.
+        """
+        pool = self.obtener_pool()
+        conn = pool.obtener()
+        try:
+            with conn:
+                cursor = conn.cursor()
+                nuevos = {fila[0] for fila in execute_values(
+                    cursor,
+                    "INSERT INTO escrituras_aplicadas (id) VALUES %s ON CONFLICT DO NOTHING RETURNING id",
+                    [(envio["id"],) for envio in lote], fetch=True)}
+                por_tabla = {}
+                for envio in lote:
+                    if envio["id"] in nuevos:
+                        por_tabla.setdefault(envio["tabla"], []).append(envio["fila"])
+                for tabla, filas in por_tabla.items():
+                    _insertar(cursor, tabla, filas)
+        finally:
+            pool.devolver(conn)
+
+
+def _insertar(cursor, tabla, filas):
+    columnas = ["usuario_id", *ESQUEMAS[tabla]]
+    if tabla == "comidas":
+        # Los envíos sin alimento_id (alimento fuera del catálogo o encolado antes de la migración 7) se vinculan acá.
+        # Copias: si la transacción falla, el reintento no debe usar ids de alimentos que no llegaron a existir
+        columnas.append("alimento_id")
+        ids = alimentos.resolver(cursor, ((f["usuario_id"], f.get("alimento"), f.get("tipo_comida"), f.get("calorias"))
+                                          for f in filas if f.get("alimento_id") is None))
+        ids = iter(ids)
+        filas = [f if f.get("alimento_id") is not None else {**f, "alimento_id": next(ids)} for f in filas]
+    valores = [
+        tuple(date.fromisoformat(f["fecha"]) if c == "fecha" else f.get(c) for c in columnas)
+        for f in filas
+    ]
+    consulta = sql.SQL("INSERT INTO {tabla} ({columnas}) VALUES %s").format(
+        tabla=sql.Identifier(tabla), columnas=sql.SQL(", ").join(sql.Identifier(c) for c in columnas))
+    if tabla == "entrenamientos":
+        execute_values(cursor, consulta.as_string(cursor), valores)
+        resumenes.sumar_entrenamientos(cursor, [v[:5] for v in valores])
+    elif tabla == "comidas":
+        execute_values(cursor, consulta.as_string(cursor), valores)
+        resumenes.sumar_comidas(cursor, [(v[0], v[1], v[2], v[4]) for v in valores])
+    else:
+        # El resumen necesita el id de cada medida; RETURNING no garantiza el orden, así que devuelve la fila entera
+        insertadas = execute_values(cursor, consulta.as_string(cursor) + " RETURNING usuario_id, fecha, id, peso",
+                                    valores, fetch=True)
+        resumenes.sumar_medidas(cursor, insertadas)
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_cola():
+    """
+    Cola de escritura única por proceso, o None si no están activadas escritura_diferida ni replica_sqlite en st.secrets.
+    """
+    if not leer_secreto("escritura_diferida", False) and not leer_secreto("replica_sqlite", ""):
+        return None
+    return ColaEscritura(
+        obtener_pool,
+        leer_secreto("escritura_wal", WAL),
+        al_confirmar=invalidar,
+        maximo=int(leer_secreto("escritura_maximo", MAXIMO)),
+        lote=int(leer_secreto("escritura_lote", LOTE)),
+        espera_lote=float(leer_secreto("escritura_espera_lote", ESPERA_LOTE)),
+    )
@@ -0,0 +1,238 @@
+# fuerzapp/contrasenas.py
+###########################################################################################################################
+# Hash de contraseñas.
+# Los hashes nuevos usan scrypt (hashlib, sin dependencias), con sal aleatoria y costo configurable. Se guardan como
+#   scrypt$<n>$<r>$<p>$<sal base64>$<hash base64>
+# para que cada hash lleve sus propios parámetros. Los hashes viejos (SHA-256 sin sal, 64 caracteres hex) se siguen
+# aceptando y se reemplazan en el siguiente login correcto, igual que los scrypt con parámetros distintos a los
+# actuales (por ejemplo, después de subir el costo).
+# Para agregar otro algoritmo basta con una clase con la misma interfaz registrada en HASHERS.
+#
+# El cálculo corre en un pool de hilos acotado (hashlib.scrypt libera el GIL): una ráfaga de logins no
+# multiplica sin límite el uso de CPU y memoria (128 * n * r bytes por hash), así la latencia se mantiene estable.
+#
+# Calibración del costo en el host (sugiere hash_scrypt_n para una latencia objetivo):
+#   python -m fuerzapp.contrasenas --objetivo-ms 100
+#######################################################
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from fuerzapp.db import leer_secreto
+
+# Valores por defecto, configurables desde st.secrets
+SCRYPT_N = 2**14   # costo de CPU/memoria (potencia de 2): ~16 MB y unas decenas de ms por hash con r=8
+SCRYPT_R = 8       # tamaño de bloque
+SCRYPT_P = 1       # paralelismo
+HILOS = 4          # hashes calculados a la vez como máximo
+LARGO_SAL = 16
+LARGO_HASH = 32
+
+
+def _b64(datos):
+    return base64.b64encode(datos).decode("ascii").rstrip("=")
+
+
+def _desde_b64(texto):
+    return base64.b64decode(texto + "=" * (-len(texto) % 4))
+
+
+class HasherScrypt:
+    """
+    scrypt con los parámetros (n, r, p) indicados.
+    """
+    nombre = "scrypt"
+
+    def __init__(self, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+        if n < 2 or n & (n - 1):
+            raise ValueError(f"scrypt n debe ser una potencia de 2: {n}")
+        self.n, self.r, self.p = n, r, p
+
+    def _derivar(self, password, sal, n, r, p, largo):
+        # maxmem: lo que pide OpenSSL (128 * r * (n + p + 2)) más un margen
+        return hashlib.scrypt(password.encode(), salt=sal, n=n, r=r, p=p, dklen=largo,
+                              maxmem=128 * r * (n + p + 2) + 1024**2)
+
+    def generar(self, password):
+        sal = os.urandom(LARGO_SAL)
+        derivado = self._derivar(password, sal, self.n, self.r, self.p, LARGO_HASH)
+        return f"{self.nombre}${self.n}${self.r}${self.p}${_b64(sal)}${_b64(derivado)}"
+
+    def verificar(self, password, codificado):
+        # Un valor guardado mal formado (campos de más o de menos, parámetros no numéricos, base64 inválido)
+        # no verifica: el login falla en lugar de romper la página (binascii.Error es un ValueError)
+        try:
+            _, n, r, p, sal, esperado = codificado.split("$")
+            esperado = _desde_b64(esperado)
+            derivado = self._derivar(password, _desde_b64(sal), int(n), int(r), int(p), len(esperado))
+        except ValueError:
+            return False
+        return hmac.compare_digest(derivado, esperado)
+
+    def necesita_rehash(self, codificado):
+        try:
+            _, n, r, p, _, _ = codificado.split("$")
+            return (int(n), int(r), int(p)) != (self.n, self.r, self.p)
+        except ValueError:
+            return True
+
+
+class HasherSHA256Legado:
+    """
+    SHA-256 sin sal de las versiones anteriores. Solo verifica (no tiene generar): todo hash de este tipo se
+    reemplaza al loguearse.
+    """
+    nombre = "sha256"
+
+    def verificar(self, password, codificado):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), codificado.lower())
+
+    def necesita_rehash(self, codificado):
+        return True
+
+
+# Algoritmos conocidos, por el prefijo con el que se guardan
+HASHERS = {
+    HasherScrypt.nombre: HasherScrypt,
+    HasherSHA256Legado.nombre: HasherSHA256Legado,
+}
+
+
+def identificar(codificado):
+    """
+    Nombre del algoritmo de un hash guardado ("sha256" para los hex de 64 caracteres sin prefijo).
+    """
+    if "$" in codificado:
+        return codificado.split("$", 1)[0]
+    if len(codificado) == 64 and all(c in "0123456789abcdefABCDEF" for c in codificado):
+        return HasherSHA256Legado.nombre
+    return None
+
+
+class Contrasenas:
+    """
+    Genera y verifica hashes con el algoritmo actual en un pool de `hilos` hilos.
+    """
+
+    def __init__(self, actual, hilos=HILOS):
+        self.actual = actual
+        self._hashers = {nombre: clase() for nombre, clase in HASHERS.items()}
+        self._hashers[actual.nombre] = actual
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="hash")
+        # Hash de una contraseña al azar: se verifica contra él cuando el email no existe, para que el login
+        # tarde lo mismo con o sin usuario (y no revele qué emails están registrados)
+        self._ficticio = actual.generar(_b64(os.urandom(LARGO_SAL)))
+
+    def _verificar(self, password, codificado):
+        hasher = self._hashers.get(identificar(codificado))
+        if hasher is None:
+            return False, False
+        if not hasher.verificar(password, codificado):
+            return False, False
+        necesita = hasher is not self.actual or self.actual.necesita_rehash(codificado)
+        return True, necesita
+
+    def generar(self, password):
+        """
+        Hash nuevo de `password` con el algoritmo actual.
+        """
+        return self._pool.submit(self.actual.generar, password).result()
+
+    def verificar(self, password, codificado):
+        """
+        Devuelve (correcta, necesita_rehash). Con `codificado` None (usuario inexistente) hace el mismo trabajo
+        contra un hash ficticio y devuelve (False, False).
+        """
+        if codificado is None:
+            self._pool.submit(self.actual.verificar, password, self._ficticio).result()
+            return False, False
+        return self._pool.submit(self._verificar, password, codificado).result()
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_contrasenas():
+    """
+    Hasher compartido por todas las sesiones del proceso, con los parámetros de secrets
+    (hash_scrypt_n, hash_scrypt_r, hash_scrypt_p, hash_hilos).
+    """
+    actual = HasherScrypt(
+        n=int(leer_secreto("hash_scrypt_n", SCRYPT_N)),
+        r=int(leer_secreto("hash_scrypt_r", SCRYPT_R)),
+        p=int(leer_secreto("hash_scrypt_p", SCRYPT_P)),
+    )
+    return Contrasenas(actual, hilos=int(leer_secreto("hash_hilos", HILOS)))
+
+
+def generar_hash(password):
+    """
+    Hash para guardar en usuarios.contraseña.
+    """
+    return obtener_contrasenas().generar(password)
+
+
+def verificar(password, codificado):
+    """
+    (correcta, necesita_rehash) de `password` contra el hash guardado (None si el usuario no existe).
+    """
+    return obtener_contrasenas().verificar(password, codificado)
+
+
+#######################################################
+####################################################### Calibración
+#######################################################
+def medir(n, r, p, repeticiones=5):
+    """
+    Mediana en milisegundos de generar un hash scrypt con (n, r, p).
+    """
+    hasher = HasherScrypt(n, r, p)
+    tiempos = []
+    for _ in range(repeticiones):
+        comienzo = time.perf_counter()
+        hasher.generar("calibracion")
+        tiempos.append((time.perf_counter() - comienzo) * 1000)
+    return statistics.median(tiempos)
+
+
+def calibrar(objetivo_ms, r=SCRYPT_R, p=SCRYPT_P, repeticiones=5, n_maximo=2**22):
+    """
+    Duplica n desde 2**12 mientras un hash tarde menos que `objetivo_ms`. Devuelve [(n, ms), ...] medidos;
+    el último n es el primero que alcanza el objetivo (o n_maximo).
+    """
+    medidas = []
+    n = 2**12
+    while n <= n_maximo:
+        ms = medir(n, r, p, repeticiones)
+        medidas.append((n, ms))
+        if ms >= objetivo_ms:
+            break
+        n *= 2
+    return medidas
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Calibra el costo de scrypt para una latencia objetivo.")
+    parser.add_argument("--objetivo-ms", type=float, default=100, help="latencia buscada por hash (ms)")
+    parser.add_argument("--r", type=int, default=SCRYPT_R)
+    parser.add_argument("--p", type=int, default=SCRYPT_P)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argumentos)
+
+    medidas = calibrar(args.objetivo_ms, args.r, args.p, args.repeticiones)
+    print(f"{'n':>9}{'ms':>10}{'MB':>8}")
+    for n, ms in medidas:
+        print(f"{n:>9}{ms:>10.1f}{128 * n * args.r / 1024**2:>8.1f}")
+    n, ms = medidas[-1]
+    print("\nValores sugeridos para .streamlit/secrets.toml:")
+    print(f"hash_scrypt_n = {n}\nhash_scrypt_r = {args.r}\nhash_scrypt_p = {args.p}")
+    print(f"# ~{ms:.0f} ms por hash; con hash_hilos = N, N logins simultáneos usan ~{128 * n * args.r / 1024**2:.0f} MB cada uno")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# fuerzapp/datos.py
+###########################################################################################################################
+# Capa de acceso a datos para los paneles "Últimos ..." (Inicio y las páginas de Registrar).
+# Trae los últimos N registros de varias tablas en un único round trip: cada tabla se agrega a JSON
+# en una subconsulta y la consulta devuelve una sola fila con una columna por tabla.
+# Los resultados pasan por la caché de consultas (fuerzapp.cache): solo se consultan las tablas sin entrada vigente
+# y cada escritura debe llamar a invalidar() con el usuario y la tabla que modificó.
+# Con la réplica local activada (fuerzapp.replica) las tablas se leen de SQLite siempre que esté al día para el usuario.
+# pandas se importa recién al armar un DataFrame: ESQUEMAS e invalidar() se usan también desde el login,
+# la exportación y los formularios, que no lo necesitan.
+#######################################################
+from psycopg2 import sql
+
+from fuerzapp.cache import obtener_cache
+from fuerzapp.db import get_connection
+
+# Columnas de cada tabla con su tipo de pandas y la etiqueta que se muestra en pantalla
+ESQUEMAS = {
+    "entrenamientos": {
+        "fecha": ("datetime64[ns]", "Fecha"),
+        "tipo": ("string", "Tipo"),
+        "duracion": ("Int64", "Duración (min)"),
+        "calorias": ("Int64", "Calorías"),
+        "notas": ("string", "Notas"),
+    },
+    "comidas": {
+        "fecha": ("datetime64[ns]", "Fecha"),
+        "tipo_comida": ("string", "Tipo"),
+        "alimento": ("string", "Alimento"),
+        "calorias": ("Int64", "Calorías"),
+        "notas": ("string", "Notas"),
+    },
+    "medidas": {
+        "fecha": ("datetime64[ns]", "Fecha"),
+        "abdomen": ("Float64", "Abdomen (cm)"),
+        "cintura": ("Float64", "Cintura (cm)"),
+        "brazo": ("Float64", "Brazo (cm)"),
+        "pecho": ("Float64", "Pecho (cm)"),
+        "pierna": ("Float64", "Pierna (cm)"),
+        "peso": ("Float64", "Peso (kg)"),
+        "notas": ("string", "Notas"),
+    },
+}
+
+TABLAS = tuple(ESQUEMAS)
+
+
+def _subconsulta_ultimos(tabla):
+    """
+    Subconsulta que devuelve como un array JSON los últimos registros de `tabla` del usuario.
+    """
+    columnas = sql.SQL(", ").join(sql.Identifier(c) for c in ESQUEMAS[tabla])
+    return sql.SQL("""
+        (SELECT COALESCE(json_agg(t ORDER BY t.fecha DESC), '[]'::json)
+         FROM (SELECT {columnas} FROM {tabla}
+               WHERE usuario_id = %(usuario_id)s
+               ORDER BY fecha DESC
+               LIMIT %(limite)s) t) AS {alias}
+    """).format(columnas=columnas, tabla=sql.Identifier(tabla), alias=sql.Identifier(tabla))
+
+
+def a_dataframe(tabla, filas):
+    """
+    Convierte filas (dicts o tuplas en el orden de ESQUEMAS) en un DataFrame con los tipos de la tabla.
+    """
+    import pandas as pd
+
+    esquema = ESQUEMAS[tabla]
+    df = pd.DataFrame.from_records(filas, columns=list(esquema))
+    if "fecha" in df:
+        df["fecha"] = pd.to_datetime(df["fecha"])
+    return df.astype({columna: tipo for columna, (tipo, _) in esquema.items() if columna != "fecha"})
+
+
+def ultimos_registros(usuario_id, limite=5, tablas=TABLAS):
+    """
+    Devuelve {tabla: DataFrame} con los últimos `limite` registros del usuario en cada tabla pedida,
+    ordenados por fecha descendente. Las tablas que no están en caché se traen con una sola consulta.
+    Los DataFrames devueltos se comparten entre sesiones y no deben modificarse.
+    """
+    desconocidas = set(tablas) - set(ESQUEMAS)
+    if desconocidas:
+        raise ValueError(f"Tablas desconocidas: {sorted(desconocidas)}")
+    cache = obtener_cache()
+    forma = ("ultimos", limite)
+    resultado = {}
+    faltantes = []
+    for tabla in tablas:
+        encontrado, df = cache.obtener(usuario_id, tabla, forma)
+        if encontrado:
+            resultado[tabla] = df
+        else:
+            faltantes.append(tabla)
+    if faltantes:
+        faltantes = _ultimos_locales(usuario_id, limite, faltantes, resultado)
+    if faltantes:
+        consulta = sql.SQL("SELECT {}").format(sql.SQL(", ").join(_subconsulta_ultimos(t) for t in faltantes))
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(consulta, {"usuario_id": usuario_id, "limite": limite})
+            fila = cursor.fetchone()
+        for tabla, filas in zip(faltantes, fila):
+            resultado[tabla] = a_dataframe(tabla, filas)
+            cache.guardar(usuario_id, tabla, forma, resultado[tabla])
+    return {tabla: resultado[tabla] for tabla in tablas}
+
+
+def _ultimos_locales(usuario_id, limite, tablas, resultado):
+    """
+    Completa `resultado` con las tablas que se pueden leer de la réplica local y devuelve las que quedan.
+    """
+    from fuerzapp import replica  # importa ESQUEMAS de este módulo
+
+    cache = obtener_cache()
+    quedan = []
+    for tabla in tablas:
+        filas = replica.leer(usuario_id, (tabla,), f"""
+            SELECT {", ".join(ESQUEMAS[tabla])} FROM {tabla}
+            WHERE usuario_id = ? ORDER BY fecha DESC, id DESC LIMIT ?
+        """, (usuario_id, limite))
+        if filas is None:
+            quedan.append(tabla)
+            continue
+        resultado[tabla] = a_dataframe(tabla, filas)
+        cache.guardar(usuario_id, tabla, ("ultimos", limite), resultado[tabla])
+    return quedan
+
+
+def invalidar(usuario_id, tabla):
+    """
+    Descarta de la caché los resultados de `tabla` del usuario. Llamar después de cada escritura.
+    Con la réplica local activada, la tabla se lee de PostgreSQL hasta que la réplica tenga la escritura.
+    """
+    from fuerzapp.replica import obtener_replica
+
+    obtener_cache().invalidar(usuario_id, tabla)
+    replica = obtener_replica()
+    if replica is not None:
+        replica.marcar(usuario_id, tabla)
+
+
+def etiquetar(tabla, df):
+    """
+    Renombra las columnas de un DataFrame de `tabla` con sus etiquetas para mostrar.
+    """
+    return df.rename(columns={columna: etiqueta for columna, (_, etiqueta) in ESQUEMAS[tabla].items()})
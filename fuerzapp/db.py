@@ -0,0 +1,214 @@
+# fuerzapp/db.py
+###########################################################################################################################
+# Acceso a la base de datos PostgreSQL mediante un pool de conexiones.
+# El pool se crea una sola vez por proceso (st.cache_resource) y lo comparten todas las sesiones de Streamlit,
+# de modo que cada consulta reutiliza una conexión ya abierta en lugar de repetir el handshake TLS y el
+# fork del backend de Postgres. Cada conexión prestada y cada sentencia se miden (ver fuerzapp.metricas).
+#######################################################
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+import streamlit as st
+
+from fuerzapp.metricas import CursorMedido, registrar_conexion
+
+# Valores por defecto, configurables desde st.secrets
+POOL_MIN = 1         # conexiones abiertas al crear el pool
+POOL_MAX = 10        # conexiones simultáneas como máximo (por proceso)
+POOL_ESPERA = 10     # segundos que se espera una conexión libre antes de fallar
+POOL_CHEQUEO = 30    # segundos de inactividad a partir de los cuales se verifica la conexión con SELECT 1
+POOL_CONEXION = 5    # segundos como máximo para abrir una conexión (connect_timeout)
+
+log = logging.getLogger(__name__)
+
+
+class PoolAgotadoError(psycopg2.OperationalError):
+    """
+    No se obtuvo una conexión libre dentro del tiempo de espera.
+    """
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones thread-safe y acotado.
+    Mantiene abiertas las conexiones devueltas (hasta `maximo`), espera como mucho `espera` segundos
+    cuando están todas prestadas y verifica la salud de una conexión antes de prestarla.
+    """
+
+    def __init__(self, dsn, minimo=POOL_MIN, maximo=POOL_MAX, espera=POOL_ESPERA, chequeo=POOL_CHEQUEO,
+                 conexion=POOL_CONEXION):
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError(f"Tamaño de pool inválido: min={minimo}, max={maximo}")
+        self.dsn = dsn
+        self.minimo = minimo
+        self.maximo = maximo
+        self.espera = espera
+        self.chequeo = chequeo
+        self.conexion = conexion
+        self._lock = threading.Lock()
+        self._cupos = threading.BoundedSemaphore(maximo)
+        self._libres = []  # pila de (conexión, momento en que se devolvió)
+        for _ in range(minimo):
+            self._libres.append((self._abrir(), time.monotonic()))
+
+    def _abrir(self):
+        # Sin connect_timeout, un servidor que no responde deja la página esperando lo que tarde el TCP del sistema
+        return psycopg2.connect(self.dsn, cursor_factory=CursorMedido, connect_timeout=max(int(self.conexion), 1))
+
+    def _saludable(self, conn, devuelta_en):
+        """
+        Comprueba que la conexión siga viva. Solo hace un round trip (SELECT 1) si estuvo
+        inactiva más de `chequeo` segundos; si no, basta con el estado local de la conexión.
+        """
+        if conn.closed:
+            return False
+        if conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - devuelta_en < self.chequeo:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def obtener(self):
+        """
+        Presta una conexión del pool (abre una nueva si no hay libres y no se superó el máximo).
+        """
+        if not self._cupos.acquire(timeout=self.espera):
+            raise PoolAgotadoError(f"No hay conexiones libres tras esperar {self.espera} s (máximo {self.maximo}).")
+        try:
+            while True:
+                with self._lock:
+                    libre = self._libres.pop() if self._libres else None
+                if libre is None:
+                    conn = self._abrir()
+                    registrar_conexion(nueva=True)
+                    return conn
+                conn, devuelta_en = libre
+                if self._saludable(conn, devuelta_en):
+                    registrar_conexion(nueva=False)
+                    return conn
+                self._cerrar(conn)
+        except BaseException:
+            self._cupos.release()
+            raise
+
+    def devolver(self, conn):
+        """
+        Devuelve una conexión al pool dejándola sin transacción abierta.
+        Si quedó rota se descarta; el pool abrirá otra cuando haga falta.
+        """
+        try:
+            if not conn.closed:
+                estado = conn.info.transaction_status
+                if estado == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    self._cerrar(conn)
+                elif estado != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            if not conn.closed:
+                with self._lock:
+                    self._libres.append((conn, time.monotonic()))
+        except psycopg2.Error:
+            self._cerrar(conn)
+        finally:
+            self._cupos.release()
+
+    def _cerrar(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def cerrar(self):
+        """
+        Cierra todas las conexiones libres del pool.
+        """
+        with self._lock:
+            libres, self._libres = self._libres, []
+        for conn, _ in libres:
+            self._cerrar(conn)
+
+
+def leer_secreto(nombre, defecto=None):
+    """
+    Lee un valor opcional de st.secrets, devolviendo `defecto` si no está configurado.
+    """
+    try:
+        return st.secrets.get(nombre, defecto)
+    except Exception:
+        return defecto
+
+
+def cadena_conexion():
+    """
+    Cadena de conexión a PostgreSQL: la variable de entorno FUERZAPP_DB_URL (útil para los comandos de consola)
+    o, si no está definida, db_connection_string de st.secrets.
+    """
+    return os.environ.get("FUERZAPP_DB_URL") or st.secrets["db_connection_string"]
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_pool():
+    """
+    Crea (una vez por proceso) el pool compartido por todas las sesiones.
+    Tamaño y tiempos se configuran con db_pool_min, db_pool_max, db_pool_espera, db_pool_chequeo y
+    db_connect_timeout en st.secrets.
+    """
+    pool = PoolConexiones(
+        cadena_conexion(),
+        minimo=int(leer_secreto("db_pool_min", POOL_MIN)),
+        maximo=int(leer_secreto("db_pool_max", POOL_MAX)),
+        espera=float(leer_secreto("db_pool_espera", POOL_ESPERA)),
+        chequeo=float(leer_secreto("db_pool_chequeo", POOL_CHEQUEO)),
+        conexion=float(leer_secreto("db_connect_timeout", POOL_CONEXION)),
+    )
+    log.info("Pool de conexiones PostgreSQL creado", extra={"minimo": pool.minimo, "maximo": pool.maximo})
+    return pool
+
+
+def detener_sin_conexion(e):
+    """
+    Muestra el error de conexión y detiene la ejecución de la app (fuera de Streamlit, vuelve a lanzar `e`).
+    """
+    if not st.runtime.exists():
+        raise e
+    st.error(f"Error al conectar con la base de datos: {e}")
+    st.stop() # Detiene la ejecución de la app si no se puede conectar
+
+
+@contextmanager
+def get_connection(detener=True):
+    """
+    Presta una conexión del pool para usar con `with get_connection() as conn:`.
+    Al salir del bloque confirma la transacción (o la revierte si hubo un error) y devuelve la conexión al pool.
+    Si no se puede conectar detiene la página; con detener=False lanza el error para que quien llama siga sin
+    esos datos (ver fuerzapp.replica.leer_postgres).
+    """
+    try:
+        pool = obtener_pool()
+        conn = pool.obtener()
+    except Exception as e:
+        if not detener:
+            raise
+        detener_sin_conexion(e)
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+        raise
+    finally:
+        pool.devolver(conn)
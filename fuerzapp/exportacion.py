@@ -0,0 +1,132 @@
+# fuerzapp/exportacion.py
+###########################################################################################################################
+# Exportación del historial completo de un usuario (entrenamientos, comidas o medidas) a CSV o Parquet.
+# Las filas nunca pasan por un DataFrame con todo el historial:
+#   CSV     -> COPY (SELECT ...) TO STDOUT, que Postgres escribe directamente en el archivo destino.
+#   Parquet -> cursor con nombre (server-side) leído por lotes, cada lote se escribe como un row group.
+#
+# Uso desde consola (escribe directo al archivo, sin límite de tamaño):
+#   FUERZAPP_DB_URL=postgresql://... python -m fuerzapp.exportacion --tabla comidas --email ana@mail.com -o comidas.csv
+#######################################################
+import argparse
+import tempfile
+
+import psycopg2
+from psycopg2 import sql
+
+from fuerzapp.datos import ESQUEMAS
+from fuerzapp.db import cadena_conexion, get_connection
+
+FORMATOS = ("csv", "parquet")
+TAMANO_LOTE = 5_000            # filas por lote del cursor server-side
+MEMORIA_MAXIMA = 8 * 1024**2   # bytes que se mantienen en memoria antes de pasar a un archivo temporal
+
+# Tipos de Arrow de cada columna (según el tipo de pandas de datos.ESQUEMAS)
+_TIPOS_ARROW = {"datetime64[ns]": "date32", "string": "string", "Int64": "int64", "Float64": "float64"}
+
+
+def _consulta(tabla):
+    columnas = sql.SQL(", ").join(sql.Identifier(c) for c in ESQUEMAS[tabla])
+    return sql.SQL("SELECT {columnas} FROM {tabla} WHERE usuario_id = %s ORDER BY fecha, id").format(
+        columnas=columnas, tabla=sql.Identifier(tabla))
+
+
+def exportar_csv(conn, tabla, usuario_id, destino):
+    """
+    Escribe en `destino` (archivo binario) el CSV con encabezado de todas las filas del usuario en `tabla`.
+    """
+    with conn.cursor() as cursor:
+        # COPY no admite parámetros: la consulta se arma con mogrify, que escapa el valor
+        seleccion = cursor.mogrify(_consulta(tabla), (usuario_id,)).decode()
+        cursor.copy_expert(f"COPY ({seleccion}) TO STDOUT WITH (FORMAT csv, HEADER)", destino)
+
+
+def _convertir(valores, tipo):
+    """
+    Pasa a float/int los valores numéricos (una base creada a mano puede devolver Decimal en columnas NUMERIC).
+    """
+    if str(tipo) == "double":
+        return [None if v is None else float(v) for v in valores]
+    if str(tipo) == "int64":
+        return [None if v is None else int(v) for v in valores]
+    return valores
+
+
+def exportar_parquet(conn, tabla, usuario_id, destino, tamano_lote=TAMANO_LOTE):
+    """
+    Escribe en `destino` un Parquet con todas las filas del usuario en `tabla`, leyendo por lotes con un cursor
+    server-side. Requiere pyarrow.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("La exportación a Parquet necesita el paquete pyarrow.") from e
+
+    esquema = pa.schema([(c, getattr(pa, _TIPOS_ARROW[tipo])()) for c, (tipo, _) in ESQUEMAS[tabla].items()])
+    with conn.cursor(name=f"exportar_{tabla}") as cursor, pq.ParquetWriter(destino, esquema) as escritor:
+        cursor.itersize = tamano_lote
+        cursor.execute(_consulta(tabla), (usuario_id,))
+        while True:
+            filas = cursor.fetchmany(tamano_lote)
+            if not filas:
+                break
+            columnas = list(zip(*filas))
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(_convertir(valores, campo.type), type=campo.type) for valores, campo in zip(columnas, esquema)],
+                schema=esquema))
+
+
+def exportar(tabla, usuario_id, formato="csv"):
+    """
+    Genera la exportación con una conexión del pool y devuelve su contenido en bytes (para st.download_button).
+    Mientras se genera, el contenido se acumula en un archivo temporal en lugar de en memoria.
+    """
+    if tabla not in ESQUEMAS:
+        raise ValueError(f"Tabla desconocida: {tabla}")
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato}")
+    with tempfile.SpooledTemporaryFile(max_size=MEMORIA_MAXIMA) as archivo:
+        with get_connection() as conn:
+            if formato == "csv":
+                exportar_csv(conn, tabla, usuario_id, archivo)
+            else:
+                exportar_parquet(conn, tabla, usuario_id, archivo)
+        archivo.seek(0)
+        return archivo.read()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Exporta el historial de un usuario a CSV o Parquet.")
+    parser.add_argument("--tabla", required=True, choices=sorted(ESQUEMAS))
+    usuario = parser.add_mutually_exclusive_group(required=True)
+    usuario.add_argument("--usuario", type=int, help="usuario_id a exportar")
+    usuario.add_argument("--email", help="email del usuario a exportar")
+    parser.add_argument("--formato", choices=FORMATOS, help="por defecto, según la extensión del archivo")
+    parser.add_argument("-o", "--salida", required=True, help="archivo destino")
+    args = parser.parse_args(argumentos)
+    formato = args.formato or ("parquet" if args.salida.endswith(".parquet") else "csv")
+
+    conn = psycopg2.connect(cadena_conexion())
+    try:
+        with conn:
+            usuario_id = args.usuario
+            if usuario_id is None:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT id FROM usuarios WHERE email = %s", (args.email,))
+                    fila = cursor.fetchone()
+                if fila is None:
+                    parser.error(f"No existe un usuario con email {args.email}")
+                usuario_id = fila[0]
+            with open(args.salida, "wb") as destino:
+                if formato == "csv":
+                    exportar_csv(conn, args.tabla, usuario_id, destino)
+                else:
+                    exportar_parquet(conn, args.tabla, usuario_id, destino)
+    finally:
+        conn.close()
+    print(f"Exportado {args.tabla} del usuario {usuario_id} a {args.salida} ({formato}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# fuerzapp/historial.py
+###########################################################################################################################
+# Historial completo de entrenamientos, comidas y medidas, paginado por keyset.
+# Cada página se pide "después de" la última fila de la anterior, ordenando por (fecha, id) descendente:
+#   WHERE usuario_id = %s AND (fecha, id) < (%s, %s) ORDER BY fecha DESC, id DESC LIMIT n
+# Con el índice (usuario_id, fecha DESC, id DESC) la página 500 cuesta lo mismo que la primera; con OFFSET, Postgres
+# tendría que recorrer y descartar todas las filas anteriores.
+# Las páginas pasan por la caché de consultas (se invalidan con cada escritura en la tabla) y, al mostrar una,
+# la siguiente se trae en segundo plano para que "Siguiente" responda desde la caché.
+#######################################################
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from psycopg2 import sql
+
+from fuerzapp.cache import obtener_cache
+from fuerzapp.datos import ESQUEMAS, a_dataframe
+from fuerzapp.db import get_connection, obtener_pool
+
+log = logging.getLogger(__name__)
+
+TAMANO_PAGINA = 25
+
+# Columna por la que se puede filtrar el tipo de cada tabla, y resumen que tiene sus valores
+COLUMNA_TIPO = {"entrenamientos": "tipo", "comidas": "tipo_comida"}
+_RESUMEN_TIPOS = {"entrenamientos": "resumen_diario_entrenamiento", "comidas": "resumen_diario_comida"}
+
+
+def _consulta(tabla, desde_cursor, tipo, desde, hasta):
+    columnas = sql.SQL(", ").join(sql.Identifier(c) for c in ESQUEMAS[tabla])
+    condiciones = [sql.SQL("usuario_id = %(usuario_id)s")]
+    if desde_cursor:
+        condiciones.append(sql.SQL("(fecha, id) < (%(cursor_fecha)s, %(cursor_id)s)"))
+    if tipo is not None:
+        condiciones.append(sql.SQL("{} = %(tipo)s").format(sql.Identifier(COLUMNA_TIPO[tabla])))
+    if desde is not None:
+        condiciones.append(sql.SQL("fecha >= %(desde)s"))
+    if hasta is not None:
+        condiciones.append(sql.SQL("fecha <= %(hasta)s"))
+    return sql.SQL("""
+        SELECT {columnas}, id FROM {tabla}
+        WHERE {condiciones}
+        ORDER BY fecha DESC, id DESC
+        LIMIT %(limite)s
+    """).format(columnas=columnas, tabla=sql.Identifier(tabla), condiciones=sql.SQL(" AND ").join(condiciones))
+
+
+def _traer(conn, usuario_id, tabla, cursor, tipo, desde, hasta, tamano):
+    """
+    Devuelve (DataFrame de la página, cursor de la siguiente o None si es la última).
+    """
+    parametros = {"usuario_id": usuario_id, "tipo": tipo, "desde": desde, "hasta": hasta, "limite": tamano + 1}
+    if cursor:
+        parametros["cursor_fecha"], parametros["cursor_id"] = cursor
+    with conn.cursor() as cur:
+        cur.execute(_consulta(tabla, cursor is not None, tipo, desde, hasta), parametros)
+        filas = cur.fetchall()
+    # Se pide una fila de más solo para saber si hay otra página
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    siguiente = (filas[-1][0], filas[-1][-1]) if hay_mas else None
+    return a_dataframe(tabla, [fila[:-1] for fila in filas]), siguiente
+
+
+def _forma(cursor, tipo, desde, hasta, tamano):
+    return ("historial", cursor, tipo, desde, hasta, tamano)
+
+
+@st.cache_resource(show_spinner=False)
+def _obtener_prefetch():
+    # Pocos hilos: solo adelantan la página siguiente de quien está navegando
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="historial"), set(), threading.Lock()
+
+
+def _adelantar(pool, cache, usuario_id, tabla, cursor, tipo, desde, hasta, tamano):
+    ejecutor, en_curso, lock = _obtener_prefetch()
+    clave = (usuario_id, tabla, _forma(cursor, tipo, desde, hasta, tamano))
+    with lock:
+        if clave in en_curso:
+            return
+        en_curso.add(clave)
+
+    def traer():
+        try:
+            if cache.obtener(*clave)[0]:
+                return
+            conn = pool.obtener()
+            try:
+                resultado = _traer(conn, usuario_id, tabla, cursor, tipo, desde, hasta, tamano)
+                conn.rollback()
+            finally:
+                pool.devolver(conn)
+            cache.guardar(*clave, resultado)
+        except Exception as e:
+            log.error("No se pudo adelantar la página del historial", extra={"error": str(e)})
+        finally:
+            with lock:
+                en_curso.discard(clave)
+
+    ejecutor.submit(traer)
+
+
+def pagina(usuario_id, tabla, cursor=None, tipo=None, desde=None, hasta=None, tamano=TAMANO_PAGINA, adelantar=True):
+    """
+    Página del historial de `tabla` que empieza después de `cursor` ((fecha, id) de la última fila de la página
+    anterior; None para la primera), con filtros opcionales de tipo y rango de fechas.
+    Devuelve (DataFrame, cursor de la página siguiente o None). Si `adelantar`, trae la siguiente en segundo plano.
+    """
+    if tabla not in ESQUEMAS:
+        raise ValueError(f"Tabla desconocida: {tabla}")
+    if tipo is not None and tabla not in COLUMNA_TIPO:
+        raise ValueError(f"La tabla {tabla} no tiene tipo")
+    cache = obtener_cache()
+
+    def calcular():
+        with get_connection() as conn:
+            return _traer(conn, usuario_id, tabla, cursor, tipo, desde, hasta, tamano)
+
+    df, siguiente = cache.obtener_o_calcular(usuario_id, tabla, _forma(cursor, tipo, desde, hasta, tamano), calcular)
+    if adelantar and siguiente is not None:
+        _adelantar(obtener_pool(), cache, usuario_id, tabla, siguiente, tipo, desde, hasta, tamano)
+    return df, siguiente
+
+
+def tipos_usados(usuario_id, tabla):
+    """
+    Tipos que el usuario registró alguna vez en `tabla` (salen de los resúmenes diarios, no de la tabla cruda).
+    """
+    if tabla not in COLUMNA_TIPO:
+        return []
+
+    def calcular():
+        consulta = sql.SQL("SELECT DISTINCT {columna} FROM {resumen} WHERE usuario_id = %s ORDER BY 1").format(
+            columna=sql.Identifier(COLUMNA_TIPO[tabla]), resumen=sql.Identifier(_RESUMEN_TIPOS[tabla]))
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(consulta, (usuario_id,))
+            return [fila[0] for fila in cursor.fetchall()]
+
+    return obtener_cache().obtener_o_calcular(usuario_id, tabla, ("tipos",), calcular)
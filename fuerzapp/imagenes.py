@@ -0,0 +1,302 @@
+# fuerzapp/imagenes.py
+###########################################################################################################################
+# Fotos de perfil: validación, miniaturas y almacenamiento.
+# Cada imagen (subida o avatar predeterminado) se decodifica y valida una vez y se guardan solo sus miniaturas
+# cuadradas de TAMANOS píxeles, con nombre según el hash del contenido original:
+#   miniaturas/<sha256>_<tamaño>.webp
+# Así dos subidas del mismo archivo comparten miniaturas y una miniatura nunca queda desactualizada.
+# En usuarios.foto se guarda la referencia "img:<sha256>" (las rutas viejas a archivos locales siguen funcionando).
+# Las miniaturas leídas se guardan en memoria (LRU acotada por bytes): el sidebar no vuelve a leer el disco ni S3
+# en cada rerun y al navegador le llegan unos pocos KB en lugar de la foto original.
+#
+# Almacenamiento (imagenes_almacenamiento en st.secrets):
+#   "local"       -> carpeta imagenes_dir (por defecto perfiles/), efímera en Streamlit Cloud
+#   "s3"          -> bucket imagenes_bucket de un servicio compatible con S3 (boto3, imagenes_s3_endpoint opcional)
+#   "s3-memoria"  -> sustituto en memoria de S3, para pruebas locales
+#######################################################
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from fuerzapp.db import leer_secreto
+
+TAMANOS = (50, 100)           # lados de las miniaturas en píxeles
+FORMATOS = ("PNG", "JPEG", "WEBP", "GIF")
+MAX_MB = 10                   # tamaño máximo de una subida
+MAX_PIXELES = 40_000_000      # imágenes más grandes se rechazan (protección contra "bombas" de descompresión)
+CACHE_MB = 32                 # bytes de miniaturas guardados en memoria
+PREFIJO = "img:"
+
+
+class ImagenInvalidaError(ValueError):
+    """
+    El archivo subido no es una imagen válida o supera los límites.
+    """
+
+
+#######################################################
+####################################################### Almacenamiento
+#######################################################
+class AlmacenamientoLocal:
+    """
+    Guarda los archivos bajo la carpeta `raiz`.
+    """
+    persistente = False
+
+    def __init__(self, raiz):
+        self.raiz = raiz
+
+    def _ruta(self, clave):
+        return os.path.join(self.raiz, *clave.split("/"))
+
+    def existe(self, clave):
+        return os.path.exists(self._ruta(clave))
+
+    def guardar(self, clave, datos, tipo):
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        # Escritura atómica: otro proceso nunca lee una miniatura a medio escribir
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, "wb") as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+
+    def leer(self, clave):
+        try:
+            with open(self._ruta(clave), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+def _no_encontrado(error):
+    codigo = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return codigo in ("404", "NoSuchKey", "NotFound")
+
+
+class AlmacenamientoS3:
+    """
+    Guarda los archivos en un bucket de S3 (o compatible) a través de un cliente con la interfaz de boto3
+    (put_object, get_object, head_object).
+    """
+    persistente = True
+
+    def __init__(self, cliente, bucket, prefijo=""):
+        self.cliente = cliente
+        self.bucket = bucket
+        self.prefijo = prefijo
+
+    def existe(self, clave):
+        try:
+            self.cliente.head_object(Bucket=self.bucket, Key=self.prefijo + clave)
+            return True
+        except Exception as e:
+            if _no_encontrado(e):
+                return False
+            raise
+
+    def guardar(self, clave, datos, tipo):
+        self.cliente.put_object(Bucket=self.bucket, Key=self.prefijo + clave, Body=datos, ContentType=tipo,
+                                CacheControl="public, max-age=31536000, immutable")
+
+    def leer(self, clave):
+        try:
+            respuesta = self.cliente.get_object(Bucket=self.bucket, Key=self.prefijo + clave)
+        except Exception as e:
+            if _no_encontrado(e):
+                return None
+            raise
+        return respuesta["Body"].read()
+
+
+class ErrorS3Memoria(Exception):
+    def __init__(self, codigo):
+        super().__init__(codigo)
+        self.response = {"Error": {"Code": codigo}}
+
+
+class ClienteS3Memoria:
+    """
+    Sustituto en memoria de un cliente S3 de boto3 (solo las operaciones que usa AlmacenamientoS3).
+    """
+
+    def __init__(self):
+        self._objetos = {}
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, **_):
+        with self._lock:
+            self._objetos[(Bucket, Key)] = bytes(Body)
+
+    def head_object(self, Bucket, Key):
+        with self._lock:
+            if (Bucket, Key) not in self._objetos:
+                raise ErrorS3Memoria("404")
+            return {"ContentLength": len(self._objetos[(Bucket, Key)])}
+
+    def get_object(self, Bucket, Key):
+        with self._lock:
+            if (Bucket, Key) not in self._objetos:
+                raise ErrorS3Memoria("NoSuchKey")
+            return {"Body": io.BytesIO(self._objetos[(Bucket, Key)])}
+
+
+#######################################################
+####################################################### Procesamiento
+#######################################################
+def crear_miniaturas(datos, tamanos=TAMANOS, max_pixeles=MAX_PIXELES):
+    """
+    Decodifica y valida la imagen `datos` y devuelve {tamaño: bytes WebP} con miniaturas cuadradas (recorte central).
+    Lanza ImagenInvalidaError si no es una imagen admitida.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(datos)) as imagen:
+            if imagen.format not in FORMATOS:
+                raise ImagenInvalidaError(f"Formato no admitido: {imagen.format}")
+            if imagen.width * imagen.height > max_pixeles:
+                raise ImagenInvalidaError(f"La imagen es demasiado grande ({imagen.width}x{imagen.height}).")
+            imagen.verify()
+        with Image.open(io.BytesIO(datos)) as imagen:
+            # En JPEG el decodificador puede reducir 2, 4 u 8 veces al leer: mucho más rápido con fotos de celular
+            imagen.draft("RGB", (2 * max(tamanos), 2 * max(tamanos)))
+            imagen = ImageOps.exif_transpose(imagen)
+            imagen = imagen.convert("RGBA" if "A" in imagen.getbands() or "transparency" in imagen.info else "RGB")
+            miniaturas = {}
+            for tamano in sorted(tamanos, reverse=True):
+                recorte = ImageOps.fit(imagen, (tamano, tamano), Image.Resampling.LANCZOS)
+                salida = io.BytesIO()
+                recorte.save(salida, "WEBP", quality=85, method=4)
+                miniaturas[tamano] = salida.getvalue()
+            return miniaturas
+    except ImagenInvalidaError:
+        raise
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        raise ImagenInvalidaError(f"El archivo no es una imagen válida: {e}") from e
+
+
+class _CacheBytes:
+    """
+    LRU de bytes en memoria acotada por el total de bytes guardados.
+    """
+
+    def __init__(self, maximo_bytes):
+        self.maximo_bytes = maximo_bytes
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._total = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            datos = self._entradas.get(clave)
+            if datos is not None:
+                self._entradas.move_to_end(clave)
+            return datos
+
+    def guardar(self, clave, datos):
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._total -= len(anterior)
+            # Lo que no entra ni con la caché vacía no se guarda
+            if len(datos) > self.maximo_bytes:
+                return
+            self._entradas[clave] = datos
+            self._total += len(datos)
+            while self._total > self.maximo_bytes:
+                _, quitado = self._entradas.popitem(last=False)
+                self._total -= len(quitado)
+
+
+class Imagenes:
+    """
+    Procesa imágenes y sirve sus miniaturas desde `almacenamiento`, con caché en memoria.
+    """
+
+    def __init__(self, almacenamiento, cache_bytes=CACHE_MB * 1024**2, max_bytes=MAX_MB * 1024**2):
+        self.almacenamiento = almacenamiento
+        self.max_bytes = max_bytes
+        self._cache = _CacheBytes(cache_bytes)
+        self._archivos = {}  # (ruta, mtime, tamaño) -> hash, para las fotos guardadas como archivo local
+        self._lock_archivos = threading.Lock()
+
+    @staticmethod
+    def _clave(digesto, tamano):
+        return f"miniaturas/{digesto}_{tamano}.webp"
+
+    def subir(self, datos):
+        """
+        Valida la imagen, guarda sus miniaturas (si no existían) y devuelve la referencia para usuarios.foto.
+        """
+        if len(datos) > self.max_bytes:
+            raise ImagenInvalidaError(f"La imagen supera los {self.max_bytes // 1024**2} MB.")
+        digesto = hashlib.sha256(datos).hexdigest()
+        if not all(self.almacenamiento.existe(self._clave(digesto, t)) for t in TAMANOS):
+            for tamano, miniatura in crear_miniaturas(datos).items():
+                self.almacenamiento.guardar(self._clave(digesto, tamano), miniatura, "image/webp")
+                self._cache.guardar(self._clave(digesto, tamano), miniatura)
+        return PREFIJO + digesto
+
+    def _digesto_de_archivo(self, ruta):
+        estado = os.stat(ruta)
+        firma = (ruta, estado.st_mtime_ns, estado.st_size)
+        with self._lock_archivos:
+            digesto = self._archivos.get(firma)
+        if digesto is None:
+            with open(ruta, "rb") as f:
+                digesto = self.subir(f.read())[len(PREFIJO):]
+            with self._lock_archivos:
+                self._archivos[firma] = digesto
+        return digesto
+
+    def miniatura(self, foto, tamano):
+        """
+        Bytes de la miniatura de `tamano` px de `foto` ("img:<hash>" o ruta a un archivo local), o None si no existe.
+        """
+        if not foto:
+            return None
+        if foto.startswith(PREFIJO):
+            digesto = foto[len(PREFIJO):]
+        elif os.path.exists(foto):
+            try:
+                digesto = self._digesto_de_archivo(foto)
+            except ImagenInvalidaError:
+                return None
+        else:
+            return None
+        clave = self._clave(digesto, tamano)
+        datos = self._cache.obtener(clave)
+        if datos is None:
+            datos = self.almacenamiento.leer(clave)
+            if datos is not None:
+                self._cache.guardar(clave, datos)
+        return datos
+
+
+def _crear_almacenamiento():
+    tipo = leer_secreto("imagenes_almacenamiento", "local")
+    if tipo == "s3":
+        import boto3
+
+        cliente = boto3.client("s3", endpoint_url=leer_secreto("imagenes_s3_endpoint"))
+        return AlmacenamientoS3(cliente, leer_secreto("imagenes_bucket"), leer_secreto("imagenes_prefijo", ""))
+    if tipo == "s3-memoria":
+        return AlmacenamientoS3(ClienteS3Memoria(), "fuerzapp")
+    return AlmacenamientoLocal(leer_secreto("imagenes_dir", "perfiles"))
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_imagenes():
+    """
+    Pipeline de imágenes único por proceso (almacenamiento según imagenes_almacenamiento en st.secrets).
+    """
+    return Imagenes(
+        _crear_almacenamiento(),
+        cache_bytes=int(float(leer_secreto("imagenes_cache_mb", CACHE_MB)) * 1024**2),
+        max_bytes=int(float(leer_secreto("imagenes_max_mb", MAX_MB)) * 1024**2),
+    )
@@ -0,0 +1,261 @@
+# fuerzapp/importacion.py
+###########################################################################################################################
+# Importación masiva de historial (entrenamientos, comidas o medidas) desde archivos CSV.
+# El archivo se lee por bloques con pandas (nunca entero en memoria), cada bloque se valida y normaliza y se carga
+# con COPY en una sola transacción junto con la actualización de los resúmenes diarios.
+# Las columnas del CSV son las de la tabla (fecha, tipo, duracion, ...); también se aceptan las etiquetas que muestra
+# la app ("Duración (min)", "Calorías", ...), sin importar mayúsculas ni acentos.
+#
+# Uso desde consola:
+#   FUERZAPP_DB_URL=postgresql://... python -m fuerzapp.importacion archivo.csv --tabla entrenamientos --email ana@mail.com
+#######################################################
+import argparse
+import io
+import re
+import unicodedata
+
+import pandas as pd
+import psycopg2
+from psycopg2 import sql
+
+from fuerzapp import alimentos, resumenes
+from fuerzapp.datos import ESQUEMAS
+from fuerzapp.db import cadena_conexion
+
+TAMANO_BLOQUE = 10_000  # filas por bloque (y por transacción)
+MAX_ERRORES = 20        # errores de ejemplo que se informan
+
+
+class ImportacionError(ValueError):
+    """
+    La base no guardó un bloque. Los bloques anteriores ya están confirmados: `importadas` dice cuántas filas.
+    """
+
+    def __init__(self, mensaje, importadas):
+        super().__init__(mensaje)
+        self.importadas = importadas
+
+
+# Columnas obligatorias de cada tabla (además de la fecha)
+OBLIGATORIAS = {
+    "entrenamientos": ("tipo",),
+    "comidas": ("tipo_comida",),
+    "medidas": (),
+}
+
+
+def _normalizar_nombre(texto):
+    """
+    'Duración (min)' -> 'duracion (min)': minúsculas, sin acentos ni espacios de más.
+    """
+    sin_acentos = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode()
+    return " ".join(sin_acentos.lower().split())
+
+
+def _alias_columnas(tabla):
+    """
+    Nombres aceptados en el CSV para cada columna de la tabla (nombre y etiqueta, normalizados).
+    """
+    alias = {}
+    for columna, (_, etiqueta) in ESQUEMAS[tabla].items():
+        alias[_normalizar_nombre(columna)] = columna
+        alias[_normalizar_nombre(etiqueta)] = columna
+    return alias
+
+
+def _a_numero(serie):
+    if serie.dtype == object or pd.api.types.is_string_dtype(serie):
+        serie = serie.astype("string").str.strip().str.replace(",", ".", regex=False)
+    return pd.to_numeric(serie, errors="coerce")
+
+
+def _a_fecha(serie):
+    """
+    Fechas ISO (las de la exportación) tal cual; las demás, con el día primero (dd/mm/aaaa).
+    """
+    texto = serie.astype("string").str.strip()
+    fechas = pd.to_datetime(texto, errors="coerce", format="ISO8601")
+    resto = fechas.isna() & texto.notna()
+    if resto.any():
+        fechas[resto] = pd.to_datetime(texto[resto], errors="coerce", format="mixed", dayfirst=True)
+    return fechas
+
+
+def validar_bloque(tabla, bloque, primera_linea):
+    """
+    Normaliza un bloque del CSV (DataFrame con columnas ya mapeadas a las de la tabla).
+    Devuelve (DataFrame válido con las columnas de la tabla, lista de errores "línea N: motivo").
+    """
+    esquema = ESQUEMAS[tabla]
+    df = pd.DataFrame(index=bloque.index)
+    motivos = pd.Series("", index=bloque.index, dtype="object")
+
+    fechas = _a_fecha(bloque.get("fecha", pd.Series(pd.NA, index=bloque.index)))
+    motivos[fechas.isna()] += "fecha inválida; "
+    df["fecha"] = fechas.dt.date
+
+    for columna, (tipo, _) in esquema.items():
+        if columna == "fecha":
+            continue
+        valores = bloque.get(columna, pd.Series(pd.NA, index=bloque.index))
+        if tipo == "string":
+            texto = valores.astype("string").str.strip()
+            df[columna] = texto.mask(texto == "")
+            if columna in OBLIGATORIAS[tabla]:
+                motivos[df[columna].isna()] += f"falta {columna}; "
+        else:
+            numeros = _a_numero(valores)
+            motivos[numeros < 0] += f"{columna} negativo; "
+            if tipo == "Int64":
+                # duracion y calorias: vacío = 0, como en los formularios
+                faltantes = numeros.isna() & valores.notna() & (valores.astype("string").str.strip() != "")
+                motivos[faltantes] += f"{columna} no numérico; "
+                df[columna] = numeros.fillna(0).round().astype("int64")
+            else:
+                df[columna] = numeros
+    if tabla == "medidas":
+        medidas = [c for c in esquema if c not in ("fecha", "notas")]
+        motivos[df[medidas].isna().all(axis=1)] += "sin ninguna medida; "
+
+    invalidas = motivos != ""
+    errores = [
+        f"línea {primera_linea + posicion}: {motivo.rstrip('; ')}"
+        for posicion, motivo in zip(range(len(bloque)), motivos)
+        if motivo
+    ]
+    return df[~invalidas], errores
+
+
+def _copiar(cursor, tabla, usuario_id, df):
+    """
+    Carga el DataFrame validado con COPY ... FROM STDIN (formato CSV).
+    """
+    buffer = io.StringIO()
+    df.insert(0, "usuario_id", usuario_id)
+    df.to_csv(buffer, header=False, index=False, na_rep="")
+    buffer.seek(0)
+    columnas = sql.SQL(", ").join(sql.Identifier(c) for c in df.columns)
+    consulta = sql.SQL("COPY {tabla} ({columnas}) FROM STDIN WITH (FORMAT csv)").format(
+        tabla=sql.Identifier(tabla), columnas=columnas)
+    cursor.copy_expert(consulta.as_string(cursor), buffer)
+
+
+def _vincular_alimentos(cursor, usuario_id, df):
+    """
+    Agrega la columna alimento_id a un bloque de comidas (los alimentos que no están en el catálogo se agregan
+    como propios del usuario).
+    """
+    nombres = df["alimento"].astype(object).where(df["alimento"].notna(), None)
+    ids = alimentos.resolver(cursor, zip([usuario_id] * len(df), nombres.tolist(), df["tipo_comida"].tolist(),
+                                         df["calorias"].tolist()))
+    df["alimento_id"] = pd.array(ids, dtype="Int64")
+    return df
+
+
+def _actualizar_resumenes(cursor, tabla, usuario_id, df):
+    if tabla == "entrenamientos":
+        resumenes.sumar_entrenamientos(cursor, zip(
+            [usuario_id] * len(df), df["fecha"], df["tipo"].tolist(), df["duracion"].tolist(), df["calorias"].tolist()))
+    elif tabla == "comidas":
+        resumenes.sumar_comidas(cursor, zip(
+            [usuario_id] * len(df), df["fecha"], df["tipo_comida"].tolist(), df["calorias"].tolist()))
+    else:
+        resumenes.actualizar_pesos(cursor, usuario_id, df.loc[df["peso"].notna(), "fecha"].tolist())
+
+
+def _describir_rechazo(error, lineas):
+    """
+    Mensaje para un bloque que la base no guardó: la línea del CSV si el COPY la informa, si no el rango del bloque.
+    `lineas` tiene la línea del CSV de cada fila enviada, en orden.
+    """
+    motivo = (error.diag.message_primary or str(error)).strip()
+    fila = re.match(r"COPY \w+, line (\d+)", error.diag.context or "")
+    if fila and 1 <= int(fila.group(1)) <= len(lineas):
+        return f"no se pudo guardar la línea {lineas[int(fila.group(1)) - 1]} ({motivo})"
+    return f"no se pudo guardar el bloque de las líneas {lineas[0]} a {lineas[-1]} ({motivo})"
+
+
+def importar_csv(conn, origen, tabla, usuario_id, separador=",", tamano_bloque=TAMANO_BLOQUE, al_avanzar=None):
+    """
+    Importa un CSV (ruta o archivo abierto) en `tabla` para `usuario_id`, confirmando una transacción por bloque.
+    Las filas inválidas se descartan y se informan. `al_avanzar(importadas, rechazadas)` se llama tras cada bloque.
+    Devuelve {"importadas": n, "rechazadas": n, "errores": [...]}. Si la base rechaza un bloque lanza
+    ImportacionError (los bloques anteriores quedan guardados).
+    """
+    if tabla not in ESQUEMAS:
+        raise ValueError(f"Tabla desconocida: {tabla}")
+    alias = _alias_columnas(tabla)
+    resultado = {"importadas": 0, "rechazadas": 0, "errores": []}
+    lector = pd.read_csv(origen, sep=separador, chunksize=tamano_bloque, dtype="string",
+                         keep_default_na=False, encoding="utf-8-sig", skipinitialspace=True)
+    primera_linea = 2  # la línea 1 es el encabezado
+    for bloque in lector:
+        bloque = bloque.rename(columns=lambda c: alias.get(_normalizar_nombre(c), c))
+        if "fecha" not in bloque.columns:
+            raise ValueError("El archivo no tiene una columna 'fecha'.")
+        faltantes = [c for c in OBLIGATORIAS[tabla] if c not in bloque.columns]
+        if faltantes:
+            raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+        validas, errores = validar_bloque(tabla, bloque, primera_linea)
+        lineas = primera_linea + bloque.index.get_indexer(validas.index)
+        primera_linea += len(bloque)
+
+        if not validas.empty:
+            try:
+                with conn.cursor() as cursor:
+                    copia = validas.copy()
+                    if tabla == "comidas":
+                        copia = _vincular_alimentos(cursor, usuario_id, copia)
+                    _copiar(cursor, tabla, usuario_id, copia)
+                    _actualizar_resumenes(cursor, tabla, usuario_id, validas)
+                conn.commit()
+            except psycopg2.Error as e:
+                # Por ejemplo un número fuera de rango para la columna (DataError en el COPY) o la conexión caída
+                if not conn.closed:
+                    conn.rollback()
+                raise ImportacionError(_describir_rechazo(e, lineas), resultado["importadas"]) from e
+        resultado["importadas"] += len(validas)
+        resultado["rechazadas"] += len(errores)
+        resultado["errores"].extend(errores[:MAX_ERRORES - len(resultado["errores"])])
+        if al_avanzar:
+            al_avanzar(resultado["importadas"], resultado["rechazadas"])
+    return resultado
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Importa historial desde un CSV usando COPY.")
+    parser.add_argument("archivo", help="ruta del CSV")
+    parser.add_argument("--tabla", required=True, choices=sorted(ESQUEMAS))
+    usuario = parser.add_mutually_exclusive_group(required=True)
+    usuario.add_argument("--usuario", type=int, help="usuario_id destino")
+    usuario.add_argument("--email", help="email del usuario destino")
+    parser.add_argument("--separador", default=",")
+    parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE, help="filas por bloque/transacción")
+    args = parser.parse_args(argumentos)
+
+    conn = psycopg2.connect(cadena_conexion())
+    try:
+        usuario_id = args.usuario
+        if usuario_id is None:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT id FROM usuarios WHERE email = %s", (args.email,))
+                fila = cursor.fetchone()
+            conn.rollback()
+            if fila is None:
+                parser.error(f"No existe un usuario con email {args.email}")
+            usuario_id = fila[0]
+        resultado = importar_csv(
+            conn, args.archivo, args.tabla, usuario_id, separador=args.separador, tamano_bloque=args.bloque,
+            al_avanzar=lambda importadas, rechazadas: print(f"  {importadas} importadas, {rechazadas} rechazadas"),
+        )
+    except ImportacionError as e:
+        parser.exit(1, f"Importación interrumpida: {e}. Quedaron guardadas {e.importadas} filas.\n")
+    finally:
+        conn.close()
+    print(f"Listo: {resultado['importadas']} filas importadas, {resultado['rechazadas']} rechazadas.")
+    for error in resultado["errores"]:
+        print(f"  {error}")
+
+
+if __name__ == "__main__":
+    main()
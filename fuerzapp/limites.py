@@ -0,0 +1,106 @@
+# fuerzapp/limites.py
+###########################################################################################################################
+# Límite de intentos de login (token bucket), en memoria y compartido por todas las sesiones del proceso.
+# Hay un balde por email y otro por cliente (IP): cada intento gasta una ficha y las fichas se recargan a ritmo
+# constante, así se permiten algunos errores seguidos pero una ráfaga de credential stuffing se corta antes de
+# llegar a la base de datos.
+# Detrás de un proxy (Streamlit Cloud, nginx) hay que indicar cuántos hay con proxies_confiables: la IP sale del salto
+# de X-Forwarded-For que agregó el proxy, nunca de los que manda el cliente.
+#######################################################
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from fuerzapp.db import leer_secreto
+
+# Valores por defecto, configurables desde st.secrets
+RAFAGA_EMAIL = 5            # intentos seguidos permitidos para un mismo email
+POR_MINUTO_EMAIL = 2        # intentos que se recuperan por minuto para un mismo email
+RAFAGA_CLIENTE = 20         # intentos seguidos permitidos desde un mismo cliente
+POR_MINUTO_CLIENTE = 10     # intentos que se recuperan por minuto desde un mismo cliente
+PROXIES_CONFIABLES = 0      # proxies propios delante de la app que agregan su salto a X-Forwarded-For
+MAX_CLAVES = 50_000         # baldes guardados como máximo (se descartan los usados hace más tiempo)
+
+
+class LimitadorTokens:
+    """
+    Token bucket thread-safe por clave: `capacidad` fichas como máximo, que se recargan a `por_segundo`.
+    """
+
+    def __init__(self, capacidad, por_segundo, maximo_claves=MAX_CLAVES):
+        self.capacidad = capacidad
+        self.por_segundo = por_segundo
+        self.maximo_claves = maximo_claves
+        self._lock = threading.Lock()
+        self._baldes = OrderedDict()  # clave -> (fichas, momento de la última actualización)
+
+    def permitir(self, clave):
+        """
+        Gasta una ficha de `clave`. Devuelve (True, 0) si había, o (False, segundos hasta la próxima ficha).
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            fichas, antes = self._baldes.pop(clave, (self.capacidad, ahora))
+            fichas = min(self.capacidad, fichas + (ahora - antes) * self.por_segundo)
+            permitido = fichas >= 1
+            if permitido:
+                fichas -= 1
+            self._baldes[clave] = (fichas, ahora)
+            while len(self._baldes) > self.maximo_claves:
+                self._baldes.popitem(last=False)
+        if permitido:
+            return True, 0.0
+        return False, (1 - fichas) / self.por_segundo
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_limitadores():
+    """
+    Limitadores del login por email y por cliente, únicos por proceso. Se configuran con login_rafaga_email,
+    login_por_minuto_email, login_rafaga_cliente y login_por_minuto_cliente en st.secrets.
+    """
+    return {
+        "email": LimitadorTokens(
+            int(leer_secreto("login_rafaga_email", RAFAGA_EMAIL)),
+            float(leer_secreto("login_por_minuto_email", POR_MINUTO_EMAIL)) / 60,
+        ),
+        "cliente": LimitadorTokens(
+            int(leer_secreto("login_rafaga_cliente", RAFAGA_CLIENTE)),
+            float(leer_secreto("login_por_minuto_cliente", POR_MINUTO_CLIENTE)) / 60,
+        ),
+    }
+
+
+def cliente_desde(reenviada, ip_conexion, confiables):
+    """
+    IP del cliente según X-Forwarded-For y la cantidad de proxies confiables delante de la app.
+    Los saltos de la izquierda los escribe el cliente (puede inventarlos): solo vale el que agregó el proxy
+    confiable más lejano, contando desde la derecha. Sin proxies confiables se usa la IP de la conexión.
+    """
+    saltos = [salto.strip() for salto in (reenviada or "").split(",") if salto.strip()]
+    if confiables > 0 and saltos:
+        return saltos[-min(confiables, len(saltos))]
+    return ip_conexion or "desconocido"
+
+
+def identificar_cliente():
+    """
+    IP del cliente de esta sesión (proxies_confiables en st.secrets indica cuántos proxies propios hay delante).
+    """
+    return cliente_desde(st.context.headers.get("X-Forwarded-For"), st.context.ip_address,
+                         int(leer_secreto("proxies_confiables", PROXIES_CONFIABLES)))
+
+
+def permitir_login(email):
+    """
+    Registra un intento de login. Devuelve (True, 0) o (False, segundos a esperar) si el email o el cliente
+    superaron su límite.
+    """
+    limitadores = obtener_limitadores()
+    # Primero el cliente: un atacante que prueba muchos emails no vacía los baldes de esos usuarios
+    permitido, espera = limitadores["cliente"].permitir(identificar_cliente())
+    if not permitido:
+        return False, espera
+    return limitadores["email"].permitir(email.strip().lower())
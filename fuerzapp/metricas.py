@@ -0,0 +1,320 @@
+# fuerzapp/metricas.py
+###########################################################################################################################
+# Instrumentación de las consultas y log estructurado.
+# Todas las conexiones del pool usan CursorMedido: cada sentencia registra su duración, las filas que devolvió o
+# afectó y una etiqueta con el lugar del código que la ejecutó (módulo.función, por ejemplo
+# "fuerzapp.datos.ultimos_registros"). El pool además avisa cada conexión prestada y cada conexión nueva abierta.
+# Las mediciones se juntan en dos lugares:
+#   - el rerun en curso (iniciar_rerun / cerrar_rerun en Fuerzapp.py): al terminar se loguea un resumen por página
+#     y, con panel_consultas = true en secrets, se muestra en el sidebar;
+#   - los totales del proceso, que se exportan en formato de texto de Prometheus (texto_prometheus) y, con
+#     metricas_archivo en secrets, se escriben en ese archivo (para el textfile collector de node_exporter).
+# El log sale en JSON, una línea por evento, por el logger "fuerzapp" (nivel con log_nivel, INFO por defecto).
+#######################################################
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import streamlit as st
+from psycopg2 import extensions
+
+NIVEL_LOG = "INFO"
+INTERVALO_ARCHIVO = 15  # segundos mínimos entre escrituras del archivo de métricas
+
+# Módulos que no cuentan como "lugar del código" de una consulta: se sigue subiendo por la pila
+_INTERNOS = ("fuerzapp.db", "fuerzapp.metricas", "psycopg2", "contextlib")
+
+log = logging.getLogger(__name__)
+
+
+#######################################################
+####################################################### Log estructurado
+#######################################################
+# Atributos que trae todo LogRecord; el resto viene de extra={...} y se agrega como campo del JSON
+_ATRIBUTOS_BASE = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class FormateadorJSON(logging.Formatter):
+    """
+    Una línea JSON por evento: momento, nivel, logger, mensaje y los campos pasados con extra={...}.
+    """
+
+    def format(self, record):
+        evento = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_BASE:
+                evento[clave] = valor
+        if record.exc_info:
+            evento["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+@st.cache_resource(show_spinner=False)
+def configurar_log():
+    """
+    Configura (una vez por proceso) el logger "fuerzapp": JSON a stderr con el nivel de log_nivel en secrets.
+    """
+    from fuerzapp.db import leer_secreto
+
+    raiz = logging.getLogger("fuerzapp")
+    manejador = logging.StreamHandler(sys.stderr)
+    manejador.setFormatter(FormateadorJSON())
+    raiz.handlers = [manejador]
+    raiz.setLevel(str(leer_secreto("log_nivel", NIVEL_LOG)).upper())
+    raiz.propagate = False
+    return raiz
+
+
+#######################################################
+####################################################### Mediciones
+#######################################################
+class Metricas:
+    """
+    Totales del proceso (thread-safe): por etiqueta, cantidad de consultas, segundos y filas; conexiones prestadas
+    y abiertas; y reruns y segundos por página.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.consultas = {}  # etiqueta -> [cantidad, segundos, filas]
+        self.conexiones_prestadas = 0
+        self.conexiones_abiertas = 0
+        self.reruns = {}     # página -> [cantidad, segundos]
+
+    def sumar_consulta(self, etiqueta, duracion, filas):
+        with self._lock:
+            total = self.consultas.setdefault(etiqueta, [0, 0.0, 0])
+            total[0] += 1
+            total[1] += duracion
+            total[2] += max(filas, 0)
+
+    def sumar_conexion(self, nueva):
+        with self._lock:
+            self.conexiones_prestadas += 1
+            self.conexiones_abiertas += nueva
+
+    def sumar_rerun(self, pagina, duracion):
+        with self._lock:
+            total = self.reruns.setdefault(pagina, [0, 0.0])
+            total[0] += 1
+            total[1] += duracion
+
+    def total_consultas(self):
+        with self._lock:
+            return sum(cantidad for cantidad, _, _ in self.consultas.values())
+
+
+_metricas = Metricas()
+
+
+class Rerun:
+    """
+    Mediciones de un rerun: cada consulta como (etiqueta, segundos, filas) y las conexiones prestadas y abiertas.
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = []
+        self.conexiones_prestadas = 0
+        self.conexiones_abiertas = 0
+
+    def por_etiqueta(self):
+        """
+        Lista de (etiqueta, cantidad, ms, filas), de la que más tiempo se llevó a la que menos.
+        """
+        totales = {}
+        for etiqueta, duracion, filas in self.consultas:
+            total = totales.setdefault(etiqueta, [0, 0.0, 0])
+            total[0] += 1
+            total[1] += duracion * 1000
+            total[2] += max(filas, 0)
+        return sorted(((e, c, ms, f) for e, (c, ms, f) in totales.items()), key=lambda t: -t[2])
+
+
+# Cada rerun de Streamlit corre en su propio hilo; las consultas de otros hilos (prefetch, cola de escritura)
+# solo suman a los totales del proceso
+_local = threading.local()
+
+
+def _rerun_actual():
+    return getattr(_local, "rerun", None)
+
+
+def _etiqueta():
+    """
+    módulo.función del primer frame de la pila que no es del pool, de este módulo ni de psycopg2.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        modulo = frame.f_globals.get("__name__", "")
+        if not modulo.startswith(_INTERNOS):
+            return f"{modulo}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "desconocido"
+
+
+def registrar_consulta(etiqueta, duracion, filas):
+    _metricas.sumar_consulta(etiqueta, duracion, filas)
+    rerun = _rerun_actual()
+    if rerun is not None:
+        rerun.consultas.append((etiqueta, duracion, filas))
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("consulta", extra={"etiqueta": etiqueta, "ms": round(duracion * 1000, 2), "filas": filas})
+
+
+def registrar_conexion(nueva):
+    """
+    El pool prestó una conexión (`nueva` si tuvo que abrirla).
+    """
+    _metricas.sumar_conexion(nueva)
+    rerun = _rerun_actual()
+    if rerun is not None:
+        rerun.conexiones_prestadas += 1
+        rerun.conexiones_abiertas += nueva
+
+
+def consultas_ejecutadas():
+    """
+    Total de sentencias ejecutadas por las conexiones del pool desde que arrancó el proceso.
+    """
+    return _metricas.total_consultas()
+
+
+class CursorMedido(extensions.cursor):
+    """
+    Cursor que mide cada sentencia que envía a la base (ver registrar_consulta). Lo usan todas las conexiones del pool.
+    """
+
+    def _medir(self, metodo, *args):
+        etiqueta = _etiqueta()
+        comienzo = time.perf_counter()
+        try:
+            return metodo(*args)
+        finally:
+            registrar_consulta(etiqueta, time.perf_counter() - comienzo, self.rowcount)
+
+    def execute(self, query, vars=None):
+        return self._medir(super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._medir(super().executemany, query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._medir(super().copy_expert, sql, file, size)
+
+
+#######################################################
+####################################################### Rerun
+#######################################################
+def rerun_en_curso():
+    """
+    True si este hilo está midiendo un rerun (entre iniciar_rerun y cerrar_rerun).
+    """
+    return _rerun_actual() is not None
+
+
+def iniciar_rerun():
+    """
+    Empieza a juntar las consultas y conexiones de este rerun.
+    """
+    _local.rerun = Rerun()
+
+
+def cerrar_rerun(pagina, mostrar=False):
+    """
+    Cierra el rerun de `pagina`: loguea el resumen, suma a los totales, actualiza el archivo de métricas y,
+    si `mostrar`, muestra las consultas en un desplegable del sidebar.
+    """
+    rerun = _rerun_actual()
+    if rerun is None:
+        return
+    _local.rerun = None
+    duracion = time.perf_counter() - rerun.inicio
+    _metricas.sumar_rerun(pagina, duracion)
+    etiquetas = rerun.por_etiqueta()
+    log.info("rerun", extra={
+        "pagina": pagina,
+        "ms": round(duracion * 1000, 1),
+        "consultas": len(rerun.consultas),
+        "ms_consultas": round(sum(d for _, d, _ in rerun.consultas) * 1000, 1),
+        "conexiones_prestadas": rerun.conexiones_prestadas,
+        "conexiones_abiertas": rerun.conexiones_abiertas,
+        "por_etiqueta": {e: {"consultas": c, "ms": round(ms, 1), "filas": f} for e, c, ms, f in etiquetas},
+    })
+    _escribir_archivo()
+    if mostrar:
+        with st.sidebar.expander(f"🔎 Consultas del rerun ({len(rerun.consultas)})"):
+            st.caption(f"{pagina} · {duracion * 1000:.0f} ms · conexiones: {rerun.conexiones_prestadas} prestadas, "
+                       f"{rerun.conexiones_abiertas} abiertas")
+            if etiquetas:
+                st.table([{"Lugar": e, "Consultas": c, "ms": round(ms, 1), "Filas": f} for e, c, ms, f in etiquetas])
+
+
+#######################################################
+####################################################### Prometheus
+#######################################################
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def texto_prometheus():
+    """
+    Totales del proceso en el formato de texto de Prometheus.
+    """
+    with _metricas._lock:
+        consultas = {e: list(t) for e, t in _metricas.consultas.items()}
+        reruns = {p: list(t) for p, t in _metricas.reruns.items()}
+        prestadas, abiertas = _metricas.conexiones_prestadas, _metricas.conexiones_abiertas
+    lineas = [
+        "# HELP fuerzapp_consultas_total Sentencias ejecutadas, por lugar del código.",
+        "# TYPE fuerzapp_consultas_total counter",
+        *(f'fuerzapp_consultas_total{{etiqueta="{_escapar(e)}"}} {c}' for e, (c, _, _) in sorted(consultas.items())),
+        "# HELP fuerzapp_consultas_segundos_total Tiempo en la base, por lugar del código.",
+        "# TYPE fuerzapp_consultas_segundos_total counter",
+        *(f'fuerzapp_consultas_segundos_total{{etiqueta="{_escapar(e)}"}} {s:.6f}' for e, (_, s, _) in sorted(consultas.items())),
+        "# HELP fuerzapp_consultas_filas_total Filas devueltas o afectadas, por lugar del código.",
+        "# TYPE fuerzapp_consultas_filas_total counter",
+        *(f'fuerzapp_consultas_filas_total{{etiqueta="{_escapar(e)}"}} {f}' for e, (_, _, f) in sorted(consultas.items())),
+        "# HELP fuerzapp_conexiones_prestadas_total Conexiones prestadas por el pool.",
+        "# TYPE fuerzapp_conexiones_prestadas_total counter",
+        f"fuerzapp_conexiones_prestadas_total {prestadas}",
+        "# HELP fuerzapp_conexiones_abiertas_total Conexiones nuevas abiertas por el pool.",
+        "# TYPE fuerzapp_conexiones_abiertas_total counter",
+        f"fuerzapp_conexiones_abiertas_total {abiertas}",
+        "# HELP fuerzapp_reruns_total Reruns completos, por página.",
+        "# TYPE fuerzapp_reruns_total counter",
+        *(f'fuerzapp_reruns_total{{pagina="{_escapar(p)}"}} {c}' for p, (c, _) in sorted(reruns.items())),
+        "# HELP fuerzapp_reruns_segundos_total Duración de los reruns, por página.",
+        "# TYPE fuerzapp_reruns_segundos_total counter",
+        *(f'fuerzapp_reruns_segundos_total{{pagina="{_escapar(p)}"}} {s:.6f}' for p, (_, s) in sorted(reruns.items())),
+    ]
+    return "\n".join(lineas) + "\n"
+
+
+_ultima_escritura = 0.0
+
+
+def _escribir_archivo():
+    global _ultima_escritura
+    from fuerzapp.db import leer_secreto
+
+    ruta = leer_secreto("metricas_archivo")
+    if not ruta or time.monotonic() - _ultima_escritura < INTERVALO_ARCHIVO:
+        return
+    _ultima_escritura = time.monotonic()
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(texto_prometheus())
+        # Reemplazo atómico: quien lo lea nunca ve un archivo a medio escribir
+        os.replace(temporal, ruta)
+    except OSError as e:
+        log.error("No se pudo escribir el archivo de métricas", extra={"ruta": ruta, "error": str(e)})
@@ -0,0 +1,519 @@
+# fuerzapp/migraciones.py
+###########################################################################################################################
+# Esquema versionado de la base de datos.
+# Cada migración tiene un número de versión y se aplica una sola vez; las versiones aplicadas quedan registradas
+# en la tabla esquema_version. Sus pasos son sentencias SQL o funciones que reciben el cursor. Las migraciones usan IF NOT EXISTS para adoptar bases creadas a mano.
+# Una migración con número no se modifica nunca: su SQL está acá tal como se publicó (no se toma del DDL ni de las
+# funciones de otros módulos, que siguen cambiando) y los cambios posteriores van en una migración nueva.
+# Los índices están pensados para las consultas de la app: todas filtran por usuario_id y ordenan por fecha
+# (DESC LIMIT 5 en Inicio, ascendente en Reportes) y el login busca por email.
+#
+# Uso desde consola:
+#   FUERZAPP_DB_URL=postgresql://... python -m fuerzapp.migraciones [--cubrientes] [--estado]
+#######################################################
+import argparse
+import logging
+import time
+import unicodedata
+
+import psycopg2
+import streamlit as st
+from psycopg2.extras import execute_values
+
+from fuerzapp.db import cadena_conexion, get_connection, leer_secreto
+
+log = logging.getLogger(__name__)
+
+# Clave del advisory lock que evita que dos procesos migren a la vez
+CLAVE_BLOQUEO = 7301001
+REINTENTO_MIGRAR = 30   # segundos entre intentos de migrar si la base no responde al arrancar
+_reintentar_en = 0.0    # time.monotonic() a partir del cual se vuelve a intentar
+
+
+#######################################################
+####################################################### Pasos en Python
+#######################################################
+# Catálogo inicial de alimentos de la migración 7: (nombre, tipo de comida, porción, calorías por porción)
+_SEMILLAS_V7 = [
+    ("Pechuga de pollo", "Carnes, pescados y huevos", "150 g", 165),
+    ("Muslo de pollo", "Carnes, pescados y huevos", "150 g", 250),
+    ("Carne vacuna magra", "Carnes, pescados y huevos", "150 g", 250),
+    ("Milanesa de carne", "Carnes, pescados y huevos", "1 unidad (150 g)", 380),
+    ("Carne picada", "Carnes, pescados y huevos", "150 g", 330),
+    ("Cerdo (lomo)", "Carnes, pescados y huevos", "150 g", 240),
+    ("Salmón", "Carnes, pescados y huevos", "150 g", 310),
+    ("Merluza", "Carnes, pescados y huevos", "150 g", 130),
+    ("Atún al natural", "Carnes, pescados y huevos", "1 lata (120 g)", 130),
+    ("Huevo", "Carnes, pescados y huevos", "1 unidad", 75),
+    ("Claras de huevo", "Carnes, pescados y huevos", "3 unidades", 50),
+    ("Jamón cocido", "Carnes, pescados y huevos", "2 fetas (40 g)", 45),
+    ("Manzana", "Fruta y Verdura", "1 unidad", 80),
+    ("Banana", "Fruta y Verdura", "1 unidad", 105),
+    ("Naranja", "Fruta y Verdura", "1 unidad", 65),
+    ("Frutillas", "Fruta y Verdura", "1 taza", 50),
+    ("Pera", "Fruta y Verdura", "1 unidad", 100),
+    ("Uvas", "Fruta y Verdura", "1 taza", 105),
+    ("Palta", "Fruta y Verdura", "1/2 unidad", 160),
+    ("Tomate", "Fruta y Verdura", "1 unidad", 20),
+    ("Lechuga", "Fruta y Verdura", "1 plato", 15),
+    ("Zanahoria", "Fruta y Verdura", "1 unidad", 25),
+    ("Brócoli", "Fruta y Verdura", "1 taza", 35),
+    ("Espinaca", "Fruta y Verdura", "1 taza cocida", 40),
+    ("Papa", "Fruta y Verdura", "1 unidad mediana", 130),
+    ("Batata", "Fruta y Verdura", "1 unidad mediana", 110),
+    ("Ensalada mixta", "Fruta y Verdura", "1 plato", 60),
+    ("Arroz blanco", "Cereales y derivados", "1 taza cocido", 205),
+    ("Arroz integral", "Cereales y derivados", "1 taza cocido", 215),
+    ("Fideos", "Cereales y derivados", "1 plato (80 g secos)", 290),
+    ("Pan blanco", "Cereales y derivados", "2 rebanadas", 160),
+    ("Pan integral", "Cereales y derivados", "2 rebanadas", 140),
+    ("Avena", "Cereales y derivados", "40 g", 150),
+    ("Quinoa", "Cereales y derivados", "1 taza cocida", 220),
+    ("Galletitas de agua", "Cereales y derivados", "5 unidades", 110),
+    ("Tostadas de arroz", "Cereales y derivados", "3 unidades", 105),
+    ("Pizza", "Cereales y derivados", "2 porciones", 540),
+    ("Leche entera", "Lacteos y derivados", "1 vaso (250 ml)", 150),
+    ("Leche descremada", "Lacteos y derivados", "1 vaso (250 ml)", 85),
+    ("Yogur natural", "Lacteos y derivados", "1 pote (190 g)", 115),
+    ("Yogur descremado", "Lacteos y derivados", "1 pote (190 g)", 75),
+    ("Queso cremoso", "Lacteos y derivados", "50 g", 150),
+    ("Queso untable light", "Lacteos y derivados", "2 cucharadas", 45),
+    ("Ricota", "Lacteos y derivados", "100 g", 140),
+    ("Lentejas", "Legumbres", "1 taza cocida", 230),
+    ("Garbanzos", "Legumbres", "1 taza cocida", 270),
+    ("Porotos negros", "Legumbres", "1 taza cocida", 225),
+    ("Hummus", "Legumbres", "3 cucharadas", 120),
+    ("Aceite de oliva", "Grasas y aceites", "1 cucharada", 120),
+    ("Manteca", "Grasas y aceites", "1 cucharada", 100),
+    ("Maní", "Grasas y aceites", "30 g", 170),
+    ("Almendras", "Grasas y aceites", "30 g", 175),
+    ("Nueces", "Grasas y aceites", "30 g", 195),
+    ("Mantequilla de maní", "Grasas y aceites", "1 cucharada", 95),
+    ("Proteína en polvo (whey)", "Otro", "1 scoop (30 g)", 120),
+    ("Barra de cereal", "Otro", "1 unidad", 100),
+    ("Chocolate", "Otro", "30 g", 160),
+    ("Helado", "Otro", "1 bocha", 140),
+    ("Gaseosa", "Otro", "1 vaso (250 ml)", 105),
+    ("Cerveza", "Otro", "1 lata (355 ml)", 150),
+    ("Café con leche", "Otro", "1 taza", 70),
+]
+
+
+def _normalizar(texto):
+    # Igual que fuerzapp.alimentos.normalizar cuando se publicó la migración 7
+    sin_acentos = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode()
+    return " ".join(sin_acentos.lower().split())
+
+
+def _sembrar_alimentos(cursor):
+    execute_values(cursor, """
+        INSERT INTO alimentos (nombre, nombre_normalizado, tipo_comida, porcion, calorias)
+        VALUES %s
+        ON CONFLICT (nombre_normalizado) DO NOTHING
+    """, [(nombre, _normalizar(nombre), tipo, porcion, calorias) for nombre, tipo, porcion, calorias in _SEMILLAS_V7])
+
+
+def _vincular_comidas(cursor):
+    # Las comidas con un alimento fuera del catálogo lo agregan al catálogo (compartido hasta la migración 11),
+    # con el promedio de calorías registrado como porción
+    cursor.execute("""
+        SELECT alimento, MIN(tipo_comida), ROUND(AVG(calorias))
+        FROM comidas
+        WHERE alimento_id IS NULL AND COALESCE(TRIM(alimento), '') <> ''
+        GROUP BY alimento
+    """)
+    filas = cursor.fetchall()
+    nuevos = {}
+    for alimento, tipo_comida, calorias in filas:
+        normalizado = _normalizar(alimento)
+        if normalizado and normalizado not in nuevos:
+            nuevos[normalizado] = (" ".join(alimento.split()), normalizado, tipo_comida or "Otro", "1 porción",
+                                   int(calorias or 0))
+    if not nuevos:
+        return
+    execute_values(cursor, """
+        INSERT INTO alimentos (nombre, nombre_normalizado, tipo_comida, porcion, calorias)
+        VALUES %s
+        ON CONFLICT (nombre_normalizado) DO NOTHING
+    """, sorted(nuevos.values(), key=lambda v: v[1]))
+    cursor.execute("SELECT nombre_normalizado, id FROM alimentos WHERE nombre_normalizado = ANY(%s)", (list(nuevos),))
+    ids = dict(cursor.fetchall())
+    execute_values(cursor, """
+        UPDATE comidas SET alimento_id = v.id
+        FROM (VALUES %s) AS v (alimento, id)
+        WHERE comidas.alimento = v.alimento AND comidas.alimento_id IS NULL
+    """, [(alimento, ids[_normalizar(alimento)]) for alimento, _, _ in filas if _normalizar(alimento) in ids])
+
+
+def _separar_alimentos_agregados(cursor):
+    # Lo que no es semilla se agregó al catálogo compartido al guardar comidas: pasa a ser propio de cada usuario
+    # que lo registró, sus comidas apuntan a la copia propia y la fila compartida se borra
+    semillas = [_normalizar(nombre) for nombre, _, _, _ in _SEMILLAS_V7]
+    cursor.execute("""
+        INSERT INTO alimentos (usuario_id, nombre, nombre_normalizado, tipo_comida, porcion, calorias)
+        SELECT DISTINCT c.usuario_id, a.nombre, a.nombre_normalizado, a.tipo_comida, a.porcion, a.calorias
+        FROM alimentos a JOIN comidas c ON c.alimento_id = a.id
+        WHERE a.usuario_id IS NULL AND a.nombre_normalizado <> ALL(%s)
+        ON CONFLICT ((COALESCE(usuario_id, 0)), nombre_normalizado) DO NOTHING
+    """, (semillas,))
+    cursor.execute("""
+        UPDATE comidas c SET alimento_id = p.id
+        FROM alimentos a, alimentos p
+        WHERE c.alimento_id = a.id AND a.usuario_id IS NULL AND a.nombre_normalizado <> ALL(%s)
+          AND p.usuario_id = c.usuario_id AND p.nombre_normalizado = a.nombre_normalizado
+    """, (semillas,))
+    cursor.execute("DELETE FROM alimentos WHERE usuario_id IS NULL AND nombre_normalizado <> ALL(%s)", (semillas,))
+
+
+#######################################################
+####################################################### Migraciones
+#######################################################
+MIGRACIONES = [
+    (1, "Tablas base e índices por (usuario_id, fecha) y email", [
+        """
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id SERIAL PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            email TEXT NOT NULL,
+            contraseña TEXT NOT NULL,
+            foto TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS entrenamientos (
+            id SERIAL PRIMARY KEY,
+            usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+            fecha DATE NOT NULL,
+            tipo TEXT NOT NULL,
+            duracion INTEGER NOT NULL DEFAULT 0,
+            calorias INTEGER NOT NULL DEFAULT 0,
+            notas TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS comidas (
+            id SERIAL PRIMARY KEY,
+            usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+            fecha DATE NOT NULL,
+            tipo_comida TEXT NOT NULL,
+            alimento TEXT,
+            calorias INTEGER NOT NULL DEFAULT 0,
+            notas TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS medidas (
+            id SERIAL PRIMARY KEY,
+            usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+            fecha DATE NOT NULL,
+            abdomen DOUBLE PRECISION,
+            cintura DOUBLE PRECISION,
+            brazo DOUBLE PRECISION,
+            pecho DOUBLE PRECISION,
+            pierna DOUBLE PRECISION,
+            peso DOUBLE PRECISION,
+            notas TEXT
+        )
+        """,
+        # Mismo nombre que el que Postgres da a una restricción UNIQUE (email), para no duplicarla
+        "CREATE UNIQUE INDEX IF NOT EXISTS usuarios_email_key ON usuarios (email)",
+        "CREATE INDEX IF NOT EXISTS entrenamientos_usuario_fecha_idx ON entrenamientos (usuario_id, fecha)",
+        "CREATE INDEX IF NOT EXISTS comidas_usuario_fecha_idx ON comidas (usuario_id, fecha)",
+        "CREATE INDEX IF NOT EXISTS medidas_usuario_fecha_idx ON medidas (usuario_id, fecha)",
+    ]),
+    (2, "Resúmenes diarios por usuario (rollups) y carga inicial desde el historial", [
+        """
+        CREATE TABLE IF NOT EXISTS resumen_diario (
+            usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+            fecha DATE NOT NULL,
+            calorias_consumidas BIGINT NOT NULL DEFAULT 0,
+            calorias_quemadas BIGINT NOT NULL DEFAULT 0,
+            minutos_entrenamiento BIGINT NOT NULL DEFAULT 0,
+            sesiones INTEGER NOT NULL DEFAULT 0,
+            peso DOUBLE PRECISION,
+            peso_medida_id INTEGER,
+            PRIMARY KEY (usuario_id, fecha)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS resumen_diario_entrenamiento (
+            usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+            fecha DATE NOT NULL,
+            tipo TEXT NOT NULL,
+            minutos BIGINT NOT NULL DEFAULT 0,
+            calorias BIGINT NOT NULL DEFAULT 0,
+            sesiones INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (usuario_id, fecha, tipo)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS resumen_diario_comida (
+            usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+            fecha DATE NOT NULL,
+            tipo_comida TEXT NOT NULL,
+            calorias BIGINT NOT NULL DEFAULT 0,
+            registros INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (usuario_id, fecha, tipo_comida)
+        )
+        """,
+        # Carga inicial (como `python -m fuerzapp.resumenes` para todos los usuarios)
+        "DELETE FROM resumen_diario",
+        "DELETE FROM resumen_diario_entrenamiento",
+        "DELETE FROM resumen_diario_comida",
+        """
+        INSERT INTO resumen_diario_entrenamiento (usuario_id, fecha, tipo, minutos, calorias, sesiones)
+        SELECT usuario_id, fecha, tipo, COALESCE(SUM(duracion), 0), COALESCE(SUM(calorias), 0), COUNT(*)
+        FROM entrenamientos
+        GROUP BY usuario_id, fecha, tipo
+        """,
+        """
+        INSERT INTO resumen_diario_comida (usuario_id, fecha, tipo_comida, calorias, registros)
+        SELECT usuario_id, fecha, tipo_comida, COALESCE(SUM(calorias), 0), COUNT(*)
+        FROM comidas
+        GROUP BY usuario_id, fecha, tipo_comida
+        """,
+        """
+        INSERT INTO resumen_diario (usuario_id, fecha, calorias_consumidas, calorias_quemadas,
+                                    minutos_entrenamiento, sesiones, peso, peso_medida_id)
+        SELECT usuario_id, fecha, SUM(consumidas), SUM(quemadas), SUM(minutos), SUM(sesiones), MAX(peso), MAX(medida_id)
+        FROM (
+            SELECT usuario_id, fecha, 0 AS consumidas, calorias AS quemadas, minutos, sesiones,
+                   NULL::double precision AS peso, NULL::integer AS medida_id
+            FROM resumen_diario_entrenamiento
+            UNION ALL
+            SELECT usuario_id, fecha, calorias, 0, 0, 0, NULL, NULL
+            FROM resumen_diario_comida
+            UNION ALL
+            (SELECT DISTINCT ON (usuario_id, fecha) usuario_id, fecha, 0, 0, 0, 0, peso, id
+             FROM medidas
+             WHERE peso IS NOT NULL
+             ORDER BY usuario_id, fecha, id DESC)
+        ) partes
+        GROUP BY usuario_id, fecha
+        """,
+    ]),
+    (3, "Contraseñas como TEXT (los hashes scrypt superan los 64 caracteres del SHA-256)", [
+        "ALTER TABLE usuarios ALTER COLUMN contraseña TYPE TEXT",
+    ]),
+    (4, "Ids de los envíos aplicados por la cola de escritura diferida", [
+        """
+        CREATE TABLE IF NOT EXISTS escrituras_aplicadas (
+            id TEXT PRIMARY KEY,
+            aplicada TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+    ]),
+    # El índice nuevo sirve también para los filtros por rango de fecha: reemplaza al de la versión 1
+    (5, "Índices (usuario_id, fecha DESC, id DESC) para paginar el historial por keyset", [
+        "CREATE INDEX IF NOT EXISTS entrenamientos_usuario_fecha_id_idx ON entrenamientos (usuario_id, fecha DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS comidas_usuario_fecha_id_idx ON comidas (usuario_id, fecha DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS medidas_usuario_fecha_id_idx ON medidas (usuario_id, fecha DESC, id DESC)",
+        "DROP INDEX IF EXISTS entrenamientos_usuario_fecha_idx",
+        "DROP INDEX IF EXISTS comidas_usuario_fecha_idx",
+        "DROP INDEX IF EXISTS medidas_usuario_fecha_idx",
+    ]),
+    (6, "Marca de agua `actualizado` en los resúmenes y tablas de analítica de entrenamiento", [
+        "ALTER TABLE resumen_diario ADD COLUMN IF NOT EXISTS actualizado TIMESTAMPTZ NOT NULL DEFAULT now()",
+        "ALTER TABLE resumen_diario_entrenamiento ADD COLUMN IF NOT EXISTS actualizado TIMESTAMPTZ NOT NULL DEFAULT now()",
+        "ALTER TABLE resumen_diario_comida ADD COLUMN IF NOT EXISTS actualizado TIMESTAMPTZ NOT NULL DEFAULT now()",
+        "CREATE INDEX IF NOT EXISTS resumen_diario_usuario_actualizado_idx ON resumen_diario (usuario_id, actualizado)",
+        """
+        CREATE TABLE IF NOT EXISTS analitica_diaria (
+            usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+            fecha DATE NOT NULL,
+            carga BIGINT NOT NULL,
+            carga_aguda DOUBLE PRECISION NOT NULL,
+            carga_cronica DOUBLE PRECISION NOT NULL,
+            acwr DOUBLE PRECISION,
+            balance_7 DOUBLE PRECISION NOT NULL,
+            balance_28 DOUBLE PRECISION NOT NULL,
+            racha INTEGER NOT NULL,
+            PRIMARY KEY (usuario_id, fecha)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS analitica_semanal (
+            usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+            semana DATE NOT NULL,
+            tipo TEXT NOT NULL,
+            minutos BIGINT NOT NULL,
+            sesiones INTEGER NOT NULL,
+            PRIMARY KEY (usuario_id, semana, tipo)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS analitica_estado (
+            usuario_id INTEGER PRIMARY KEY REFERENCES usuarios (id) ON DELETE CASCADE,
+            marca TIMESTAMPTZ NOT NULL,
+            calculado_hasta DATE NOT NULL,
+            racha_maxima INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+    ]),
+    (7, "Catálogo de alimentos y alimento_id en comidas (vincula las comidas existentes)", [
+        """
+        CREATE TABLE IF NOT EXISTS alimentos (
+            id SERIAL PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            nombre_normalizado TEXT NOT NULL UNIQUE,
+            tipo_comida TEXT NOT NULL,
+            porcion TEXT NOT NULL,
+            calorias INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "ALTER TABLE comidas ADD COLUMN IF NOT EXISTS alimento_id INTEGER REFERENCES alimentos (id)",
+        "CREATE INDEX IF NOT EXISTS comidas_usuario_alimento_idx ON comidas (usuario_id, alimento_id, fecha)",
+        _sembrar_alimentos,
+        _vincular_comidas,
+    ]),
+    (8, "Roles de usuario y cohortes de atletas para coaches", [
+        "ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS rol TEXT NOT NULL DEFAULT 'atleta' CHECK (rol IN ('atleta', 'coach', 'admin'))",
+        """
+        CREATE TABLE IF NOT EXISTS cohortes (
+            id SERIAL PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            coach_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+            modificada TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS cohorte_miembros (
+            cohorte_id INTEGER NOT NULL REFERENCES cohortes (id) ON DELETE CASCADE,
+            usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+            PRIMARY KEY (cohorte_id, usuario_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS cohortes_coach_idx ON cohortes (coach_id)",
+        "CREATE INDEX IF NOT EXISTS cohorte_miembros_usuario_idx ON cohorte_miembros (usuario_id)",
+    ]),
+    (9, "Tema visual elegido por cada usuario", [
+        # Clave del archivo del tema en temas/ (fuerzapp.tema); NULL hasta que el usuario elige uno
+        "ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS tema TEXT",
+    ]),
+    (10, "Versión de sesión por usuario para revocar tokens al cerrar sesión", [
+        "ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS sesion_version INTEGER NOT NULL DEFAULT 0",
+    ]),
+    (11, "Alimentos propios de cada usuario fuera del catálogo compartido", [
+        # Un nombre es único dentro del catálogo compartido (usuario_id NULL) y dentro de cada usuario
+        "ALTER TABLE alimentos ADD COLUMN IF NOT EXISTS usuario_id INTEGER REFERENCES usuarios (id) ON DELETE CASCADE",
+        "ALTER TABLE alimentos DROP CONSTRAINT IF EXISTS alimentos_nombre_normalizado_key",
+        "CREATE UNIQUE INDEX IF NOT EXISTS alimentos_usuario_nombre_idx ON alimentos ((COALESCE(usuario_id, 0)), nombre_normalizado)",
+        _separar_alimentos_agregados,
+    ]),
+]
+
+# Índices cubrientes (opcionales): incluyen las columnas que lee cada consulta para permitir index-only scans.
+# Ocupan más espacio y encarecen las escrituras, por eso no forman parte de las migraciones obligatorias.
+INDICES_CUBRIENTES = [
+    # Login: busca por email y lee el resto de la fila del usuario
+    "CREATE INDEX IF NOT EXISTS usuarios_email_cubriente_idx ON usuarios (email) INCLUDE (id, nombre, contraseña, foto)",
+    # Reportes: agregados por período y tipo
+    "CREATE INDEX IF NOT EXISTS entrenamientos_reportes_idx ON entrenamientos (usuario_id, fecha) INCLUDE (tipo, duracion, calorias)",
+    "CREATE INDEX IF NOT EXISTS comidas_reportes_idx ON comidas (usuario_id, fecha) INCLUDE (tipo_comida, calorias)",
+    "CREATE INDEX IF NOT EXISTS medidas_reportes_idx ON medidas (usuario_id, fecha) INCLUDE (abdomen, cintura, brazo, pecho, pierna, peso)",
+]
+
+
+def _crear_tabla_version(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS esquema_version (
+            version INTEGER PRIMARY KEY,
+            descripcion TEXT NOT NULL,
+            aplicada TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def versiones_aplicadas(conn):
+    """
+    Conjunto de versiones ya aplicadas en la base.
+    """
+    cursor = conn.cursor()
+    _crear_tabla_version(cursor)
+    cursor.execute("SELECT version FROM esquema_version")
+    return {fila[0] for fila in cursor.fetchall()}
+
+
+def aplicar_migraciones(conn, cubrientes=False):
+    """
+    Aplica en orden las migraciones pendientes dentro de una transacción (la confirma quien llama).
+    Devuelve la lista de versiones aplicadas en esta llamada.
+    """
+    cursor = conn.cursor()
+    # Bloqueo hasta el final de la transacción: otro proceso que arranque a la vez espera y luego no ve pendientes
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (CLAVE_BLOQUEO,))
+    aplicadas = versiones_aplicadas(conn)
+    nuevas = []
+    for version, descripcion, sentencias in sorted(MIGRACIONES, key=lambda m: m[0]):
+        if version in aplicadas:
+            continue
+        for sentencia in sentencias:
+            if callable(sentencia):
+                sentencia(cursor)
+            else:
+                cursor.execute(sentencia)
+        cursor.execute("INSERT INTO esquema_version (version, descripcion) VALUES (%s, %s)", (version, descripcion))
+        nuevas.append(version)
+    if cubrientes:
+        for sentencia in INDICES_CUBRIENTES:
+            cursor.execute(sentencia)
+    return nuevas
+
+
+@st.cache_resource(show_spinner=False)
+def _migrar_una_vez():
+    try:
+        with get_connection(detener=False) as conn:
+            nuevas = aplicar_migraciones(conn, cubrientes=bool(leer_secreto("db_indices_cubrientes", False)))
+    except psycopg2.OperationalError:
+        raise
+    except psycopg2.Error as e:
+        # Por ejemplo, si el usuario de la base no tiene permisos de DDL: la app sigue con el esquema existente
+        log.error("No se pudieron aplicar las migraciones", extra={"error": str(e)})
+        return []
+    if nuevas:
+        log.info("Migraciones aplicadas", extra={"versiones": nuevas})
+    return nuevas
+
+
+def preparar_esquema():
+    """
+    Aplica las migraciones pendientes una vez por proceso al arrancar la app.
+    Se desactiva con db_migrar_al_iniciar = false y los índices cubrientes se activan con db_indices_cubrientes = true.
+    Si la base no responde, la app sigue (con la réplica local, si está activada) y se reintenta en una reejecución
+    posterior, como mucho cada REINTENTO_MIGRAR segundos: st.cache_resource no guarda los errores.
+    """
+    global _reintentar_en
+    if not leer_secreto("db_migrar_al_iniciar", True) or time.monotonic() < _reintentar_en:
+        return []
+    try:
+        return _migrar_una_vez()
+    except psycopg2.OperationalError as e:
+        _reintentar_en = time.monotonic() + REINTENTO_MIGRAR
+        log.warning("Sin conexión para aplicar las migraciones; se reintenta", extra={"error": str(e).strip()})
+        return []
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Aplica las migraciones del esquema de FuerzApp.")
+    parser.add_argument("--cubrientes", action="store_true", help="crear también los índices cubrientes")
+    parser.add_argument("--estado", action="store_true", help="solo mostrar las versiones aplicadas y pendientes")
+    args = parser.parse_args(argumentos)
+
+    conn = psycopg2.connect(cadena_conexion())
+    try:
+        with conn:
+            if args.estado:
+                aplicadas = versiones_aplicadas(conn)
+                for version, descripcion, _ in MIGRACIONES:
+                    marca = "aplicada " if version in aplicadas else "pendiente"
+                    print(f"{version:>4}  {marca}  {descripcion}")
+                return
+            nuevas = aplicar_migraciones(conn, cubrientes=args.cubrientes)
+        print(f"Migraciones aplicadas: {nuevas}" if nuevas else "El esquema ya estaba al día.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# fuerzapp/muestreo.py
+###########################################################################################################################
+# Reducción de series para gráficos: Largest-Triangle-Three-Buckets (LTTB).
+# Conserva la forma visual de una serie (picos y valles incluidos) con un número fijo de puntos, de modo que el
+# JSON de Plotly enviado al navegador queda acotado sin importar cuánto historial tenga el usuario.
+#######################################################
+import numpy as np
+import pandas as pd
+
+MAX_PUNTOS = 300  # puntos por serie por defecto
+
+
+def lttb(x, y, n_puntos):
+    """
+    Devuelve los índices (ordenados) de los `n_puntos` puntos que LTTB elige de la serie (x, y).
+    `x` debe estar ordenado y ser numérico; si la serie ya tiene n_puntos o menos se devuelven todos.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+    if n <= n_puntos:
+        return np.arange(n)
+    if n_puntos < 3:
+        raise ValueError("LTTB necesita al menos 3 puntos de salida")
+
+    # Los puntos interiores se reparten en n_puntos - 2 buckets; el primero y el último siempre se conservan
+    bordes = np.linspace(1, n - 1, n_puntos - 1).astype("int64")
+    inicios, fines = bordes[:-1], bordes[1:]
+    # Promedio de cada bucket (vectorizado) para usarlo como tercer vértice del triángulo
+    sumas_x = np.add.reduceat(x[1:n - 1], inicios - 1)
+    sumas_y = np.add.reduceat(y[1:n - 1], inicios - 1)
+    tamanos = fines - inicios
+    promedios_x = np.append(sumas_x / tamanos, x[-1])
+    promedios_y = np.append(sumas_y / tamanos, y[-1])
+
+    elegidos = np.empty(n_puntos, dtype="int64")
+    elegidos[0], elegidos[-1] = 0, n - 1
+    anterior = 0
+    for i, (inicio, fin) in enumerate(zip(inicios, fines)):
+        ax, ay = x[anterior], y[anterior]
+        cx, cy = promedios_x[i + 1], promedios_y[i + 1]
+        bx, by = x[inicio:fin], y[inicio:fin]
+        # Área (x2) del triángulo formado por el punto anterior, cada candidato y el promedio del bucket siguiente
+        areas = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+        anterior = inicio + int(np.argmax(areas))
+        elegidos[i + 1] = anterior
+    return elegidos
+
+
+def reducir(df, x, y, n_puntos=MAX_PUNTOS, por=None):
+    """
+    Reduce `df` a como mucho `n_puntos` filas por serie usando LTTB sobre las columnas `x` e `y`.
+    Si se indica `por`, cada grupo de esa columna se trata como una serie aparte. Descarta las filas con `y` nulo.
+    """
+    df = df.dropna(subset=[y]).sort_values(x)
+    grupos = [df] if por is None else [g for _, g in df.groupby(por, sort=False, observed=True)]
+    partes = []
+    for grupo in grupos:
+        valores_x = grupo[x]
+        if pd.api.types.is_datetime64_any_dtype(valores_x):
+            valores_x = valores_x.astype("int64")
+        indices = lttb(valores_x.to_numpy(), grupo[y].to_numpy(dtype="float64"), n_puntos)
+        partes.append(grupo.iloc[indices])
+    if not partes:
+        return df
+    return pd.concat(partes, ignore_index=True)
@@ -0,0 +1,59 @@
+# fuerzapp/paginas/__init__.py
+###########################################################################################################################
+# Páginas de la app. Cada página es un módulo con una función mostrar(usuario_id) y se importa recién cuando se
+# abre: así una sesión que solo ve el login (o Inicio) no carga plotly, y pandas llega con la primera tabla.
+# La página se dibuja dentro de un fragmento (mostrar): tocar un widget o enviar un formulario de la página vuelve a
+# ejecutar solo la página, no el tema, el perfil del sidebar ni el menú.
+#######################################################
+import importlib
+
+import streamlit as st
+
+from fuerzapp import metricas
+
+# Clave de menú -> (texto del botón en el sidebar, módulo de la página)
+PAGINAS = {
+    "Inicio": ("🏠 Inicio", "inicio"),
+    "Registrar Entrenamiento": ("💪 Entrenamiento", "entrenamiento"),
+    "Registrar Comida": ("🍽️ Comida", "comida"),
+    "Registrar Medidas": ("📏 Medidas", "medidas"),
+    "Reportes": ("📊 Reportes", "reportes"),
+    "Progreso": ("📈 Progreso", "progreso"),
+    "Historial": ("📜 Historial", "historial"),
+    "Importar": ("📥 Importar", "importar"),
+    "Exportar": ("📤 Exportar", "exportar"),
+    "Cohortes": ("👥 Cohortes", "cohortes"),
+}
+# Páginas que solo ven algunos roles (el resto las ven todos)
+ROLES_PAGINA = {
+    "Cohortes": ("coach", "admin"),
+}
+
+
+def visibles(rol):
+    """
+    Claves de menú de las páginas que puede abrir un usuario con `rol`.
+    """
+    return [clave for clave in PAGINAS if rol in ROLES_PAGINA.get(clave, (rol,))]
+
+
+def cargar(menu):
+    """
+    Importa (la primera vez) y devuelve el módulo de la página `menu`.
+    """
+    _, modulo = PAGINAS[menu]
+    return importlib.import_module(f"{__name__}.{modulo}")
+
+
+@st.fragment
+def mostrar(menu, usuario_id):
+    """
+    Dibuja la página `menu` como un fragmento que se vuelve a ejecutar solo.
+    """
+    # En un rerun del fragmento el script no pasa por Fuerzapp.py: las consultas se miden acá
+    propio = not metricas.rerun_en_curso()
+    if propio:
+        metricas.iniciar_rerun()
+    cargar(menu).mostrar(usuario_id)
+    if propio:
+        metricas.cerrar_rerun(f"{menu} (fragmento)")
@@ -0,0 +1,113 @@
+# fuerzapp/paginas/cohortes.py
+###########################################################################################################################
+# Cohortes: vista de coaches y admins con las métricas de un grupo de atletas (ver fuerzapp.cohortes).
+#######################################################
+from datetime import date, timedelta
+
+import plotly.express as px
+import streamlit as st
+
+from fuerzapp import cohortes
+from fuerzapp.auth import ROLES_COACH, rol
+
+
+def _administrar(usuario_id, cohorte_id):
+    with st.expander("➕ Nueva cohorte"):
+        with st.form("form_cohorte", clear_on_submit=True):
+            nombre = st.text_input("Nombre")
+            if st.form_submit_button("Crear") and nombre.strip():
+                st.session_state.cohorte = cohortes.crear(usuario_id, nombre)
+                st.rerun()
+    if cohorte_id is None:
+        return
+    with st.expander("👥 Miembros"):
+        with st.form("form_miembros", clear_on_submit=True):
+            emails = st.text_area("Emails de los atletas (uno por línea o separados por comas)")
+            if st.form_submit_button("Agregar"):
+                agregados, desconocidos = cohortes.agregar_miembros(cohorte_id, emails.replace(",", "\n").splitlines())
+                st.success(f"✅ {agregados} miembro(s) agregado(s).")
+                if desconocidos:
+                    st.warning(f"No hay usuarios con estos emails: {', '.join(desconocidos)}")
+        lista = cohortes.miembros(cohorte_id)
+        nombres = {usuario: f"{nombre} ({email})" for usuario, nombre, email in lista}
+        quitar = st.multiselect("Quitar de la cohorte", list(nombres), format_func=nombres.get)
+        if quitar and st.button("Quitar seleccionados"):
+            cohortes.quitar_miembros(cohorte_id, quitar)
+            st.rerun()
+
+
+def mostrar(usuario_id):
+    """
+    Elección de cohorte, alta de miembros y métricas del grupo en el rango elegido.
+    """
+    st.subheader("👥 Cohortes")
+    rol_usuario = rol(usuario_id)
+    if rol_usuario not in ROLES_COACH:
+        st.warning("Esta sección es solo para coaches.")
+        return
+
+    lista = cohortes.visibles(usuario_id, rol_usuario)
+    opciones = {cohorte_id: f"{nombre} · {miembros} miembro(s)" + (f" · {coach}" if rol_usuario == "admin" else "")
+                for cohorte_id, nombre, coach, miembros in lista}
+    cohorte_id = None
+    if opciones:
+        actual = st.session_state.get("cohorte")
+        cohorte_id = st.selectbox("Cohorte", list(opciones), format_func=opciones.get,
+                                  index=list(opciones).index(actual) if actual in opciones else 0)
+        st.session_state.cohorte = cohorte_id
+    _administrar(usuario_id, cohorte_id)
+    if cohorte_id is None:
+        st.info("Todavía no tenés cohortes: creá una y sumá atletas por email.")
+        return
+
+    col_rango, col_objetivo = st.columns([3, 1])
+    with col_rango:
+        hoy = date.today()
+        rango = st.date_input("Rango de fechas", value=(hoy - timedelta(weeks=cohortes.SEMANAS) + timedelta(days=1), hoy), max_value=hoy)
+    with col_objetivo:
+        objetivo = st.number_input("Sesiones por semana (objetivo)", min_value=1, max_value=14,
+                                   value=cohortes.OBJETIVO_SESIONES)
+    # Mientras el usuario elige el rango, date_input devuelve una sola fecha
+    desde, hasta = (rango[0], rango[1]) if len(rango) == 2 else (rango[0], hoy)
+    datos = cohortes.metricas(cohorte_id, desde, hasta, int(objetivo))
+    resumen, por_miembro, semanal = datos["resumen"], datos["miembros"], datos["semanal"]
+    if not resumen["miembros"]:
+        st.info("La cohorte no tiene miembros.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Miembros", resumen["miembros"])
+    col2.metric("Adherencia media", f"{resumen['adherencia']:.0%}",
+                help=f"Fracción de semanas con al menos {int(objetivo)} sesiones, promedio de los miembros.")
+    col3.metric("Balance calórico medio", "—" if resumen["balance"] is None else f"{resumen['balance']:+.0f} kcal/día",
+                help="Calorías consumidas menos quemadas entrenando, en los días con comidas registradas.")
+    col4.metric("Tendencia del peso (mediana)", "—" if resumen["tendencia_peso"] is None else f"{resumen['tendencia_peso']:+.2f} kg/sem")
+
+    if not semanal.empty:
+        st.markdown("### Adherencia semanal de la cohorte")
+        fig_adherencia = px.bar(semanal, x="semana", y="adherencia", hover_data=["activos"],
+                                labels={"semana": "Semana", "adherencia": "Miembros que cumplieron", "activos": "Con registros"})
+        fig_adherencia.update_yaxes(tickformat=".0%", range=[0, 1])
+        st.plotly_chart(fig_adherencia, width="stretch")
+
+    tendencias = por_miembro.dropna(subset=["tendencia_peso"])
+    if not tendencias.empty:
+        st.markdown("### Distribución de la tendencia del peso")
+        fig_peso = px.histogram(tendencias, x="tendencia_peso", nbins=min(30, max(5, len(tendencias) // 2)),
+                                labels={"tendencia_peso": "kg por semana", "count": "Miembros"})
+        st.plotly_chart(fig_peso, width="stretch")
+
+    st.markdown("### Miembros")
+    st.dataframe(
+        por_miembro.drop(columns=["usuario_id"]).sort_values("adherencia"),
+        hide_index=True, width="stretch",
+        column_config={
+            "nombre": "Nombre",
+            "email": "Email",
+            "adherencia": st.column_config.ProgressColumn("Adherencia", format="percent", min_value=0, max_value=1),
+            "sesiones_semana": st.column_config.NumberColumn("Sesiones/semana", format="%.1f"),
+            "balance": st.column_config.NumberColumn("Balance (kcal/día)", format="%+.0f"),
+            "tendencia_peso": st.column_config.NumberColumn("Peso (kg/sem)", format="%+.2f"),
+            "ultima_semana": st.column_config.DateColumn("Última semana con registros"),
+        },
+    )
@@ -0,0 +1,116 @@
+# fuerzapp/paginas/comida.py
+###########################################################################################################################
+# Registro de comidas.
+# El alimento se busca en el catálogo (fuerzapp.alimentos) al presionar Enter en el buscador: elegir un resultado
+# completa el tipo y las calorías según las porciones. También se puede escribir un alimento que no está: se guarda como propio del usuario
+# (solo él lo ve en la búsqueda) hasta que se apruebe para el catálogo compartido.
+# Sin conexión con la base (réplica activada) la búsqueda no tiene resultados: el alimento se escribe a mano y la
+# cola de escritura lo vincula al catálogo cuando vuelve la conexión.
+#######################################################
+from datetime import date
+
+import streamlit as st
+
+from fuerzapp import alimentos, resumenes
+from fuerzapp.cola_escritura import obtener_cola
+from fuerzapp.datos import invalidar
+from fuerzapp.db import get_connection
+from fuerzapp.paginas.comun import encolar_envio, panel_ultimos
+from fuerzapp.replica import leer_postgres
+
+TIPOS_COMIDA = ["Carnes, pescados y huevos", "Fruta y Verdura", "Cereales y derivados", "Lacteos y derivados", "Legumbres", "Grasas y aceites", "Otro"]
+
+
+def _autocompletar():
+    # on_change del catálogo y de las porciones: completa el formulario antes de dibujarlo
+    elegido = st.session_state.get("comida_catalogo")
+    if elegido is None:
+        return
+    st.session_state["comida_alimento"] = elegido.nombre
+    if elegido.tipo_comida in TIPOS_COMIDA:
+        st.session_state["comida_tipo"] = elegido.tipo_comida
+    st.session_state["comida_calorias"] = int(round(elegido.calorias * st.session_state.get("comida_porciones", 1.0)))
+
+
+def _indices(usuario_id):
+    # Catálogo compartido y alimentos propios del usuario (vacíos si la base no responde)
+    vacio = alimentos.IndiceAlimentos()
+    return (leer_postgres(alimentos.obtener_indice, vacio),
+            leer_postgres(lambda: alimentos.indice_propio(usuario_id), vacio))
+
+
+def _buscar(usuario_id, texto):
+    # Primero el catálogo compartido; después los alimentos propios del usuario que no estén ya
+    compartido, propio = _indices(usuario_id)
+    resultados = compartido.buscar(texto)
+    nombres = {a.nombre for a in resultados}
+    propios = [a for a in propio.buscar(texto) if a.nombre not in nombres]
+    return (resultados + propios)[:alimentos.LIMITE]
+
+
+def _guardar(usuario_id, fecha, tipo_comida, alimento, calorias, notas):
+    # Si el alimento está en el catálogo (o entre los propios) se guarda con su nombre y su id; si no, se agrega
+    compartido, propio = _indices(usuario_id)
+    conocido = compartido.por_nombre(alimento) or propio.por_nombre(alimento)
+    if conocido is not None:
+        alimento = conocido.nombre
+    cola = obtener_cola()
+    if cola is not None:
+        # Escritura diferida: se confirma en segundo plano (ver fuerzapp.cola_escritura)
+        encolar_envio(cola, "comidas", {"usuario_id": usuario_id, "fecha": fecha, "tipo_comida": tipo_comida, "alimento": alimento, "calorias": calorias, "notas": notas, "alimento_id": conocido.id if conocido else None})
+        return
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        if conocido is not None:
+            alimento_id = conocido.id
+        else:
+            (alimento_id,) = alimentos.resolver(cursor, [(usuario_id, alimento, tipo_comida, calorias)])
+        cursor.execute("""
+            INSERT INTO comidas (usuario_id, fecha, tipo_comida, alimento, calorias, notas, alimento_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (usuario_id, fecha, tipo_comida, alimento, calorias, notas, alimento_id))
+        resumenes.sumar_comidas(cursor, [(usuario_id, fecha, tipo_comida, calorias)])
+    invalidar(usuario_id, "comidas")
+    st.success("✅ Alimento registrado correctamente.")
+
+
+def mostrar(usuario_id):
+    """
+    Buscador del catálogo, formulario de nueva comida y las últimas registradas.
+    """
+    st.subheader("Nueva comida")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader(" Registrar nuevo alimento")
+        # Fuera del formulario: text_input vuelve a ejecutar la página (un fragmento) al presionar Enter o al salir
+        # del campo, no con cada tecla; la búsqueda es en memoria
+        col_busqueda, col_porciones = st.columns([3, 1])
+        with col_busqueda:
+            busqueda = st.text_input("Buscar en el catálogo", key="comida_busqueda", placeholder="Ej.: pollo, avena...",
+                                     help="Escribí parte del nombre y presioná Enter.")
+        with col_porciones:
+            st.number_input("Porciones", min_value=0.25, max_value=20.0, value=1.0, step=0.5, key="comida_porciones",
+                            on_change=_autocompletar)
+        resultados = _buscar(usuario_id, busqueda) if busqueda else []
+        elegido = st.selectbox(
+            "Alimento del catálogo", resultados, index=None, key="comida_catalogo", on_change=_autocompletar,
+            format_func=lambda a: f"{a.nombre} · {a.porcion} · {a.calorias} kcal",
+            placeholder="Elegí un resultado" if resultados else "Sin resultados" if busqueda else "Buscá arriba y presioná Enter",
+        )
+        if elegido is not None:
+            st.caption(f"Porción: {elegido.porcion} = {elegido.calorias} kcal")
+
+        with st.form("form_comidas"):
+            fecha = st.date_input("Fecha", value=date.today())
+            tipo_comida = st.selectbox("Tipo de alimento", TIPOS_COMIDA, key="comida_tipo")
+            alimento = st.text_input("Alimento", key="comida_alimento")
+            calorias = st.number_input("Calorías estimadas", min_value=0, step=10, key="comida_calorias")
+            notas = st.text_area("Notas adicionales (opcional)")
+            enviar2 = st.form_submit_button("Guardar alimento")
+            if enviar2:
+                _guardar(usuario_id, fecha, tipo_comida, alimento, calorias, notas)
+
+    with col2:
+        st.subheader("🕒 Últimos alimentos")
+        panel_ultimos(usuario_id, "comidas", "Aún no registraste alimentos.")
@@ -0,0 +1,93 @@
+# fuerzapp/paginas/comun.py
+###########################################################################################################################
+# Componentes compartidos por varias páginas.
+#######################################################
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+from fuerzapp.cola_escritura import CONFIRMADO, ERROR, PENDIENTE, ColaLlenaError, obtener_cola
+from fuerzapp.datos import etiquetar, ultimos_registros
+
+
+# Mostrar un panel "Últimos ..." (tabla con los registros o un aviso si no hay ninguno)
+def mostrar_ultimos(tabla, df, mensaje_vacio):
+    """
+    Muestra los últimos registros de una tabla con sus etiquetas, o un aviso si está vacía.
+    """
+    if df.empty:
+        st.info(mensaje_vacio)
+        return
+    st.dataframe(
+        etiquetar(tabla, df).reset_index(drop=True),
+        width="stretch",
+        column_config={"Fecha": st.column_config.DateColumn("Fecha")},
+    )
+
+
+@st.fragment
+def panel_ultimos(usuario_id, tabla, mensaje_vacio):
+    """
+    Panel "Últimos ..." de `tabla` como fragmento: lee sus datos de la caché de consultas y se dibuja solo.
+    """
+    mostrar_envios(tabla)
+    df = ultimos_registros(usuario_id, tablas=(tabla,))[tabla]
+    mostrar_ultimos(tabla, df, mensaje_vacio)
+
+
+def recargar_seccion():
+    """
+    Vuelve a ejecutar solo el fragmento en curso. Si el click llegó en un rerun completo (por ejemplo, el primero
+    después de cambiar de página), Streamlit no permite scope="fragment" y se recarga toda la app.
+    """
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
+# Envíos de la escritura diferida: se guardan en la sesión como (id, tabla) hasta que se confirman
+def encolar_envio(cola, tabla, fila):
+    """
+    Encola un envío de formulario y lo anota en la sesión para seguir su estado.
+    """
+    try:
+        id_envio = cola.encolar(tabla, fila)
+    except ColaLlenaError as e:
+        st.error(f"No se pudo guardar ahora: {e} Probá de nuevo en unos segundos.")
+        return
+    st.session_state.setdefault("envios", []).append((id_envio, tabla))
+    st.info("⏳ Guardando... El registro queda anotado aunque cierres la página.")
+
+
+def mostrar_envios(tabla):
+    """
+    Muestra los envíos pendientes de `tabla` de esta sesión (solo con escritura diferida).
+    """
+    if obtener_cola() is None or not any(t == tabla for _, t in st.session_state.get("envios", [])):
+        return
+    _seguir_envios(tabla)
+
+
+@st.fragment(run_every=2)
+def _seguir_envios(tabla):
+    # Se vuelve a ejecutar sola cada 2 segundos; cuando no quedan pendientes recarga la página para que el
+    # panel "Últimos" muestre lo guardado
+    cola = obtener_cola()
+    pendientes, resueltos = 0, 0
+    quedan = []
+    for id_envio, tabla_envio in st.session_state.get("envios", []):
+        estado, detalle = cola.estado(id_envio) or (CONFIRMADO, None)
+        if tabla_envio != tabla or estado == PENDIENTE:
+            pendientes += tabla_envio == tabla
+            quedan.append((id_envio, tabla_envio))
+        elif estado == ERROR:
+            st.toast(f"❌ No se pudo guardar un registro: {detalle}")
+            resueltos += 1
+        else:
+            st.toast("✅ Registro guardado.")
+            resueltos += 1
+    st.session_state.envios = quedan
+    if pendientes:
+        st.caption(f"⏳ {pendientes} registro(s) pendiente(s) de confirmar")
+    elif resueltos:
+        st.rerun()
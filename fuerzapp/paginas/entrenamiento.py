@@ -0,0 +1,49 @@
+# fuerzapp/paginas/entrenamiento.py
+###########################################################################################################################
+# Registro de entrenamientos.
+#######################################################
+from datetime import date
+
+import streamlit as st
+
+from fuerzapp import resumenes
+from fuerzapp.cola_escritura import obtener_cola
+from fuerzapp.datos import invalidar
+from fuerzapp.db import get_connection
+from fuerzapp.paginas.comun import encolar_envio, panel_ultimos
+
+
+def mostrar(usuario_id):
+    """
+    Formulario de nuevo entrenamiento y los últimos registrados.
+    """
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("💪 Registrar nuevo entrenamiento")
+        with st.form("form_entrenamiento"):
+            fecha = st.date_input("Fecha", value=date.today()) # Valor por defecto a la fecha actual
+            tipo = st.selectbox("Tipo de entrenamiento", ["Fuerza", "Cardio", "Funcional", "Movilidad", "Otro"])
+            duracion = st.number_input("Duración (minutos)", min_value=0, step=5)
+            calorias = st.number_input("Calorías estimadas", min_value=0, step=10)
+            notas = st.text_area("Notas adicionales (opcional)")
+            enviar = st.form_submit_button("Guardar entrenamiento")
+            if enviar:
+                cola = obtener_cola()
+                if cola is not None:
+                    # Escritura diferida: se confirma en segundo plano (ver fuerzapp.cola_escritura)
+                    encolar_envio(cola, "entrenamientos", {"usuario_id": usuario_id, "fecha": fecha, "tipo": tipo, "duracion": duracion, "calorias": calorias, "notas": notas})
+                else:
+                    with get_connection() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute("""
+                            INSERT INTO entrenamientos (usuario_id, fecha, tipo, duracion, calorias, notas)
+                            VALUES (%s, %s, %s, %s, %s, %s)
+                        """, (usuario_id, fecha, tipo, duracion, calorias, notas))
+                        resumenes.sumar_entrenamientos(cursor, [(usuario_id, fecha, tipo, duracion, calorias)])
+                    invalidar(usuario_id, "entrenamientos")
+                    st.success("✅ Entrenamiento registrado correctamente.")
+
+    with col2:
+        st.subheader("🕒 Últimos entrenamientos")
+        panel_ultimos(usuario_id, "entrenamientos", "Aún no registraste entrenamientos.")
@@ -0,0 +1,29 @@
+# fuerzapp/paginas/exportar.py
+###########################################################################################################################
+# Exportación del historial completo a CSV o Parquet.
+#######################################################
+import streamlit as st
+
+from fuerzapp.exportacion import exportar
+
+
+def mostrar(usuario_id):
+    """
+    Descarga del historial completo de la tabla elegida.
+    """
+    st.subheader("📤 Exportar historial completo")
+    tablas_exportables = {"Entrenamientos": "entrenamientos", "Comidas": "comidas", "Medidas": "medidas"}
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        origen = st.selectbox("¿Qué querés exportar?", list(tablas_exportables))
+    with col2:
+        formato = st.selectbox("Formato", ["CSV", "Parquet"])
+    tabla = tablas_exportables[origen]
+    extension = formato.lower()
+    # El archivo se genera recién al hacer clic (en otro hilo), no en cada rerun de la página
+    st.download_button(
+        f"Descargar {origen.lower()} ({formato})",
+        data=lambda: exportar(tabla, usuario_id, extension),
+        file_name=f"fuerzapp_{tabla}.{extension}",
+        mime="text/csv" if extension == "csv" else "application/vnd.apache.parquet",
+    )
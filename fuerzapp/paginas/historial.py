@@ -0,0 +1,50 @@
+# fuerzapp/paginas/historial.py
+###########################################################################################################################
+# Historial completo, paginado (ver fuerzapp.historial).
+#######################################################
+import streamlit as st
+
+from fuerzapp import historial
+from fuerzapp.paginas.comun import mostrar_ultimos, recargar_seccion
+
+TABLAS_HISTORIAL = {"Entrenamientos": "entrenamientos", "Comidas": "comidas", "Medidas": "medidas"}
+
+
+def mostrar(usuario_id):
+    """
+    Tabla del historial con filtros y navegación por páginas.
+    """
+    st.subheader("📜 Historial")
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        tabla = TABLAS_HISTORIAL[st.selectbox("Registros", list(TABLAS_HISTORIAL))]
+    with col2:
+        tipos = historial.tipos_usados(usuario_id, tabla)
+        opcion_tipo = st.selectbox("Tipo", ["Todos", *tipos], disabled=not tipos)
+        tipo = None if opcion_tipo == "Todos" else opcion_tipo
+    with col3:
+        rango = st.date_input("Fechas", value=())
+    desde = rango[0] if len(rango) > 0 else None
+    hasta = rango[1] if len(rango) > 1 else None
+
+    # Pila de cursores de las páginas visitadas (para volver atrás); se reinicia al cambiar los filtros
+    filtros = (tabla, tipo, desde, hasta)
+    if st.session_state.get("historial_filtros") != filtros:
+        st.session_state.historial_filtros = filtros
+        st.session_state.historial_cursores = [None]
+    cursores = st.session_state.historial_cursores
+
+    df, siguiente = historial.pagina(usuario_id, tabla, cursores[-1], tipo=tipo, desde=desde, hasta=hasta)
+    mostrar_ultimos(tabla, df, "No hay registros con estos filtros.")
+
+    col_anterior, col_pagina, col_siguiente = st.columns([1, 2, 1])
+    with col_anterior:
+        if st.button("← Anterior", disabled=len(cursores) == 1):
+            cursores.pop()
+            recargar_seccion()
+    with col_pagina:
+        st.caption(f"Página {len(cursores)}")
+    with col_siguiente:
+        if st.button("Siguiente →", disabled=siguiente is None):
+            cursores.append(siguiente)
+            recargar_seccion()
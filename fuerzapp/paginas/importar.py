@@ -0,0 +1,55 @@
+# fuerzapp/paginas/importar.py
+###########################################################################################################################
+# Importación de historial desde CSV.
+#######################################################
+import streamlit as st
+
+from fuerzapp.datos import invalidar
+from fuerzapp.db import get_connection
+from fuerzapp.importacion import ImportacionError, importar_csv
+
+
+def mostrar(usuario_id):
+    """
+    Carga de un CSV con historial en la tabla elegida.
+    """
+    st.subheader("📥 Importar historial desde CSV")
+    st.markdown(
+        "Subí un CSV con una fila por registro. Las columnas son las de la tabla elegida "
+        "(por ejemplo `fecha, tipo, duracion, calorias, notas` para entrenamientos); "
+        "también se aceptan los nombres que muestra la app, como *Duración (min)*."
+    )
+    tablas_importables = {"Entrenamientos": "entrenamientos", "Comidas": "comidas", "Medidas": "medidas"}
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        destino = st.selectbox("¿Qué vas a importar?", list(tablas_importables))
+    with col2:
+        separador = st.selectbox("Separador", [",", ";"])
+    archivo_csv = st.file_uploader("Archivo CSV", type=["csv"])
+
+    if archivo_csv and st.button("Importar"):
+        tabla = tablas_importables[destino]
+        progreso = st.empty()
+        try:
+            with get_connection() as conn:
+                resultado = importar_csv(
+                    conn, archivo_csv, tabla, usuario_id, separador=separador,
+                    al_avanzar=lambda importadas, rechazadas: progreso.info(
+                        f"Importando... {importadas} filas cargadas, {rechazadas} rechazadas."),
+                )
+        except ImportacionError as e:
+            # Los bloques anteriores al que falló ya están confirmados
+            st.error(f"La importación se interrumpió: {e}.")
+            st.info(f"Quedaron guardados {e.importadas} registros de las líneas anteriores; "
+                    "corregí el archivo y volvé a importar solo lo que falta.")
+        except ValueError as e:
+            st.error(f"No se pudo importar el archivo: {e}")
+        else:
+            st.success(f"✅ {resultado['importadas']} registros importados.")
+            if resultado["rechazadas"]:
+                st.warning(f"Se descartaron {resultado['rechazadas']} filas con errores:")
+                st.code("\n".join(resultado["errores"]))
+        finally:
+            # Los bloques ya confirmados quedan guardados aunque uno posterior falle
+            invalidar(usuario_id, tabla)
+            progreso.empty()
@@ -0,0 +1,28 @@
+# fuerzapp/paginas/inicio.py
+###########################################################################################################################
+# Inicio: resumen con los últimos registros de cada tabla.
+#######################################################
+import streamlit as st
+
+from fuerzapp.datos import ultimos_registros
+from fuerzapp.paginas.comun import panel_ultimos
+
+
+def mostrar(usuario_id):
+    """
+    Resumen general: últimos entrenamientos, alimentos y medidas del usuario.
+    """
+    st.subheader("Resumen general")
+    # Una sola consulta trae los últimos registros de las tres tablas y los deja en la caché; cada panel los lee
+    # de ahí y, si se vuelve a dibujar solo, consulta únicamente su tabla
+    ultimos_registros(usuario_id)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Últimos entrenamientos")
+        panel_ultimos(usuario_id, "entrenamientos", "Aún no registraste entrenamientos.")
+
+    with col2:
+        st.subheader("Últimos alimentos")
+        panel_ultimos(usuario_id, "comidas", "Aún no registraste alimentos.")
+    st.subheader("Últimas medidas")
+    panel_ultimos(usuario_id, "medidas", "Aún no registraste medidas.")
@@ -0,0 +1,77 @@
+# fuerzapp/paginas/login.py
+###########################################################################################################################
+# Pantalla de inicio de sesión y registro (lo único que ve una sesión sin usuario logueado).
+# No importa pandas ni plotly.
+#######################################################
+import logging
+
+import streamlit as st
+
+from fuerzapp import sesion
+from fuerzapp.auth import registrar_usuario, validar_usuario
+from fuerzapp.datos import invalidar
+from fuerzapp.db import get_connection
+from fuerzapp.imagenes import ImagenInvalidaError, obtener_imagenes
+from fuerzapp.limites import permitir_login
+from fuerzapp.paginas.perfil import AVATAR_OPCIONES
+
+log = logging.getLogger(__name__)
+
+
+def mostrar():
+    """
+    Muestra el login o el registro. Al iniciar sesión guarda el usuario (y el token de sesión) y recarga.
+    """
+    st.title("FuerzApp - Iniciar sesión o registrarse")
+    opcion = st.radio("Seleccioná una opción", ["Iniciar sesión", "Registrarse"])
+
+    if opcion == "Iniciar sesión":
+        email = st.text_input("Email")
+        password = st.text_input("Contraseña", type="password")
+        if st.button("Iniciar sesión"):
+            permitido, espera = permitir_login(email)
+            if not permitido:
+                st.error(f"Demasiados intentos. Probá de nuevo en {int(espera) + 1} segundos.")
+                return
+            user = validar_usuario(email, password)
+            if user:
+                st.success(f"Bienvenido/a {user[1]}")
+                sesion.iniciar(user)
+                st.rerun()
+            else:
+                st.error("Credenciales incorrectas")
+
+    elif opcion == "Registrarse":
+        nombre = st.text_input("Nombre")
+        email = st.text_input("Email")
+        password = st.text_input("Contraseña", type="password")
+
+        st.markdown("### Elegí tu avatar")
+        avatar_seleccionado = st.selectbox("Seleccioná un avatar", list(AVATAR_OPCIONES.keys()))
+        avatar_url = AVATAR_OPCIONES[avatar_seleccionado]
+
+        imagen_subida = st.file_uploader("O subí tu propia foto (opcional)", type=["png", "jpg", "jpeg", "webp"])
+        if st.button("Registrarme"):
+            imagenes = obtener_imagenes()
+            if imagen_subida:
+                # Se valida la foto antes de crear el usuario: si no es una imagen válida no se registra nada
+                try:
+                    avatar_url = imagenes.subir(imagen_subida.getvalue())
+                except ImagenInvalidaError as e:
+                    st.error(f"No se pudo usar la foto: {e}")
+                    return
+            if registrar_usuario(nombre, email, password):
+                if imagen_subida and not imagenes.almacenamiento.persistente:
+                    # Advertencia: en Streamlit Cloud el disco local NO es persistente entre reinicios de la aplicación.
+                    # Para persistencia real, configurar imagenes_almacenamiento = "s3" (AWS S3, Supabase Storage, etc.)
+                    st.warning("¡Atención! La foto subida no será persistente en la nube. Se perderá al reiniciar la aplicación.")
+
+                # Guardar la ruta de la foto en la base de datos
+                with get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("UPDATE usuarios SET foto = %s WHERE email = %s RETURNING id", (avatar_url, email))
+                    nuevo_id = cursor.fetchone()[0]
+                invalidar(nuevo_id, "usuarios")
+
+                log.debug("Avatar guardado en la base", extra={"usuario_id": nuevo_id, "foto": avatar_url})
+                st.success("Registro exitoso. ¡Ahora iniciá sesión!")
@@ -0,0 +1,55 @@
+# fuerzapp/paginas/medidas.py
+###########################################################################################################################
+# Registro de medidas corporales.
+#######################################################
+from datetime import date
+
+import streamlit as st
+
+from fuerzapp import resumenes
+from fuerzapp.cola_escritura import obtener_cola
+from fuerzapp.datos import invalidar
+from fuerzapp.db import get_connection
+from fuerzapp.paginas.comun import encolar_envio, panel_ultimos
+
+
+def mostrar(usuario_id):
+    """
+    Formulario de nuevas medidas y las últimas registradas.
+    """
+    st.subheader("Nueva Medida")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader(" Registrar nueva medida")
+        with st.form("form_medidas"):
+            fecha = st.date_input("Fecha", value=date.today())
+            abdomen = st.number_input("Abdomen (cm)", min_value=40.0, max_value=200.0, value=80.0, step=0.5)
+            cintura = st.number_input("Cintura (cm)", min_value=30.0, max_value=180.0, value=75.0, step=0.5)
+            pecho = st.number_input("Pecho (cm)", min_value=60.0, max_value=220.0, value=100.0, step=0.5)
+            brazo = st.number_input("Brazo (cm)", min_value=15.0, max_value=80.0, value=30.0, step=0.1)
+            pierna = st.number_input("Pierna (cm)", min_value=30.0, max_value=120.0, value=55.0, step=0.1)
+            peso = st.number_input("Peso (kg)", min_value=30.0, max_value=300.0, value=70.0, step=0.1)
+            notas = st.text_area("Notas adicionales (opcional)")
+            enviar = st.form_submit_button("Guardar medidas")
+            if enviar:
+                cola = obtener_cola()
+                if cola is not None:
+                    # Escritura diferida: se confirma en segundo plano (ver fuerzapp.cola_escritura)
+                    encolar_envio(cola, "medidas", {"usuario_id": usuario_id, "fecha": fecha, "abdomen": abdomen, "cintura": cintura, "brazo": brazo, "pecho": pecho, "pierna": pierna, "peso": peso, "notas": notas})
+                else:
+                    with get_connection() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute("""
+                            INSERT INTO medidas (usuario_id, fecha, abdomen, cintura, brazo, pecho, pierna, peso, notas)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                            RETURNING id
+                        """, (usuario_id, fecha, abdomen, cintura, brazo, pecho, pierna, peso, notas))
+                        medida_id = cursor.fetchone()[0]
+                        resumenes.sumar_medidas(cursor, [(usuario_id, fecha, medida_id, peso)])
+                    invalidar(usuario_id, "medidas")
+                    st.success("✅ Medidas registradas.")
+
+    with col2:
+        st.subheader("🕒 Últimas medidas")
+        panel_ultimos(usuario_id, "medidas", "Aún no registraste medidas.")
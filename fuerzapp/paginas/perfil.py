@@ -0,0 +1,103 @@
+# fuerzapp/paginas/perfil.py
+###########################################################################################################################
+# Sidebar del usuario logueado: foto de perfil, cierre de sesión y cambio de foto.
+#######################################################
+import os
+
+import streamlit as st
+
+from fuerzapp import sesion
+from fuerzapp.datos import invalidar
+from fuerzapp.db import get_connection
+from fuerzapp.imagenes import ImagenInvalidaError, obtener_imagenes
+
+#######################################################
+####################################################### Avatares (adaptado para la ruta en el repo)
+#######################################################
+# Avatares predeterminados
+AVATAR_OPCIONES = {
+    "Avatar 1": "perfiles/avatar1.png",
+    "Avatar 2": "perfiles/avatar2.png",
+    "Avatar 3": "perfiles/avatar3.png"
+}
+
+# Asegurar carpeta para fotos (esto solo es relevante localmente, en Streamlit Cloud es efímero)
+os.makedirs("perfiles", exist_ok=True)
+
+
+def mostrar_perfil(usuario):
+    """
+    Muestra en el sidebar la foto y el nombre del usuario, el botón de cerrar sesión y el cambio de foto.
+    Son dos fragmentos: elegir un avatar o subir una foto no vuelve a ejecutar el resto de la app.
+    """
+    with st.sidebar:
+        _avatar(usuario)
+        _cambiar_foto(usuario)
+
+
+@st.fragment
+def _avatar(usuario):
+    nombre = usuario[1]
+    # Asegurarse de que el índice 4 exista antes de intentar acceder a él
+    foto = usuario[4] if len(usuario) > 4 and usuario[4] else None
+    col1, col2 = st.columns(2)
+    with col1:
+        # Miniatura de 100 px desde la caché en memoria (nunca la foto original)
+        miniatura = obtener_imagenes().miniatura(foto, 100)
+        if miniatura:
+            st.image(miniatura, width=100)
+        else:
+            st.info("Sin foto de perfil")
+    with col2:
+        st.markdown(f"**Bienvenido/a, {nombre}**")
+        if st.button("Cerrar sesión"):
+            sesion.cerrar()
+            st.rerun()
+
+
+@st.fragment
+def _cambiar_foto(usuario):
+    usuario_id = usuario[0]
+    imagenes = obtener_imagenes()
+    #Crea un bloque desplegable en el panel lateral para cambiar la imagen.
+    with st.expander("Cambiar foto de perfil"):
+        st.markdown("**Elegí un nuevo avatar o subí tu foto personalizada**")
+        # Selección de avatar
+        nuevo_avatar = st.selectbox("Selecciona...", list(AVATAR_OPCIONES.keys()))
+        # Mostrar previsualización del avatar seleccionado
+        vista_previa = imagenes.miniatura(AVATAR_OPCIONES[nuevo_avatar], 50)
+        if vista_previa:
+            st.image(vista_previa, width=50)
+
+        # Subida opcional de imagen personalizada
+        nueva_imagen = st.file_uploader("O subí una nueva foto", type=["png", "jpg", "jpeg", "webp"])
+
+        # Botón para actualizar
+        if st.button("Actualizar foto"):
+            nueva_ruta = None
+
+            if nueva_imagen:
+                try:
+                    nueva_ruta = imagenes.subir(nueva_imagen.getvalue())
+                except ImagenInvalidaError as e:
+                    st.error(f"No se pudo usar la foto: {e}")
+                    return
+                if not imagenes.almacenamiento.persistente:
+                    # Advertencia: en Streamlit Cloud el disco local NO es persistente entre reinicios de la aplicación.
+                    # Para persistencia real, configurar imagenes_almacenamiento = "s3" (AWS S3, Supabase Storage, etc.)
+                    st.warning("¡Atención! La foto subida no será persistente en la nube. Se perderá al reiniciar la aplicación.")
+            else:
+                nueva_ruta = AVATAR_OPCIONES[nuevo_avatar]
+
+            # Guardar nueva ruta de imagen en la base de datos
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE usuarios SET foto = %s WHERE id = %s", (nueva_ruta, usuario_id))
+            invalidar(usuario_id, "usuarios")
+
+            # Mensaje y actualización en sesión
+            st.success("Foto actualizada correctamente.")
+            # Actualiza la sesión con la nueva ruta de la foto
+            st.session_state.usuario = (usuario[0], usuario[1], usuario[2], usuario[3], nueva_ruta)
+            # Rerun completo: el avatar es otro fragmento y tiene que mostrar la foto nueva
+            st.rerun()
@@ -0,0 +1,69 @@
+# fuerzapp/paginas/progreso.py
+###########################################################################################################################
+# Progreso: rachas, carga de entrenamiento (ACWR), balance calórico y volumen semanal (ver fuerzapp.analitica).
+#######################################################
+import plotly.express as px
+import streamlit as st
+
+from fuerzapp import analitica
+
+# Zonas habituales del ACWR: por debajo de 0.8 la carga baja, entre 0.8 y 1.3 es el rango recomendado y por
+# encima de 1.5 el aumento es brusco
+ZONAS_ACWR = ((0.8, "🔵 Carga en descenso"), (1.3, "🟢 Zona óptima"), (1.5, "🟡 Carga en aumento"))
+
+
+def _zona(acwr):
+    for limite, texto in ZONAS_ACWR:
+        if acwr < limite:
+            return texto
+    return "🔴 Aumento brusco de carga"
+
+
+def mostrar(usuario_id):
+    """
+    Indicadores del día y gráficos de las últimas semanas.
+    """
+    st.subheader("📈 Progreso")
+    datos = analitica.progreso(usuario_id)
+    serie, volumen, hoy = datos["serie"], datos["volumen"], datos["hoy"]
+    if serie.empty:
+        st.info("Todavía no hay entrenamientos ni comidas para analizar.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Racha actual", f"{datos['racha_actual']} días")
+    col2.metric("Racha máxima", f"{datos['racha_maxima']} días")
+    if hoy is not None and hoy["acwr"] is not None:
+        col3.metric("ACWR (7 / 28 días)", f"{hoy['acwr']:.2f}", help="Carga aguda (media de 7 días) sobre carga crónica (media de 28 días), en minutos.")
+        col3.caption(_zona(hoy["acwr"]))
+    else:
+        col3.metric("ACWR (7 / 28 días)", "—")
+    if hoy is not None:
+        col4.metric("Balance calórico (7 días)", f"{hoy['balance_7']:+.0f} kcal/día",
+                    delta=f"{hoy['balance_7'] - hoy['balance_28']:+.0f} vs. 28 días", delta_color="off",
+                    help="Calorías consumidas menos calorías quemadas entrenando, promedio diario.")
+
+    st.markdown(f"### Volumen semanal por tipo (últimas {analitica.SEMANAS_VOLUMEN} semanas)")
+    if volumen.empty:
+        st.info("No hay entrenamientos en las últimas semanas.")
+    else:
+        fig_volumen = px.bar(volumen, x="semana", y="minutos", color="tipo",
+                             labels={"semana": "Semana", "minutos": "Minutos", "tipo": "Tipo"})
+        st.plotly_chart(fig_volumen, width="stretch")
+
+    st.markdown(f"### Carga de entrenamiento (últimos {analitica.DIAS_SERIE} días)")
+    carga = serie.melt(id_vars="fecha", value_vars=["carga_aguda", "carga_cronica"], var_name="serie", value_name="minutos")
+    carga["serie"] = carga["serie"].map({"carga_aguda": "Aguda (7 días)", "carga_cronica": "Crónica (28 días)"})
+    fig_carga = px.line(carga, x="fecha", y="minutos", color="serie",
+                        labels={"fecha": "Fecha", "minutos": "Minutos por día", "serie": ""})
+    st.plotly_chart(fig_carga, width="stretch")
+    fig_acwr = px.line(serie, x="fecha", y="acwr", labels={"fecha": "Fecha", "acwr": "ACWR"})
+    fig_acwr.add_hrect(y0=0.8, y1=1.3, fillcolor="green", opacity=0.1, line_width=0)
+    st.plotly_chart(fig_acwr, width="stretch")
+
+    st.markdown("### Balance calórico (consumidas − quemadas entrenando)")
+    balance = serie.melt(id_vars="fecha", value_vars=["balance_7", "balance_28"], var_name="serie", value_name="kcal")
+    balance["serie"] = balance["serie"].map({"balance_7": "Media de 7 días", "balance_28": "Media de 28 días"})
+    fig_balance = px.line(balance, x="fecha", y="kcal", color="serie",
+                          labels={"fecha": "Fecha", "kcal": "kcal por día", "serie": ""})
+    st.plotly_chart(fig_balance, width="stretch")
@@ -0,0 +1,132 @@
+# fuerzapp/paginas/reportes.py
+###########################################################################################################################
+# Reportes y análisis. Es la única página que importa plotly (y la que más pandas usa).
+#######################################################
+from datetime import date
+
+import plotly.express as px
+import streamlit as st
+
+from fuerzapp import reportes
+from fuerzapp.db import leer_secreto
+from fuerzapp.muestreo import MAX_PUNTOS, reducir
+
+
+def mostrar(usuario_id):
+    """
+    Gráficos de comidas, entrenamientos y medidas en el rango y la resolución elegidos.
+    """
+    st.subheader("Reportes y análisis")
+    # Los datos llegan ya agregados desde PostgreSQL, agrupados por día, semana o mes según el rango
+    primera, ultima = reportes.rango_fechas(usuario_id)
+    primera = primera or date.today()
+    ultima = ultima or date.today()
+
+    # Selector compartido de rango de fechas y resolución para todos los gráficos
+    col_rango, col_resolucion, col_puntos = st.columns([2, 1, 1])
+    with col_rango:
+        rango = st.date_input("Rango de fechas", value=(primera, ultima), min_value=primera, max_value=ultima)
+    with col_resolucion:
+        opcion_resolucion = st.selectbox("Resolución", ["Automática", "Día", "Semana", "Mes"])
+    with col_puntos:
+        max_puntos = st.number_input("Puntos por serie", min_value=20, max_value=2000, step=50,
+                                     value=int(leer_secreto("reportes_max_puntos", MAX_PUNTOS)))
+    # Mientras el usuario elige el rango, date_input devuelve una sola fecha; si borra el campo, ninguna
+    if not rango:
+        desde, hasta = primera, ultima
+    elif len(rango) == 2:
+        desde, hasta = rango[0], rango[1]
+    else:
+        desde, hasta = rango[0], ultima
+    if opcion_resolucion == "Automática":
+        resolucion = reportes.elegir_resolucion(desde, hasta)
+    else:
+        resolucion = {"Día": "dia", "Semana": "semana", "Mes": "mes"}[opcion_resolucion]
+    nombre_periodo = {"dia": "día", "semana": "semana", "mes": "mes"}[resolucion]
+
+    # Cada gráfico es un fragmento: la vista de medidas, por ejemplo, se cambia sin rehacer los otros gráficos
+    _grafico_comidas(usuario_id, desde, hasta)
+    _grafico_alimentos(usuario_id, resolucion, nombre_periodo, desde, hasta)
+    _graficos_entrenamiento(usuario_id, resolucion, nombre_periodo, desde, hasta, max_puntos)
+    _grafico_medidas(usuario_id, resolucion, desde, hasta, max_puntos)
+
+
+@st.fragment
+def _grafico_comidas(usuario_id, desde, hasta):
+    df_comidas = reportes.calorias_por_tipo_comida(usuario_id, desde, hasta)
+
+    if not df_comidas.empty:
+        st.markdown("### Calorías por tipo de comida")
+        fig_comidas = px.pie(df_comidas, names="tipo_comida", values="calorias")
+        st.plotly_chart(fig_comidas, width="stretch")
+    else:
+        st.info("No hay datos de comidas para graficar.")
+
+
+@st.fragment
+def _grafico_alimentos(usuario_id, resolucion, nombre_periodo, desde, hasta):
+    df_frecuentes = reportes.alimentos_frecuentes(usuario_id, desde, hasta)
+    if df_frecuentes is None:
+        st.info("Los reportes por alimento no están disponibles sin conexión con la base.")
+        return
+    if df_frecuentes.empty:
+        return
+
+    st.markdown("### Alimentos más registrados")
+    fig_frecuentes = px.bar(df_frecuentes, x="veces", y="alimento", orientation="h", hover_data=["calorias"],
+                            labels={"veces": "Veces", "alimento": "", "calorias": "Calorías"})
+    fig_frecuentes.update_yaxes(categoryorder="total ascending")
+    st.plotly_chart(fig_frecuentes, width="stretch")
+
+    nombres = {int(i): nombre for i, nombre in zip(df_frecuentes["alimento_id"], df_frecuentes["alimento"])}
+    alimento_id = st.selectbox("Ver un alimento", list(nombres), format_func=nombres.get)
+    df_alimento = reportes.alimento_por_periodo(usuario_id, alimento_id, resolucion, desde, hasta)
+    if df_alimento is None:
+        st.info("Los reportes por alimento no están disponibles sin conexión con la base.")
+        return
+    fig_alimento = px.bar(df_alimento, x="periodo", y="calorias", hover_data=["veces"],
+                          labels={"periodo": "Fecha", "calorias": f"Calorías por {nombre_periodo}", "veces": "Veces"})
+    st.plotly_chart(fig_alimento, width="stretch")
+
+
+@st.fragment
+def _graficos_entrenamiento(usuario_id, resolucion, nombre_periodo, desde, hasta, max_puntos):
+    df_entrenamiento = reportes.entrenamiento_por_periodo(usuario_id, resolucion, desde, hasta)
+
+    if not df_entrenamiento.empty:
+        st.markdown(f"### Evolución de duración de entrenamientos (minutos por {nombre_periodo})")
+        df_duracion = reducir(df_entrenamiento, "periodo", "duracion", max_puntos, por="tipo")
+        fig_dur = px.line(df_duracion, x="periodo", y="duracion", color="tipo", markers=True)
+        st.plotly_chart(fig_dur, width="stretch")
+
+        st.markdown(f"### Calorías quemadas por {nombre_periodo}")
+        df_calorias = reducir(df_entrenamiento, "periodo", "calorias", max_puntos, por="tipo")
+        fig_cal = px.bar(df_calorias, x="periodo", y="calorias", color="tipo")
+        st.plotly_chart(fig_cal, width="stretch")
+    else:
+        st.info("No hay datos de entrenamiento para graficar.")
+
+
+@st.fragment
+def _grafico_medidas(usuario_id, resolucion, desde, hasta, max_puntos):
+    df_medidas = reportes.medidas_por_periodo(usuario_id, resolucion, desde, hasta)
+
+    if not df_medidas.empty:
+        st.markdown("### Evolución corporal")
+        vista = st.radio("Vista", ["Paneles", "Superpuesto (% de cambio)"], horizontal=True)
+        superpuesto = vista != "Paneles"
+        # Un solo melt y una sola figura para las seis medidas (en vez de seis copias del DataFrame)
+        df_largo = reportes.medidas_en_largo(df_medidas, normalizar=superpuesto)
+        df_largo = reducir(df_largo, "periodo", "valor", max_puntos, por="medida")
+        if superpuesto:
+            fig = px.line(df_largo, x="periodo", y="valor", color="medida",
+                          labels={"valor": "% de cambio", "periodo": "Fecha", "medida": "Medida"})
+        else:
+            fig = px.line(df_largo, x="periodo", y="valor", facet_row="medida", height=180 * len(reportes.MEDIDAS),
+                          labels={"valor": "", "periodo": "Fecha"})
+            # Eje x compartido, eje y propio para cada medida
+            fig.update_yaxes(matches=None)
+            fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1].capitalize()))
+        st.plotly_chart(fig, width="stretch")
+    else:
+        st.info("No hay datos de medidas para mostrar.")
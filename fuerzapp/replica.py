@@ -0,0 +1,386 @@
+# fuerzapp/replica.py
+###########################################################################################################################
+# Réplica local de lectura en SQLite (opcional, una por proceso de la app).
+# Con replica_sqlite = "ruta/al/archivo.db" en st.secrets, un hilo copia a SQLite los entrenamientos, comidas y
+# medidas y los resúmenes diarios por tipo (fuerzapp.resumenes), y los paneles "Últimos ..." y Reportes leen del
+# disco local en lugar de ir por la red a PostgreSQL. El archivo queda entre reinicios, pero al arrancar se lo
+# considera viejo: solo se lee antes de la primera sincronización si PostgreSQL no responde (con el aviso).
+# Sincronización incremental con marcas de agua (guardadas en la misma base SQLite):
+#   - registros: por id. Cada pasada vuelve a leer los últimos SOLAPE ids, porque una transacción que tomó ids
+#     más bajos puede confirmar después que otra con ids más altos.
+#   - resúmenes: por `actualizado` (migración 6), con el mismo margen que la analítica (fuerzapp.analitica).
+#   - cada RECONCILIACION segundos se comparan cantidad y suma de ids por ventanas de VENTANA ids; solo en las
+#     ventanas que difieren se leen los ids, se borran las filas locales que ya no están en PostgreSQL y se traen
+#     las que falten. Los resúmenes se comparan por cantidad de filas y, si difieren, se vuelven a copiar.
+# Política de conflictos:
+#   - PostgreSQL es la fuente de verdad. La app nunca escribe en la réplica: solo la sincronización, y una fila
+#     con el mismo id (o clave) siempre se reemplaza por la versión de PostgreSQL.
+#   - Las escrituras van a PostgreSQL; con la réplica activada pasan por la cola de escritura diferida
+#     (fuerzapp.cola_escritura), que las guarda en su WAL y las reintenta mientras la base no responde.
+#   - Leer lo propio: después de una escritura (datos.invalidar) el usuario y la tabla se leen de PostgreSQL hasta
+#     que termine una sincronización que empezó después de esa escritura.
+#   - Sin conexión con PostgreSQL se lee la réplica aunque esté atrasada, y la app lo avisa en el sidebar. Lo que
+#     la réplica no copia (rol, tema, catálogo de alimentos) se lee con leer_postgres, que sigue sin esos datos.
+#######################################################
+import logging
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+
+import psycopg2
+import streamlit as st
+from psycopg2 import sql
+
+from fuerzapp.cache import obtener_cache
+from fuerzapp.datos import ESQUEMAS
+from fuerzapp.db import detener_sin_conexion, leer_secreto, obtener_pool
+
+log = logging.getLogger(__name__)
+
+# Valores por defecto, configurables desde st.secrets
+INTERVALO = 5           # segundos entre sincronizaciones
+LOTE = 5000             # filas por lectura
+SOLAPE = 1000           # ids que se vuelven a leer en cada pasada
+RECONCILIACION = 3600   # segundos entre comparaciones completas
+VENTANA = 10000         # ids por ventana al reconciliar
+REINTENTO_MAXIMO = 60   # segundos entre reintentos sin conexión (se duplica desde INTERVALO)
+MARGEN_MARCA = timedelta(minutes=5)
+SINCRONIZADA = "_sincronizada_en"   # fila de replica_marcas con el time.time() de la última sincronización
+
+# Tablas de resumen: columnas de la clave, columnas de datos y tabla de registros de la que dependen
+RESUMENES = {
+    "resumen_diario_entrenamiento": (("usuario_id", "fecha", "tipo"), ("minutos", "calorias", "sesiones"), "entrenamientos"),
+    "resumen_diario_comida": (("usuario_id", "fecha", "tipo_comida"), ("calorias", "registros"), "comidas"),
+}
+
+
+def _columnas(tabla):
+    if tabla in RESUMENES:
+        clave, datos, _ = RESUMENES[tabla]
+        return [*clave, *datos, "actualizado"]
+    return ["id", "usuario_id", *ESQUEMAS[tabla]]
+
+
+def _ddl():
+    tipos = {"datetime64[ns]": "TEXT", "string": "TEXT", "Int64": "INTEGER", "Float64": "REAL"}
+    sentencias = ["CREATE TABLE IF NOT EXISTS replica_marcas (tabla TEXT PRIMARY KEY, marca TEXT NOT NULL)"]
+    for tabla, esquema in ESQUEMAS.items():
+        columnas = ", ".join(f"{c} {tipos[t]}" for c, (t, _) in esquema.items())
+        sentencias.append(f"CREATE TABLE IF NOT EXISTS {tabla} (id INTEGER PRIMARY KEY, usuario_id INTEGER NOT NULL, {columnas})")
+        sentencias.append(f"CREATE INDEX IF NOT EXISTS {tabla}_usuario_fecha_idx ON {tabla} (usuario_id, fecha)")
+    for tabla, (clave, datos, _) in RESUMENES.items():
+        columnas = ", ".join(f"{c} INTEGER" for c in datos)
+        sentencias.append(f"""
+            CREATE TABLE IF NOT EXISTS {tabla} (
+                usuario_id INTEGER NOT NULL, fecha TEXT NOT NULL, {clave[2]} TEXT NOT NULL, {columnas},
+                actualizado TEXT NOT NULL, PRIMARY KEY ({", ".join(clave)})
+            )
+        """)
+    return sentencias
+
+
+def _a_sqlite(valor):
+    # fechas y timestamps como texto ISO (se comparan bien como texto y pandas los lee)
+    return valor.isoformat() if hasattr(valor, "isoformat") else valor
+
+
+class Replica:
+    """
+    Copia local de lectura con un hilo de sincronización. Cada hilo que lee usa su propia conexión SQLite
+    (modo WAL: las lecturas no esperan a la sincronización).
+    """
+
+    def __init__(self, ruta, obtener_pool, al_cambiar=None, intervalo=INTERVALO, lote=LOTE,
+                 reconciliacion=RECONCILIACION):
+        self.ruta = ruta
+        self.obtener_pool = obtener_pool
+        self.al_cambiar = al_cambiar
+        self.intervalo = intervalo
+        self.lote = lote
+        self.reconciliacion = reconciliacion
+        self.conectada = True
+        self.sincronizada_en = None       # time.time() de la última sincronización completa (de este u otro proceso)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._sucias = {}                 # (usuario_id, tabla) -> generación de la escritura
+        self._despertar = threading.Event()
+        self._reconciliada_en = None   # time.monotonic() de la última reconciliación
+        conn = self._conexion()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            for sentencia in _ddl():
+                conn.execute(sentencia)
+        # Lo que quedó en el archivo de una ejecución anterior solo se lee sin conexión, hasta la primera sincronización
+        self._iniciada = False
+        self._con_datos = conn.execute("SELECT COUNT(*) FROM replica_marcas").fetchone()[0] > 0
+        fila = conn.execute("SELECT marca FROM replica_marcas WHERE tabla = ?", (SINCRONIZADA,)).fetchone()
+        if fila is not None:
+            self.sincronizada_en = float(fila[0])
+        self._hilo = threading.Thread(target=self._trabajar, name="replica-sqlite", daemon=True)
+        self._hilo.start()
+
+    def _conexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.ruta, timeout=30)
+        return conn
+
+    #######################################################
+    # Lectura
+    #######################################################
+    def marcar(self, usuario_id, tabla):
+        """
+        Hubo una escritura de `tabla` del usuario: se lee de PostgreSQL hasta la próxima sincronización.
+        """
+        if tabla not in ESQUEMAS:
+            return
+        with self._lock:
+            self._generacion += 1
+            self._sucias[(usuario_id, tabla)] = self._generacion
+        self._despertar.set()
+
+    def puede_leer(self, usuario_id, tablas):
+        """
+        True si las `tablas` del usuario se pueden leer de la réplica.
+        """
+        if not self.conectada:
+            return self._con_datos
+        if not self._iniciada:
+            return False
+        with self._lock:
+            return not any((usuario_id, tabla) in self._sucias for tabla in tablas)
+
+    def leer(self, consulta, parametros=()):
+        """
+        Ejecuta una consulta de lectura en la réplica y devuelve las filas.
+        """
+        return self._conexion().execute(consulta, parametros).fetchall()
+
+    #######################################################
+    # Sincronización
+    #######################################################
+    def _trabajar(self):
+        espera = self.intervalo
+        while True:
+            try:
+                self.sincronizar()
+                if not self.conectada:
+                    log.info("Réplica: conexión con PostgreSQL recuperada")
+                self.conectada = True
+                espera = self.intervalo
+            except psycopg2.Error as e:
+                if self.conectada:
+                    log.warning("Réplica: sin conexión con PostgreSQL, se leen los datos locales",
+                                extra={"error": str(e).strip()})
+                self.conectada = False
+                espera = min(espera * 2, REINTENTO_MAXIMO)
+            except Exception:
+                log.exception("Réplica: error al sincronizar")
+                espera = min(espera * 2, REINTENTO_MAXIMO)
+            self._despertar.wait(espera)
+            self._despertar.clear()
+
+    def sincronizar(self):
+        """
+        Una pasada de sincronización. Devuelve el conjunto de (usuario_id, tabla) que cambiaron.
+        """
+        with self._lock:
+            generacion = self._generacion
+        pool = self.obtener_pool()
+        pg = pool.obtener()
+        cambios = set()
+        try:
+            cursor = pg.cursor()
+            local = self._conexion()
+            with local:
+                for tabla in ESQUEMAS:
+                    cambios |= self._copiar_registros(cursor, local, tabla)
+                for tabla in RESUMENES:
+                    cambios |= self._copiar_resumen(cursor, local, tabla)
+                if self._reconciliada_en is None or time.monotonic() - self._reconciliada_en >= self.reconciliacion:
+                    for tabla in (*ESQUEMAS, *RESUMENES):
+                        cambios |= self._reconciliar(cursor, local, tabla)
+                    self._reconciliada_en = time.monotonic()
+                ahora = time.time()
+                local.execute("INSERT OR REPLACE INTO replica_marcas (tabla, marca) VALUES (?, ?)", (SINCRONIZADA, str(ahora)))
+            pg.commit()
+        finally:
+            pool.devolver(pg)
+        self._iniciada = self._con_datos = True
+        self.sincronizada_en = ahora
+        # Las escrituras anteriores a esta pasada ya están en la réplica
+        with self._lock:
+            self._sucias = {clave: g for clave, g in self._sucias.items() if g > generacion}
+        if self.al_cambiar:
+            for usuario_id, tabla in cambios:
+                self.al_cambiar(usuario_id, tabla)
+        if cambios:
+            log.debug("Réplica sincronizada", extra={"cambios": len(cambios)})
+        return cambios
+
+    def _marca(self, local, tabla):
+        fila = local.execute("SELECT marca FROM replica_marcas WHERE tabla = ?", (tabla,)).fetchone()
+        return fila[0] if fila else None
+
+    def _guardar(self, local, tabla, filas):
+        columnas = _columnas(tabla)
+        local.executemany(
+            f"INSERT OR REPLACE INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})",
+            [tuple(_a_sqlite(v) for v in fila) for fila in filas])
+
+    def _copiar_registros(self, cursor, local, tabla):
+        marca = int(self._marca(local, tabla) or 0)
+        desde = max(marca - SOLAPE, 0)
+        consulta = sql.SQL("SELECT {columnas} FROM {tabla} WHERE id > %s ORDER BY id LIMIT %s").format(
+            columnas=sql.SQL(", ").join(sql.Identifier(c) for c in _columnas(tabla)), tabla=sql.Identifier(tabla))
+        cambios = set()
+        while True:
+            cursor.execute(consulta, (desde, self.lote))
+            filas = cursor.fetchall()
+            # Solo cuentan como cambio las filas nuevas: las del solape ya estaban
+            cambios.update((fila[1], tabla) for fila in filas if fila[0] > marca)
+            self._guardar(local, tabla, filas)
+            if filas:
+                desde = filas[-1][0]
+                marca = max(marca, desde)
+            if len(filas) < self.lote:
+                break
+        local.execute("INSERT OR REPLACE INTO replica_marcas (tabla, marca) VALUES (?, ?)", (tabla, str(marca)))
+        return cambios
+
+    def _copiar_resumen(self, cursor, local, tabla):
+        marca = self._marca(local, tabla)
+        consulta = sql.SQL("""
+            SELECT {columnas} FROM {tabla}
+            WHERE actualizado > COALESCE(%s::timestamptz, '-infinity')
+        """).format(columnas=sql.SQL(", ").join(sql.Identifier(c) for c in _columnas(tabla)),
+                    tabla=sql.Identifier(tabla))
+        cursor.execute(consulta, (marca,))
+        clave, datos, dependiente = RESUMENES[tabla]
+        # Las filas del margen se vuelven a leer en cada pasada: solo cuentan como cambio las que no estaban así
+        guardar = f"""
+            INSERT INTO {tabla} ({", ".join(_columnas(tabla))}) VALUES ({", ".join("?" * len(_columnas(tabla)))})
+            ON CONFLICT ({", ".join(clave)}) DO UPDATE SET
+                {", ".join(f"{c} = excluded.{c}" for c in (*datos, "actualizado"))}
+            WHERE {tabla}.actualizado <> excluded.actualizado
+        """
+        cambios = set()
+        for fila in cursor.fetchall():
+            if local.execute(guardar, tuple(_a_sqlite(v) for v in fila)).rowcount:
+                cambios.add((fila[0], dependiente))
+        # Como en la analítica: la marca no pasa de ahora menos el margen (transacciones que confirman tarde)
+        cursor.execute(sql.SQL("SELECT LEAST(MAX(actualizado), now() - %s) FROM {}").format(sql.Identifier(tabla)),
+                       (MARGEN_MARCA,))
+        nueva = cursor.fetchone()[0]
+        if nueva is not None and (marca is None or nueva.isoformat() > marca):
+            local.execute("INSERT OR REPLACE INTO replica_marcas (tabla, marca) VALUES (?, ?)", (tabla, nueva.isoformat()))
+        return cambios
+
+    def _reconciliar(self, cursor, local, tabla):
+        if tabla in RESUMENES:
+            cursor.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(tabla)))
+            if local.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0] == cursor.fetchone()[0]:
+                return set()
+            log.info("Réplica: reconciliando tabla", extra={"tabla": tabla})
+            # Los resúmenes son chicos (una fila por usuario, día y tipo): se vuelven a copiar enteros
+            dependiente = RESUMENES[tabla][2]
+            cambios = {(fila[0], dependiente) for fila in local.execute(f"SELECT DISTINCT usuario_id FROM {tabla}")}
+            local.execute(f"DELETE FROM {tabla}")
+            local.execute("DELETE FROM replica_marcas WHERE tabla = ?", (tabla,))
+            return cambios | self._copiar_resumen(cursor, local, tabla)
+        # Cantidad y suma de ids por ventana (una pasada por el índice de la clave primaria de cada lado): solo se
+        # leen los ids de las ventanas que no coinciden
+        cursor.execute(sql.SQL("SELECT id / %s, COUNT(*), SUM(id) FROM {} GROUP BY 1").format(sql.Identifier(tabla)),
+                       (VENTANA,))
+        remotas = {v: (n, suma) for v, n, suma in cursor.fetchall()}
+        locales = {v: (n, suma) for v, n, suma in
+                   local.execute(f"SELECT id / ?, COUNT(*), SUM(id) FROM {tabla} GROUP BY 1", (VENTANA,))}
+        distintas = sorted(v for v in remotas.keys() | locales.keys() if remotas.get(v) != locales.get(v))
+        if not distintas:
+            return set()
+        log.info("Réplica: reconciliando tabla", extra={"tabla": tabla, "ventanas": len(distintas)})
+        ids = sql.SQL("SELECT id FROM {} WHERE id >= %s AND id < %s").format(sql.Identifier(tabla))
+        consulta = sql.SQL("SELECT {columnas} FROM {tabla} WHERE id = ANY(%s)").format(
+            columnas=sql.SQL(", ").join(sql.Identifier(c) for c in _columnas(tabla)), tabla=sql.Identifier(tabla))
+        cambios = set()
+        for ventana in distintas:
+            desde, hasta = ventana * VENTANA, (ventana + 1) * VENTANA
+            cursor.execute(ids, (desde, hasta))
+            en_postgres = {fila[0] for fila in cursor.fetchall()}
+            en_replica = dict(local.execute(f"SELECT id, usuario_id FROM {tabla} WHERE id >= ? AND id < ?",
+                                            (desde, hasta)).fetchall())
+            sobrantes = [i for i in en_replica if i not in en_postgres]
+            faltantes = sorted(en_postgres - en_replica.keys())
+            local.executemany(f"DELETE FROM {tabla} WHERE id = ?", [(i,) for i in sobrantes])
+            cambios.update((en_replica[i], tabla) for i in sobrantes)
+            for inicio in range(0, len(faltantes), self.lote):
+                cursor.execute(consulta, (faltantes[inicio:inicio + self.lote],))
+                filas = cursor.fetchall()
+                self._guardar(local, tabla, filas)
+                cambios.update((fila[1], tabla) for fila in filas)
+        return cambios
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_replica():
+    """
+    Réplica única por proceso, o None si replica_sqlite no está definido en st.secrets.
+    """
+    ruta = leer_secreto("replica_sqlite", "")
+    if not ruta:
+        return None
+    log.info("Réplica SQLite activada", extra={"ruta": ruta})
+    return Replica(
+        ruta,
+        obtener_pool,
+        al_cambiar=obtener_cache().invalidar,
+        intervalo=float(leer_secreto("replica_intervalo", INTERVALO)),
+        lote=int(leer_secreto("replica_lote", LOTE)),
+        reconciliacion=float(leer_secreto("replica_reconciliacion", RECONCILIACION)),
+    )
+
+
+def leer(usuario_id, tablas, consulta, parametros=()):
+    """
+    Filas de `consulta` (SQL de SQLite) leídas de la réplica, o None si hay que leer de PostgreSQL
+    (réplica desactivada, sin sincronizar desde que arrancó el proceso, o con escrituras del usuario en `tablas`
+    sin sincronizar).
+    """
+    replica = obtener_replica()
+    if replica is None or not replica.puede_leer(usuario_id, tablas):
+        return None
+    return replica.leer(consulta, parametros)
+
+
+def leer_postgres(calcular, defecto=None):
+    """
+    calcular() para lecturas en PostgreSQL de datos que la réplica no copia. Con la réplica activada y sin conexión
+    devuelve `defecto` en lugar de detener la página; calcular debe usar get_connection(detener=False).
+    Sin réplica, un error de conexión detiene la página como en get_connection.
+    """
+    replica = obtener_replica()
+    if replica is not None and not replica.conectada:
+        return defecto
+    try:
+        return calcular()
+    except psycopg2.OperationalError as e:
+        if replica is None:
+            detener_sin_conexion(e)
+        log.warning("Réplica: lectura en PostgreSQL sin respuesta, se sigue sin esos datos", extra={"error": str(e).strip()})
+        # Que la sincronización confirme ya si se perdió la conexión (y active la lectura local)
+        replica._despertar.set()
+        return defecto
+
+
+def aviso_sin_conexion():
+    """
+    Avisa en el sidebar si se están mostrando datos locales porque PostgreSQL no responde.
+    """
+    replica = obtener_replica()
+    if replica is not None and not replica.conectada:
+        desde = "" if replica.sincronizada_en is None else \
+            f" (sincronizados hace {int(time.time() - replica.sincronizada_en) // 60} min)"
+        st.sidebar.warning(f"⚠️ Sin conexión con la base: se muestran los datos locales{desde}. "
+                           "Lo que registres se guarda al volver la conexión.")
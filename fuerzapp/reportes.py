@@ -0,0 +1,273 @@
+# fuerzapp/reportes.py
+###########################################################################################################################
+# Consultas agregadas para la página de Reportes.
+# En lugar de traer todo el historial del usuario y agregarlo en pandas/Plotly, el GROUP BY y el agrupado
+# por período (día, semana o mes, según lo largo del rango) se hacen en PostgreSQL: cada gráfico recibe
+# O(períodos) filas en vez de O(historial).
+# Calorías y entrenamientos se leen de los resúmenes diarios (fuerzapp.resumenes), que ya tienen una fila por día;
+# las medidas, mucho menos frecuentes, se agregan directamente desde la tabla medidas.
+# Los reportes por alimento agrupan por alimento_id (fuerzapp.alimentos), no por el texto que escribió el usuario.
+# Con la réplica local activada (fuerzapp.replica) las mismas agregaciones se hacen en SQLite; los reportes por
+# alimento siguen yendo a PostgreSQL (el catálogo no se replica) y sin conexión devuelven None.
+#######################################################
+from datetime import date
+
+import pandas as pd
+from psycopg2 import sql
+
+from fuerzapp import replica
+from fuerzapp.cache import obtener_cache
+from fuerzapp.db import get_connection
+
+# Resoluciones disponibles y su unidad para date_trunc de PostgreSQL
+RESOLUCIONES = {"dia": "day", "semana": "week", "mes": "month"}
+# El mismo truncado en SQLite (la semana empieza el lunes, como en date_trunc)
+PERIODOS_SQLITE = {
+    "dia": "fecha",
+    "semana": "date(fecha, '-' || ((CAST(strftime('%w', fecha) AS INTEGER) + 6) % 7) || ' days')",
+    "mes": "strftime('%Y-%m-01', fecha)",
+}
+# Largo aproximado de cada resolución en días, para elegir la más fina que no exceda MAX_PERIODOS
+DIAS_POR_PERIODO = {"dia": 1, "semana": 7, "mes": 30}
+MAX_PERIODOS = 120
+
+MEDIDAS = ("abdomen", "cintura", "pecho", "brazo", "pierna", "peso")
+
+
+def elegir_resolucion(desde, hasta, max_periodos=MAX_PERIODOS):
+    """
+    Devuelve la resolución más fina ("dia", "semana" o "mes") con la que el rango no supera `max_periodos` puntos.
+    """
+    if desde is None or hasta is None:
+        return "dia"
+    dias = (hasta - desde).days + 1
+    for resolucion in ("dia", "semana"):
+        if dias / DIAS_POR_PERIODO[resolucion] <= max_periodos:
+            return resolucion
+    return "mes"
+
+
+def _filtro_fechas(desde, hasta):
+    """
+    Condiciones extra de fecha para el WHERE (solo las que tienen valor, para no confundir al planificador).
+    """
+    condiciones = sql.SQL("")
+    if desde is not None:
+        condiciones += sql.SQL(" AND fecha >= %(desde)s")
+    if hasta is not None:
+        condiciones += sql.SQL(" AND fecha <= %(hasta)s")
+    return condiciones
+
+
+def _filtro_fechas_local(desde, hasta):
+    # Igual que _filtro_fechas, para la réplica SQLite
+    return (" AND fecha >= :desde" if desde is not None else "") + (" AND fecha <= :hasta" if hasta is not None else "")
+
+
+def _consultar(consulta, parametros, columnas, local=None, tablas=(), detener=True):
+    """
+    Ejecuta `consulta` en PostgreSQL, o `local` (la misma consulta en SQL de SQLite) en la réplica si está al día
+    para el usuario y las `tablas` de las que depende. `detener` se pasa a get_connection.
+    """
+    if local is not None:
+        filas = replica.leer(parametros["usuario_id"], tablas, local,
+                             {k: v.isoformat() if isinstance(v, date) else v for k, v in parametros.items()})
+        if filas is not None:
+            return pd.DataFrame.from_records(filas, columns=columnas)
+    with get_connection(detener=detener) as conn:
+        cursor = conn.cursor()
+        cursor.execute(consulta, parametros)
+        filas = cursor.fetchall()
+    return pd.DataFrame.from_records(filas, columns=columnas)
+
+
+def rango_fechas(usuario_id):
+    """
+    Primera y última fecha con registros del usuario en cualquiera de las tablas, o (None, None).
+    """
+    def consultar():
+        filas = replica.leer(usuario_id, tablas, """
+            SELECT MIN(desde), MAX(hasta) FROM (
+                SELECT MIN(fecha) AS desde, MAX(fecha) AS hasta FROM entrenamientos WHERE usuario_id = :u
+                UNION ALL
+                SELECT MIN(fecha), MAX(fecha) FROM comidas WHERE usuario_id = :u
+                UNION ALL
+                SELECT MIN(fecha), MAX(fecha) FROM medidas WHERE usuario_id = :u
+            )
+        """, {"u": usuario_id})
+        if filas is not None:
+            return tuple(None if f is None else date.fromisoformat(f) for f in filas[0])
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT MIN(desde), MAX(hasta) FROM (
+                    SELECT MIN(fecha) AS desde, MAX(fecha) AS hasta FROM entrenamientos WHERE usuario_id = %(u)s
+                    UNION ALL
+                    SELECT MIN(fecha), MAX(fecha) FROM comidas WHERE usuario_id = %(u)s
+                    UNION ALL
+                    SELECT MIN(fecha), MAX(fecha) FROM medidas WHERE usuario_id = %(u)s
+                ) r
+            """, {"u": usuario_id})
+            return cursor.fetchone()
+
+    # Depende de las tres tablas: se guarda bajo cada una para que cualquier escritura lo invalide
+    cache = obtener_cache()
+    tablas = ("entrenamientos", "comidas", "medidas")
+    encontrados = [cache.obtener(usuario_id, tabla, ("rango",)) for tabla in tablas]
+    if all(encontrado for encontrado, _ in encontrados):
+        return encontrados[0][1]
+    rango = consultar()
+    for tabla in tablas:
+        cache.guardar(usuario_id, tabla, ("rango",), rango)
+    return rango
+
+
+def calorias_por_tipo_comida(usuario_id, desde=None, hasta=None):
+    """
+    Total de calorías consumidas por tipo de comida en el rango.
+    """
+    def consultar():
+        consulta = sql.SQL("""
+            SELECT tipo_comida, SUM(calorias) AS calorias
+            FROM resumen_diario_comida
+            WHERE usuario_id = %(usuario_id)s{filtro}
+            GROUP BY tipo_comida
+            ORDER BY calorias DESC
+        """).format(filtro=_filtro_fechas(desde, hasta))
+        local = f"""
+            SELECT tipo_comida, SUM(calorias) AS calorias
+            FROM resumen_diario_comida
+            WHERE usuario_id = :usuario_id{_filtro_fechas_local(desde, hasta)}
+            GROUP BY tipo_comida
+            ORDER BY calorias DESC
+        """
+        df = _consultar(consulta, {"usuario_id": usuario_id, "desde": desde, "hasta": hasta}, ["tipo_comida", "calorias"],
+                        local, ("comidas",))
+        return df.astype({"tipo_comida": "string", "calorias": "float64"})
+
+    forma = ("calorias_por_tipo", desde, hasta)
+    return obtener_cache().obtener_o_calcular(usuario_id, "comidas", forma, consultar)
+
+
+def alimentos_frecuentes(usuario_id, desde=None, hasta=None, limite=10):
+    """
+    Los `limite` alimentos del catálogo registrados más veces en el rango, con sus calorías totales
+    (None si la base no responde).
+    """
+    def consultar():
+        consulta = sql.SQL("""
+            SELECT a.id, a.nombre, c.veces, c.calorias
+            FROM (
+                SELECT alimento_id, COUNT(*) AS veces, SUM(calorias) AS calorias
+                FROM comidas
+                WHERE usuario_id = %(usuario_id)s AND alimento_id IS NOT NULL{filtro}
+                GROUP BY alimento_id
+                ORDER BY veces DESC, calorias DESC
+                LIMIT %(limite)s
+            ) c
+            JOIN alimentos a ON a.id = c.alimento_id
+            ORDER BY c.veces DESC, c.calorias DESC
+        """).format(filtro=_filtro_fechas(desde, hasta))
+        df = _consultar(consulta, {"usuario_id": usuario_id, "desde": desde, "hasta": hasta, "limite": limite},
+                        ["alimento_id", "alimento", "veces", "calorias"], detener=False)
+        return df.astype({"alimento": "string", "veces": "int64", "calorias": "float64"})
+
+    forma = ("alimentos_frecuentes", desde, hasta, limite)
+    return replica.leer_postgres(lambda: obtener_cache().obtener_o_calcular(usuario_id, "comidas", forma, consultar))
+
+
+def alimento_por_periodo(usuario_id, alimento_id, resolucion, desde=None, hasta=None):
+    """
+    Veces y calorías de un alimento por período (recorre el índice (usuario_id, alimento_id, fecha)); None si la
+    base no responde.
+    """
+    def consultar():
+        consulta = sql.SQL("""
+            SELECT date_trunc({unidad}, fecha)::date AS periodo, COUNT(*) AS veces, SUM(calorias) AS calorias
+            FROM comidas
+            WHERE usuario_id = %(usuario_id)s AND alimento_id = %(alimento_id)s{filtro}
+            GROUP BY periodo
+            ORDER BY periodo
+        """).format(unidad=sql.Literal(RESOLUCIONES[resolucion]), filtro=_filtro_fechas(desde, hasta))
+        df = _consultar(consulta, {"usuario_id": usuario_id, "alimento_id": alimento_id, "desde": desde, "hasta": hasta},
+                        ["periodo", "veces", "calorias"], detener=False)
+        df["periodo"] = pd.to_datetime(df["periodo"])
+        return df.astype({"veces": "int64", "calorias": "float64"})
+
+    forma = ("alimento_por_periodo", alimento_id, resolucion, desde, hasta)
+    return replica.leer_postgres(lambda: obtener_cache().obtener_o_calcular(usuario_id, "comidas", forma, consultar))
+
+
+def entrenamiento_por_periodo(usuario_id, resolucion, desde=None, hasta=None):
+    """
+    Minutos y calorías quemadas por período y tipo de entrenamiento.
+    """
+    def consultar():
+        consulta = sql.SQL("""
+            SELECT date_trunc({unidad}, fecha)::date AS periodo, tipo,
+                   SUM(minutos) AS duracion, SUM(calorias) AS calorias, SUM(sesiones) AS sesiones
+            FROM resumen_diario_entrenamiento
+            WHERE usuario_id = %(usuario_id)s{filtro}
+            GROUP BY periodo, tipo
+            ORDER BY periodo, tipo
+        """).format(unidad=sql.Literal(RESOLUCIONES[resolucion]), filtro=_filtro_fechas(desde, hasta))
+        local = f"""
+            SELECT {PERIODOS_SQLITE[resolucion]} AS periodo, tipo,
+                   SUM(minutos) AS duracion, SUM(calorias) AS calorias, SUM(sesiones) AS sesiones
+            FROM resumen_diario_entrenamiento
+            WHERE usuario_id = :usuario_id{_filtro_fechas_local(desde, hasta)}
+            GROUP BY periodo, tipo
+            ORDER BY periodo, tipo
+        """
+        df = _consultar(consulta, {"usuario_id": usuario_id, "desde": desde, "hasta": hasta},
+                        ["periodo", "tipo", "duracion", "calorias", "sesiones"], local, ("entrenamientos",))
+        df["periodo"] = pd.to_datetime(df["periodo"])
+        return df.astype({"tipo": "string", "duracion": "float64", "calorias": "float64", "sesiones": "int64"})
+
+    forma = ("por_periodo", resolucion, desde, hasta)
+    return obtener_cache().obtener_o_calcular(usuario_id, "entrenamientos", forma, consultar)
+
+
+def medidas_por_periodo(usuario_id, resolucion, desde=None, hasta=None):
+    """
+    Promedio de cada medida corporal por período.
+    """
+    def consultar():
+        promedios = sql.SQL(", ").join(
+            sql.SQL("AVG({col}) AS {col}").format(col=sql.Identifier(m)) for m in MEDIDAS
+        )
+        consulta = sql.SQL("""
+            SELECT date_trunc({unidad}, fecha)::date AS periodo, {promedios}
+            FROM medidas
+            WHERE usuario_id = %(usuario_id)s{filtro}
+            GROUP BY periodo
+            ORDER BY periodo
+        """).format(unidad=sql.Literal(RESOLUCIONES[resolucion]), promedios=promedios,
+                    filtro=_filtro_fechas(desde, hasta))
+        local = f"""
+            SELECT {PERIODOS_SQLITE[resolucion]} AS periodo, {", ".join(f"AVG({m}) AS {m}" for m in MEDIDAS)}
+            FROM medidas
+            WHERE usuario_id = :usuario_id{_filtro_fechas_local(desde, hasta)}
+            GROUP BY periodo
+            ORDER BY periodo
+        """
+        df = _consultar(consulta, {"usuario_id": usuario_id, "desde": desde, "hasta": hasta}, ["periodo", *MEDIDAS],
+                        local, ("medidas",))
+        df["periodo"] = pd.to_datetime(df["periodo"])
+        return df.astype({m: "float64" for m in MEDIDAS})
+
+    forma = ("por_periodo", resolucion, desde, hasta)
+    return obtener_cache().obtener_o_calcular(usuario_id, "medidas", forma, consultar)
+
+
+def medidas_en_largo(df_medidas, normalizar=False):
+    """
+    Pasa las medidas por período a formato largo (periodo, medida, valor) con un solo melt.
+    Con `normalizar`, el valor es el % de cambio respecto del primer dato de cada medida en el rango.
+    """
+    largo = df_medidas.melt(id_vars="periodo", value_vars=list(MEDIDAS), var_name="medida", value_name="valor")
+    largo = largo.dropna(subset=["valor"])
+    if normalizar:
+        base = largo.groupby("medida", sort=False)["valor"].transform("first")
+        largo["valor"] = (largo["valor"] / base - 1) * 100
+    return largo
@@ -0,0 +1,204 @@
+# fuerzapp/resumenes.py
+###########################################################################################################################
+# Tablas de resumen diario por usuario (rollups), mantenidas de forma incremental.
+#   resumen_diario               -> calorías consumidas/quemadas, minutos de entrenamiento, sesiones y último peso del día
+#   resumen_diario_entrenamiento -> minutos, calorías y sesiones por tipo de entrenamiento
+#   resumen_diario_comida        -> calorías y registros por tipo de comida
+# Cada inserción en entrenamientos/comidas/medidas debe llamar a la función sumar_* correspondiente con el mismo
+# cursor, para que el resumen se actualice en la misma transacción. Reportes lee estas tablas (unas pocas filas por día)
+# en lugar de recorrer los registros crudos.
+# Cada fila lleva `actualizado` (migración 6), que se renueva en cada cambio: la analítica (fuerzapp.analitica) lo usa
+# como marca de agua para recalcular solo los días que cambiaron.
+#
+# Reconstrucción completa desde los datos crudos:
+#   FUERZAPP_DB_URL=postgresql://... python -m fuerzapp.resumenes [--usuario ID]
+#######################################################
+import argparse
+from collections import defaultdict
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from fuerzapp.db import cadena_conexion
+
+TABLAS_RESUMEN = ("resumen_diario", "resumen_diario_entrenamiento", "resumen_diario_comida")
+
+# Las tablas las crea la migración 2 de fuerzapp.migraciones
+
+
+#######################################################
+####################################################### Actualización incremental
+#######################################################
+def _sumar(grupos, clave, valores):
+    acumulado = grupos[clave]
+    for i, valor in enumerate(valores):
+        acumulado[i] += valor or 0
+
+
+def sumar_entrenamientos(cursor, filas):
+    """
+    Suma al resumen los entrenamientos recién insertados.
+    `filas`: iterable de (usuario_id, fecha, tipo, duracion, calorias).
+    """
+    por_tipo = defaultdict(lambda: [0, 0, 0])
+    por_dia = defaultdict(lambda: [0, 0, 0])
+    for usuario_id, fecha, tipo, duracion, calorias in filas:
+        _sumar(por_tipo, (usuario_id, fecha, tipo), (duracion, calorias, 1))
+        _sumar(por_dia, (usuario_id, fecha), (duracion, calorias, 1))
+    if not por_dia:
+        return
+    # Claves ordenadas: dos transacciones que actualizan los mismos días toman los bloqueos en el mismo orden
+    execute_values(cursor, """
+        INSERT INTO resumen_diario_entrenamiento (usuario_id, fecha, tipo, minutos, calorias, sesiones)
+        VALUES %s
+        ON CONFLICT (usuario_id, fecha, tipo) DO UPDATE SET
+            minutos = resumen_diario_entrenamiento.minutos + EXCLUDED.minutos,
+            calorias = resumen_diario_entrenamiento.calorias + EXCLUDED.calorias,
+            sesiones = resumen_diario_entrenamiento.sesiones + EXCLUDED.sesiones,
+            actualizado = now()
+    """, [(*clave, *valores) for clave, valores in sorted(por_tipo.items())])
+    execute_values(cursor, """
+        INSERT INTO resumen_diario (usuario_id, fecha, minutos_entrenamiento, calorias_quemadas, sesiones)
+        VALUES %s
+        ON CONFLICT (usuario_id, fecha) DO UPDATE SET
+            minutos_entrenamiento = resumen_diario.minutos_entrenamiento + EXCLUDED.minutos_entrenamiento,
+            calorias_quemadas = resumen_diario.calorias_quemadas + EXCLUDED.calorias_quemadas,
+            sesiones = resumen_diario.sesiones + EXCLUDED.sesiones,
+            actualizado = now()
+    """, [(*clave, *valores) for clave, valores in sorted(por_dia.items())])
+
+
+def sumar_comidas(cursor, filas):
+    """
+    Suma al resumen las comidas recién insertadas.
+    `filas`: iterable de (usuario_id, fecha, tipo_comida, calorias).
+    """
+    por_tipo = defaultdict(lambda: [0, 0])
+    por_dia = defaultdict(lambda: [0])
+    for usuario_id, fecha, tipo_comida, calorias in filas:
+        _sumar(por_tipo, (usuario_id, fecha, tipo_comida), (calorias, 1))
+        _sumar(por_dia, (usuario_id, fecha), (calorias,))
+    if not por_dia:
+        return
+    execute_values(cursor, """
+        INSERT INTO resumen_diario_comida (usuario_id, fecha, tipo_comida, calorias, registros)
+        VALUES %s
+        ON CONFLICT (usuario_id, fecha, tipo_comida) DO UPDATE SET
+            calorias = resumen_diario_comida.calorias + EXCLUDED.calorias,
+            registros = resumen_diario_comida.registros + EXCLUDED.registros,
+            actualizado = now()
+    """, [(*clave, *valores) for clave, valores in sorted(por_tipo.items())])
+    execute_values(cursor, """
+        INSERT INTO resumen_diario (usuario_id, fecha, calorias_consumidas)
+        VALUES %s
+        ON CONFLICT (usuario_id, fecha) DO UPDATE SET
+            calorias_consumidas = resumen_diario.calorias_consumidas + EXCLUDED.calorias_consumidas,
+            actualizado = now()
+    """, [(*clave, *valores) for clave, valores in sorted(por_dia.items())])
+
+
+def sumar_medidas(cursor, filas):
+    """
+    Actualiza el último peso del día con las medidas recién insertadas.
+    `filas`: iterable de (usuario_id, fecha, medida_id, peso). Gana la medida con mayor id de cada día.
+    """
+    ultimas = {}
+    for usuario_id, fecha, medida_id, peso in filas:
+        if peso is None:
+            continue
+        clave = (usuario_id, fecha)
+        if clave not in ultimas or medida_id > ultimas[clave][0]:
+            ultimas[clave] = (medida_id, peso)
+    if not ultimas:
+        return
+    execute_values(cursor, """
+        INSERT INTO resumen_diario (usuario_id, fecha, peso_medida_id, peso)
+        VALUES %s
+        ON CONFLICT (usuario_id, fecha) DO UPDATE SET
+            peso = EXCLUDED.peso,
+            peso_medida_id = EXCLUDED.peso_medida_id,
+            actualizado = now()
+        WHERE resumen_diario.peso_medida_id IS NULL OR resumen_diario.peso_medida_id < EXCLUDED.peso_medida_id
+    """, [(*clave, *valores) for clave, valores in sorted(ultimas.items())])
+
+
+def actualizar_pesos(cursor, usuario_id, fechas):
+    """
+    Recalcula el último peso de las `fechas` indicadas leyendo la tabla medidas.
+    Para cargas masivas (COPY), donde no se conocen los id de las filas insertadas.
+    """
+    cursor.execute("""
+        INSERT INTO resumen_diario (usuario_id, fecha, peso_medida_id, peso)
+        SELECT DISTINCT ON (fecha) usuario_id, fecha, id, peso
+        FROM medidas
+        WHERE usuario_id = %s AND fecha = ANY(%s) AND peso IS NOT NULL
+        ORDER BY fecha, id DESC
+        ON CONFLICT (usuario_id, fecha) DO UPDATE SET
+            peso = EXCLUDED.peso,
+            peso_medida_id = EXCLUDED.peso_medida_id,
+            actualizado = now()
+        WHERE resumen_diario.peso_medida_id IS NULL OR resumen_diario.peso_medida_id < EXCLUDED.peso_medida_id
+    """, (usuario_id, sorted(set(fechas))))
+
+
+#######################################################
+####################################################### Reconstrucción (backfill)
+#######################################################
+def reconstruir(cursor, usuario_id=None):
+    """
+    Recalcula los resúmenes desde los datos crudos, para todos los usuarios o solo para `usuario_id`.
+    Debe ejecutarse dentro de una transacción (la confirma quien llama).
+    """
+    filtro = "" if usuario_id is None else "WHERE usuario_id = %(usuario_id)s"
+    parametros = {"usuario_id": usuario_id}
+    for tabla in TABLAS_RESUMEN:
+        cursor.execute(f"DELETE FROM {tabla} {filtro}", parametros)
+    cursor.execute(f"""
+        INSERT INTO resumen_diario_entrenamiento (usuario_id, fecha, tipo, minutos, calorias, sesiones)
+        SELECT usuario_id, fecha, tipo, COALESCE(SUM(duracion), 0), COALESCE(SUM(calorias), 0), COUNT(*)
+        FROM entrenamientos {filtro}
+        GROUP BY usuario_id, fecha, tipo
+    """, parametros)
+    cursor.execute(f"""
+        INSERT INTO resumen_diario_comida (usuario_id, fecha, tipo_comida, calorias, registros)
+        SELECT usuario_id, fecha, tipo_comida, COALESCE(SUM(calorias), 0), COUNT(*)
+        FROM comidas {filtro}
+        GROUP BY usuario_id, fecha, tipo_comida
+    """, parametros)
+    cursor.execute(f"""
+        INSERT INTO resumen_diario (usuario_id, fecha, calorias_consumidas, calorias_quemadas,
+                                    minutos_entrenamiento, sesiones, peso, peso_medida_id)
+        SELECT usuario_id, fecha, SUM(consumidas), SUM(quemadas), SUM(minutos), SUM(sesiones), MAX(peso), MAX(medida_id)
+        FROM (
+            SELECT usuario_id, fecha, 0 AS consumidas, calorias AS quemadas, minutos, sesiones,
+                   NULL::double precision AS peso, NULL::integer AS medida_id
+            FROM resumen_diario_entrenamiento {filtro}
+            UNION ALL
+            SELECT usuario_id, fecha, calorias, 0, 0, 0, NULL, NULL
+            FROM resumen_diario_comida {filtro}
+            UNION ALL
+            (SELECT DISTINCT ON (usuario_id, fecha) usuario_id, fecha, 0, 0, 0, 0, peso, id
+             FROM medidas
+             WHERE peso IS NOT NULL {"" if usuario_id is None else "AND usuario_id = %(usuario_id)s"}
+             ORDER BY usuario_id, fecha, id DESC)
+        ) partes
+        GROUP BY usuario_id, fecha
+    """, parametros)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Reconstruye los resúmenes diarios desde los datos crudos.")
+    parser.add_argument("--usuario", type=int, help="reconstruir solo este usuario_id")
+    args = parser.parse_args(argumentos)
+
+    conn = psycopg2.connect(cadena_conexion())
+    try:
+        with conn:
+            reconstruir(conn.cursor(), args.usuario)
+        print("Resúmenes reconstruidos" + (f" para el usuario {args.usuario}." if args.usuario else "."))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# fuerzapp/sesion.py
+###########################################################################################################################
+# Sesión persistente entre recargas del navegador.
+# Al iniciar sesión se guarda en la URL (st.query_params["sesion"]) un token firmado con HMAC-SHA256:
+#   <usuario_id>.<vence (epoch)>.<sello>.<firma>
+# El sello es un HMAC de una huella del hash de la contraseña (nunca el hash mismo) y de la versión de sesión del
+# usuario (usuarios.sesion_version, migración 10); la firma cubre el id, el vencimiento y el sello. Al leer un token
+# primero se comprueban la firma y el vencimiento, que no necesitan la base: un token inventado o alterado nunca
+# llega a PostgreSQL ni a la caché. Recién después se lee el usuario y se compara el sello, así el token deja de
+# valer si la contraseña cambia o al cerrar sesión, que incrementa la versión: un enlace copiado con el token
+# (historial, referer) no sobrevive al logout. Por lo mismo dura poco (DURACION). Al recargar, los datos del usuario
+# y su versión salen de la caché de consultas (se invalidan con la tabla "usuarios", como al cambiar la foto).
+# La clave se configura con session_secret en st.secrets; sin ella se usa una clave aleatoria por proceso y las
+# sesiones no sobreviven a un reinicio.
+#######################################################
+import hashlib
+import hmac
+import logging
+import os
+import time
+
+import streamlit as st
+
+from fuerzapp.cache import obtener_cache
+from fuerzapp.datos import invalidar
+from fuerzapp.db import get_connection, leer_secreto
+
+log = logging.getLogger(__name__)
+
+PARAMETRO = "sesion"
+DURACION = 12 * 3600  # segundos de validez del token
+
+
+@st.cache_resource(show_spinner=False)
+def _clave():
+    clave = leer_secreto("session_secret")
+    if not clave:
+        log.warning("session_secret no configurado: las sesiones no sobreviven a un reinicio del proceso")
+        return os.urandom(32)
+    return str(clave).encode()
+
+
+def _sello(usuario_id, contrasena, version):
+    huella = hashlib.sha256(contrasena.encode()).hexdigest()[:16]
+    mensaje = f"sello.{usuario_id}.{huella}.{version}".encode()
+    return hmac.new(_clave(), mensaje, hashlib.sha256).hexdigest()[:32]
+
+
+def _firmar(usuario_id, vence, sello):
+    mensaje = f"{usuario_id}.{vence}.{sello}".encode()
+    return hmac.new(_clave(), mensaje, hashlib.sha256).hexdigest()
+
+
+def crear_token(usuario, version):
+    """
+    Token firmado para la tupla de usuario (id, nombre, email, contraseña, foto) y su versión de sesión.
+    """
+    vence = int(time.time() + float(leer_secreto("sesion_duracion", DURACION)))
+    sello = _sello(usuario[0], usuario[3], version)
+    return f"{usuario[0]}.{vence}.{sello}.{_firmar(usuario[0], vence, sello)}"
+
+
+def _cargar_usuario(usuario_id):
+    # (tupla del usuario, versión de sesión), o None
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, nombre, email, contraseña, foto, sesion_version FROM usuarios WHERE id = %s",
+                       (usuario_id,))
+        fila = cursor.fetchone()
+    return (fila[:5], fila[5]) if fila else None
+
+
+def _usuario_y_version(usuario_id):
+    return obtener_cache().obtener_o_calcular(usuario_id, "usuarios", ("sesion",), lambda: _cargar_usuario(usuario_id))
+
+
+def leer_token(token):
+    """
+    Devuelve la tupla de usuario si el token es válido y no venció, o None.
+    """
+    try:
+        texto_id, texto_vence, sello, firma = token.split(".")
+        usuario_id, vence = int(texto_id), int(texto_vence)
+    except (AttributeError, ValueError):
+        return None
+    # La firma y el vencimiento se comprueban antes de buscar al usuario
+    if not hmac.compare_digest(firma, _firmar(usuario_id, vence, sello)) or vence < time.time():
+        return None
+    cargado = _usuario_y_version(usuario_id)
+    if cargado is None:
+        return None
+    usuario, version = cargado
+    if not hmac.compare_digest(sello, _sello(usuario_id, usuario[3], version)):
+        return None
+    return usuario
+
+
+def iniciar(usuario):
+    """
+    Guarda el usuario en la sesión y el token en la URL.
+    """
+    st.session_state.usuario = usuario
+    cargado = _usuario_y_version(usuario[0])
+    st.query_params[PARAMETRO] = crear_token(usuario, cargado[1] if cargado else 0)
+
+
+def restaurar():
+    """
+    Si la sesión no tiene usuario pero la URL trae un token válido, lo restaura (por ejemplo, tras recargar la página).
+    """
+    if st.session_state.get("usuario") is not None:
+        return
+    token = st.query_params.get(PARAMETRO)
+    if not token:
+        return
+    usuario = leer_token(token)
+    if usuario is None:
+        del st.query_params[PARAMETRO]
+        return
+    st.session_state.usuario = usuario
+
+
+def cerrar():
+    """
+    Cierra la sesión y revoca sus tokens (incrementa la versión de sesión del usuario).
+    """
+    usuario = st.session_state.get("usuario")
+    if usuario is not None:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE usuarios SET sesion_version = sesion_version + 1 WHERE id = %s", (usuario[0],))
+        invalidar(usuario[0], "usuarios")
+    st.session_state.usuario = None
+    if PARAMETRO in st.query_params:
+        del st.query_params[PARAMETRO]
@@ -0,0 +1,175 @@
+# fuerzapp/tema.py
+###########################################################################################################################
+# Temas visuales de la aplicación.
+# Cada tema es un archivo TOML en la carpeta temas/ (temas_dir en st.secrets): para sumar uno basta con agregar el
+# archivo, sin tocar el código. La tabla [theme] usa las opciones nativas de Streamlit (backgroundColor, textColor,
+# etc.), así que cualquiera de esos archivos sirve también como tema de todo el sitio con theme.base en
+# .streamlit/config.toml; la tabla [fuerzapp] tiene el nombre que se muestra en el selector.
+# El CSS de cada tema se arma una sola vez por proceso (se vuelve a leer si cambian los archivos) y se envía como un
+# bloque <style> de st.html, que no ocupa lugar en la página. El tema que coincide con la configuración nativa no
+# manda colores: Streamlit ya lo aplica desde el primer dibujo, sin parpadeo. Las páginas son fragmentos, así que
+# el estilo solo viaja en las reejecuciones completas (menú, login), no al usar los formularios.
+# El tema elegido se guarda en usuarios.tema (migración 9); antes del login vale el de la sesión.
+#######################################################
+import logging
+import os
+import tomllib
+from collections import namedtuple
+
+import streamlit as st
+
+from fuerzapp.cache import obtener_cache
+from fuerzapp.datos import invalidar
+from fuerzapp.db import get_connection, leer_secreto
+from fuerzapp.replica import leer_postgres
+
+log = logging.getLogger(__name__)
+
+CARPETA = "temas"
+PREDETERMINADO = "claro"
+# Opciones nativas de [theme] que usa el CSS, con el valor de Streamlit si el tema no las define
+COLORES = {
+    "backgroundColor": {"light": "#ffffff", "dark": "#0e1117"},
+    "secondaryBackgroundColor": {"light": "#f0f2f6", "dark": "#262730"},
+    "textColor": {"light": "#31333f", "dark": "#fafafa"},
+    "primaryColor": {"light": "#ff4b4b", "dark": "#ff4b4b"},
+}
+# Reglas que no dependen del tema (botones del menú a todo el ancho)
+ESTILO_BASE = "div.stButton>button{width:100%;height:3rem;font-size:1.1rem;margin-bottom:8px}"
+
+Tema = namedtuple("Tema", "clave nombre opciones css")
+
+
+def _opcion_nativa(nombre):
+    try:
+        return st.get_option(f"theme.{nombre}")
+    except Exception:
+        return None
+
+
+def _es_nativo(opciones):
+    # El tema ya es el de .streamlit/config.toml (directo o por theme.base): Streamlit lo pinta sin ayuda
+    base = opciones.get("base", "light")
+    return (_opcion_nativa("base") or "light") == base and all(
+        (_opcion_nativa(nombre) or COLORES[nombre][base]).lower() == opciones.get(nombre, COLORES[nombre][base]).lower()
+        for nombre in COLORES)
+
+
+def armar_css(opciones):
+    """
+    CSS (sin espacios de más) que aplica los colores de la tabla [theme] de un tema sobre el tema nativo.
+    """
+    base = opciones.get("base", "light")
+    fondo, fondo_2, texto, primario = (opciones.get(nombre, COLORES[nombre][base]) for nombre in COLORES)
+    lateral = opciones.get("sidebar", {}).get("backgroundColor", fondo_2)
+    return "".join([
+        f".stApp,header{{background-color:{fondo}!important;color:{texto}!important}}",
+        f".stApp h1,.stApp h2,.stApp h3,.stApp h4,.stApp h5,.stApp h6,.stApp p,.stApp label{{color:{texto}!important}}",
+        f"section[data-testid=stSidebar]{{background-color:{lateral}!important}}",
+        f".stApp input,.stApp textarea,.stApp [data-baseweb=select]>div{{background-color:{fondo_2}!important;color:{texto}!important}}",
+        f"div.stButton>button{{color:{texto}!important;background-color:{fondo_2}!important}}",
+        f"div.stButton>button:hover{{border-color:{primario}!important;color:{primario}!important}}",
+    ])
+
+
+def _firma(carpeta):
+    # Nombre y fecha de modificación de cada archivo: si cambia algo, se vuelven a leer los temas
+    try:
+        return tuple(sorted((e.name, e.stat().st_mtime_ns) for e in os.scandir(carpeta) if e.name.endswith(".toml")))
+    except FileNotFoundError:
+        return ()
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _leer_temas(carpeta, firma):
+    temas = {}
+    for archivo, _ in firma:
+        clave = archivo.removesuffix(".toml")
+        try:
+            with open(os.path.join(carpeta, archivo), "rb") as f:
+                datos = tomllib.load(f)
+            opciones = datos["theme"]
+        except (OSError, tomllib.TOMLDecodeError, KeyError) as e:
+            log.warning("Tema inválido, se ignora", extra={"archivo": archivo, "error": str(e)})
+            continue
+        css = ESTILO_BASE if _es_nativo(opciones) else ESTILO_BASE + armar_css(opciones)
+        temas[clave] = Tema(clave, datos.get("fuerzapp", {}).get("nombre", clave.capitalize()), opciones,
+                            f"<style>{css}</style>")
+    log.info("Temas cargados", extra={"temas": list(temas)})
+    return temas
+
+
+def temas_disponibles():
+    """
+    {clave: Tema} de los archivos de la carpeta de temas, ordenados por nombre de archivo.
+    """
+    carpeta = leer_secreto("temas_dir", CARPETA)
+    return _leer_temas(carpeta, _firma(carpeta))
+
+
+def tema_guardado(usuario_id):
+    """
+    Clave del tema guardado por el usuario, o None si nunca eligió uno; se guarda en la caché de consultas.
+    Sin conexión con la base (réplica activada) devuelve False.
+    """
+    def consultar():
+        with get_connection(detener=False) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT tema FROM usuarios WHERE id = %s", (usuario_id,))
+            fila = cursor.fetchone()
+        return fila[0] if fila else None
+
+    return leer_postgres(lambda: obtener_cache().obtener_o_calcular(usuario_id, "usuarios", ("tema",), consultar), False)
+
+
+def guardar_tema(usuario_id, clave):
+    """
+    Guarda en usuarios.tema el tema elegido por el usuario.
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE usuarios SET tema = %s WHERE id = %s", (clave, usuario_id))
+    invalidar(usuario_id, "usuarios")
+
+
+def aplicar_tema(tema):
+    """
+    Envía el CSS precalculado del tema (un <style> de st.html, fuera del flujo de la página).
+    """
+    st.html(tema.css)
+
+
+def _al_cambiar():
+    usuario = st.session_state.get("usuario")
+    if usuario is not None:
+        guardar_tema(usuario[0], st.session_state.tema)
+
+
+def selector_tema():
+    """
+    Muestra el selector de tema en el sidebar y aplica el elegido.
+    Al iniciar sesión se toma el tema guardado del usuario; cada cambio se guarda en usuarios.tema.
+    """
+    temas = temas_disponibles()
+    if not temas:
+        st.html(f"<style>{ESTILO_BASE}</style>")
+        return None
+    usuario = st.session_state.get("usuario")
+    usuario_id = usuario[0] if usuario is not None else None
+    if usuario_id is not None and st.session_state.get("tema_usuario") != usuario_id:
+        # Primera reejecución con este usuario: su tema guardado reemplaza al elegido antes del login.
+        # Sin conexión se sigue con el de la sesión y se vuelve a intentar en la próxima reejecución
+        guardado = tema_guardado(usuario_id)
+        if guardado is not False:
+            st.session_state.tema_usuario = usuario_id
+        if guardado in temas:
+            st.session_state.tema = guardado
+        elif guardado is None and st.session_state.get("tema") in temas:
+            guardar_tema(usuario_id, st.session_state.tema)
+    if st.session_state.get("tema") not in temas:
+        predeterminado = leer_secreto("tema_predeterminado", PREDETERMINADO)
+        st.session_state.tema = predeterminado if predeterminado in temas else next(iter(temas))
+    clave = st.sidebar.selectbox("Selecciona un tema", list(temas), key="tema",
+                                 format_func=lambda c: temas[c].nombre, on_change=_al_cambiar)
+    aplicar_tema(temas[clave])
+    return clave
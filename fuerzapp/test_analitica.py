@@ -0,0 +1,108 @@
+# fuerzapp/test_analitica.py
+###########################################################################################################################
+# Pruebas de la analítica incremental (fuerzapp.analitica): después de varios cálculos incrementales (días nuevos,
+# cambios en el pasado, días agregados al final) las tablas tienen que quedar igual que con un cálculo completo.
+# Necesitan una base PostgreSQL con las migraciones aplicadas:
+#   FUERZAPP_DB_URL=postgresql://... python -m pytest fuerzapp/test_analitica.py
+# Todo corre en una transacción que se revierte al terminar.
+#######################################################
+import os
+import random
+import uuid
+from datetime import date, timedelta
+
+import pandas as pd
+import psycopg2
+import pytest
+
+from fuerzapp import analitica, resumenes
+
+HOY = date(2024, 3, 31)
+TIPOS = ["Fuerza", "Cardio", "Movilidad"]
+
+
+@pytest.fixture
+def cursor():
+    dsn = os.environ.get("FUERZAPP_DB_URL")
+    if not dsn:
+        pytest.skip("FUERZAPP_DB_URL no está definida")
+    conn = psycopg2.connect(dsn)
+    try:
+        yield conn.cursor()
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@pytest.fixture
+def usuario_id(cursor):
+    cursor.execute("INSERT INTO usuarios (nombre, email, contraseña) VALUES (%s, %s, %s) RETURNING id",
+                   ("Prueba", f"analitica-{uuid.uuid4().hex}@prueba", "-"))
+    return cursor.fetchone()[0]
+
+
+def _fechar(cursor, usuario_id, hace):
+    # Dentro de una transacción now() no avanza: los resúmenes recién tocados se fechan `hace` antes, para que cada
+    # tanda quede después de la marca de agua del cálculo anterior (que no pasa de now() - MARGEN_MARCA)
+    for tabla in resumenes.TABLAS_RESUMEN:
+        cursor.execute(f"UPDATE {tabla} SET actualizado = now() - %s WHERE usuario_id = %s AND actualizado = now()",
+                       (hace, usuario_id))
+
+
+def _registrar(cursor, usuario_id, azar, desde, hasta, hace):
+    # Entrenamientos y comidas al azar entre `desde` y `hasta`, sumados a los resúmenes como lo hace la app
+    dias = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+    entrenamientos = [(usuario_id, dia, azar.choice(TIPOS), azar.randint(10, 90), azar.randint(50, 600))
+                      for dia in dias for _ in range(azar.choice([0, 0, 1, 1, 2]))]
+    comidas = [(usuario_id, dia, "Otro", azar.randint(100, 900)) for dia in dias for _ in range(azar.randint(0, 3))]
+    resumenes.sumar_entrenamientos(cursor, entrenamientos)
+    resumenes.sumar_comidas(cursor, comidas)
+    _fechar(cursor, usuario_id, hace)
+
+
+def _tablas(cursor, usuario_id):
+    cursor.execute("""
+        SELECT fecha, carga, carga_aguda, carga_cronica, acwr, balance_7, balance_28, racha
+        FROM analitica_diaria WHERE usuario_id = %s ORDER BY fecha
+    """, (usuario_id,))
+    diaria = pd.DataFrame.from_records(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+    cursor.execute("""
+        SELECT semana, tipo, minutos, sesiones FROM analitica_semanal WHERE usuario_id = %s ORDER BY semana, tipo
+    """, (usuario_id,))
+    semanal = pd.DataFrame.from_records(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+    cursor.execute("SELECT calculado_hasta, racha_maxima FROM analitica_estado WHERE usuario_id = %s", (usuario_id,))
+    return diaria, semanal, cursor.fetchone()
+
+
+def test_rachas():
+    assert analitica.rachas([True, True, False, True]).tolist() == [1, 2, 0, 1]
+    assert analitica.rachas([True, True, False, True], previa=2).tolist() == [3, 4, 0, 1]
+    assert analitica.rachas([False, False]).tolist() == [0, 0]
+
+
+def test_incremental_igual_a_completo(cursor, usuario_id):
+    azar = random.Random(7)
+    _registrar(cursor, usuario_id, azar, HOY - timedelta(days=90), HOY - timedelta(days=30), timedelta(hours=3))
+    assert analitica.actualizar(cursor, usuario_id, HOY - timedelta(days=30)) == HOY - timedelta(days=90)
+
+    # Días nuevos al final y un cambio en el pasado (dentro de la ventana crónica de días ya calculados)
+    _registrar(cursor, usuario_id, azar, HOY - timedelta(days=29), HOY - timedelta(days=10), timedelta(hours=2))
+    resumenes.sumar_entrenamientos(cursor, [(usuario_id, HOY - timedelta(days=50), "Fuerza", 45, 300)])
+    _fechar(cursor, usuario_id, timedelta(hours=2))
+    assert analitica.actualizar(cursor, usuario_id, HOY - timedelta(days=10)) == HOY - timedelta(days=50)
+    # Ya al día: no recalcula nada
+    assert analitica.actualizar(cursor, usuario_id, HOY - timedelta(days=10)) is None
+
+    # Solo pasan los días, sin registros nuevos: se extiende la serie hasta hoy
+    assert analitica.actualizar(cursor, usuario_id, HOY) == HOY - timedelta(days=9)
+    incremental = _tablas(cursor, usuario_id)
+
+    for tabla in ("analitica_diaria", "analitica_semanal", "analitica_estado"):
+        cursor.execute(f"DELETE FROM {tabla} WHERE usuario_id = %s", (usuario_id,))
+    analitica.actualizar(cursor, usuario_id, HOY)
+    completo = _tablas(cursor, usuario_id)
+
+    pd.testing.assert_frame_equal(incremental[0], completo[0])
+    pd.testing.assert_frame_equal(incremental[1], completo[1])
+    assert incremental[2] == completo[2]
+    assert len(completo[0]) == 91
@@ -0,0 +1,86 @@
+# fuerzapp/test_cache.py
+###########################################################################################################################
+# Pruebas de la caché de consultas (fuerzapp.cache): vencimiento, desalojo LRU e invalidación por usuario y tabla.
+#######################################################
+import pytest
+
+from fuerzapp import cache
+from fuerzapp.cache import CacheConsultas
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def test_vence_a_los_ttl_segundos(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(cache.time, "monotonic", reloj)
+    c = CacheConsultas(ttl=10)
+    c.guardar(1, "comidas", "ultimos", "a")
+    reloj.ahora += 9.9
+    assert c.obtener(1, "comidas", "ultimos") == (True, "a")
+    reloj.ahora += 0.1
+    assert c.obtener(1, "comidas", "ultimos") == (False, None)
+    assert c.estadisticas()["vencidas"] == 1
+    # El ttl propio de una entrada reemplaza al de la caché
+    c.guardar(1, "comidas", "ultimos", "b", ttl=60)
+    reloj.ahora += 30
+    assert c.obtener(1, "comidas", "ultimos") == (True, "b")
+
+
+def test_desaloja_la_usada_hace_mas_tiempo():
+    c = CacheConsultas(maximo=2)
+    c.guardar(1, "comidas", "a", 1)
+    c.guardar(1, "comidas", "b", 2)
+    assert c.obtener(1, "comidas", "a") == (True, 1)  # "a" pasa a ser la más reciente
+    c.guardar(1, "comidas", "c", 3)
+    assert c.obtener(1, "comidas", "b") == (False, None)
+    assert c.obtener(1, "comidas", "a") == (True, 1)
+    assert c.obtener(1, "comidas", "c") == (True, 3)
+    assert c.estadisticas()["desalojadas"] == 1
+
+
+def test_invalidar_solo_el_usuario_y_la_tabla():
+    c = CacheConsultas()
+    c.guardar(1, "comidas", "a", 1)
+    c.guardar(1, "medidas", "a", 2)
+    c.guardar(2, "comidas", "a", 3)
+    c.invalidar(1, "comidas")
+    assert c.obtener(1, "comidas", "a") == (False, None)
+    assert c.obtener(1, "medidas", "a") == (True, 2)
+    assert c.obtener(2, "comidas", "a") == (True, 3)
+    # Sin tabla se borran todas las del usuario
+    c.invalidar(2)
+    assert c.obtener(2, "comidas", "a") == (False, None)
+    assert c.obtener(1, "medidas", "a") == (True, 2)
+
+
+def test_obtener_o_calcular_calcula_una_vez():
+    c = CacheConsultas()
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        return len(llamadas)
+
+    assert c.obtener_o_calcular(1, "comidas", "a", calcular) == 1
+    assert c.obtener_o_calcular(1, "comidas", "a", calcular) == 1
+    c.invalidar(1, "comidas")
+    assert c.obtener_o_calcular(1, "comidas", "a", calcular) == 2
+    estadisticas = c.estadisticas()
+    assert (estadisticas["aciertos"], estadisticas["fallos"], estadisticas["invalidadas"]) == (1, 2, 1)
+
+
+def test_un_error_al_calcular_no_se_guarda():
+    c = CacheConsultas()
+
+    def falla():
+        raise RuntimeError("sin base")
+
+    with pytest.raises(RuntimeError):
+        c.obtener_o_calcular(1, "comidas", "a", falla)
+    assert c.estadisticas()["entradas"] == 0
@@ -0,0 +1,147 @@
+# fuerzapp/test_cola_escritura.py
+###########################################################################################################################
+# Pruebas de la cola de escritura diferida (fuerzapp.cola_escritura). Las que escriben en la base necesitan
+# FUERZAPP_DB_URL y se saltean sin ella.
+#######################################################
+import json
+import os
+import time
+import uuid
+from datetime import date
+
+import psycopg2
+import pytest
+
+from fuerzapp.cola_escritura import CONFIRMADO, ERROR, PENDIENTE, ColaEscritura
+from fuerzapp.db import PoolConexiones
+
+# Socket donde no hay ningún servidor: conectar falla enseguida
+DSN_CAIDA = "postgresql://postgres:@/postgres?host=/tmp/fuerzapp-sin-servidor"
+
+
+def _pool_caido():
+    # Como obtener_pool con la base caída: crear el pool abre `minimo` conexiones y falla
+    return PoolConexiones(DSN_CAIDA, minimo=1, conexion=1)
+
+
+def _entrenamiento(usuario_id=1, **cambios):
+    return {"usuario_id": usuario_id, "fecha": date(2024, 3, 1), "tipo": "Fuerza", "duracion": 45, "calorias": 300,
+            "notas": None, **cambios}
+
+
+def test_arranca_sin_conexion(tmp_path):
+    wal = tmp_path / "wal.jsonl"
+    cola = ColaEscritura(_pool_caido, str(wal), espera_lote=0)
+    id_envio = cola.encolar("entrenamientos", _entrenamiento())
+    time.sleep(0.5)
+    # El envío espera en la cola y en el WAL; el hilo sigue vivo para reintentar
+    assert cola.estado(id_envio) == (PENDIENTE, None)
+    assert cola.pendientes() == 1
+    assert cola._hilo.is_alive()
+    assert [json.loads(linea)["id"] for linea in wal.read_text().splitlines()] == [id_envio]
+
+
+def test_reproduce_el_wal_sin_confirmados_ni_registros_rotos(tmp_path):
+    wal = tmp_path / "wal.jsonl"
+    envio_a = {"id": "a", "tabla": "entrenamientos", "fila": {"usuario_id": 1, "fecha": "2024-03-01"}}
+    envio_b = {"id": "b", "tabla": "entrenamientos", "fila": {"usuario_id": 1, "fecha": "2024-03-02"}}
+    wal.write_text("\n".join([
+        json.dumps(envio_a), json.dumps(envio_b), json.dumps({"confirmados": ["a"]}),
+        json.dumps([1, 2]), json.dumps({"tabla": "entrenamientos"}),  # mal formados
+        '{"id": "c", "tabla": "entr',                                  # cortado por una caída
+    ]) + "\n")
+    cola = ColaEscritura(_pool_caido, str(wal), espera_lote=0)
+    assert cola.pendientes() == 1
+    assert cola.estado("b") == (PENDIENTE, None)
+    # El WAL se reescribe solo con lo pendiente
+    assert [json.loads(linea) for linea in wal.read_text().splitlines()] == [envio_b]
+
+
+#######################################################
+# Contra PostgreSQL (FUERZAPP_DB_URL, con las migraciones aplicadas). Los envíos se confirman en la base, así que
+# cada prueba crea su usuario y lo borra al terminar, con sus registros.
+#######################################################
+@pytest.fixture
+def base():
+    dsn = os.environ.get("FUERZAPP_DB_URL")
+    if not dsn:
+        pytest.skip("FUERZAPP_DB_URL no está definida")
+    pool = PoolConexiones(dsn, minimo=0)
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO usuarios (nombre, email, contraseña) VALUES (%s, %s, %s) RETURNING id",
+                   ("Prueba", f"cola-{uuid.uuid4().hex}@prueba", "-"))
+    usuario_id = cursor.fetchone()[0]
+    ids = []
+    try:
+        yield pool, cursor, usuario_id, ids
+    finally:
+        cursor.execute("DELETE FROM escrituras_aplicadas WHERE id = ANY(%s)", (ids,))
+        for tabla in ("entrenamientos", "comidas", "medidas"):
+            cursor.execute(f"DELETE FROM {tabla} WHERE usuario_id = %s", (usuario_id,))
+        cursor.execute("DELETE FROM usuarios WHERE id = %s", (usuario_id,))
+        conn.close()
+        pool.cerrar()
+
+
+def _esperar(cola, ids, limite=10):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        estados = [cola.estado(i) for i in ids]
+        if all(e is not None and e[0] != PENDIENTE for e in estados):
+            return [e[0] for e in estados]
+        time.sleep(0.05)
+    raise AssertionError(f"Envíos sin resolver: {[cola.estado(i) for i in ids]}")
+
+
+def _entrenamientos(cursor, usuario_id):
+    cursor.execute("SELECT duracion FROM entrenamientos WHERE usuario_id = %s ORDER BY duracion", (usuario_id,))
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def test_confirma_y_compacta_el_wal(base, tmp_path):
+    pool, cursor, usuario_id, ids = base
+    wal = tmp_path / "wal.jsonl"
+    confirmados = []
+    cola = ColaEscritura(lambda: pool, str(wal), al_confirmar=lambda u, t: confirmados.append((u, t)))
+    ids += [cola.encolar("entrenamientos", _entrenamiento(usuario_id, duracion=d)) for d in (30, 40)]
+    assert _esperar(cola, ids) == [CONFIRMADO, CONFIRMADO]
+    assert _entrenamientos(cursor, usuario_id) == [30, 40]
+    assert (usuario_id, "entrenamientos") in confirmados
+    cursor.execute("SELECT sesiones FROM resumen_diario WHERE usuario_id = %s", (usuario_id,))
+    assert cursor.fetchone()[0] == 2
+    assert wal.read_text() == ""
+
+
+def test_un_envio_ya_aplicado_no_se_repite(base, tmp_path):
+    # El proceso se cayó después del commit pero antes de anotar la confirmación en el WAL
+    pool, cursor, usuario_id, ids = base
+    wal = tmp_path / "wal.jsonl"
+    envio = {"id": uuid.uuid4().hex, "tabla": "entrenamientos",
+             "fila": {**_entrenamiento(usuario_id), "fecha": "2024-03-01"}}
+    ids.append(envio["id"])
+    cursor.execute("INSERT INTO escrituras_aplicadas (id) VALUES (%s)", (envio["id"],))
+    wal.write_text(json.dumps(envio) + "\n")
+    cola = ColaEscritura(lambda: pool, str(wal))
+    assert _esperar(cola, ids) == [CONFIRMADO]
+    assert _entrenamientos(cursor, usuario_id) == []
+
+
+def test_los_envios_invalidos_no_traban_a_los_demas(base, tmp_path):
+    pool, cursor, usuario_id, ids = base
+    wal = tmp_path / "wal.jsonl"
+    cola = ColaEscritura(lambda: pool, str(wal), espera_lote=0.5)
+    # En un mismo lote: uno válido, uno que rechaza la base y uno mal formado
+    ids += [
+        cola.encolar("entrenamientos", _entrenamiento(usuario_id, duracion=30)),
+        cola.encolar("entrenamientos", _entrenamiento(usuario_id, duracion="mucho")),
+        cola.encolar("entrenamientos", _entrenamiento(usuario_id, fecha="ayer")),
+    ]
+    assert _esperar(cola, ids) == [CONFIRMADO, ERROR, ERROR]
+    assert "mal formado" in cola.estado(ids[2])[1]
+    # Los que siguen se escriben normalmente y el WAL queda vacío
+    ids.append(cola.encolar("entrenamientos", _entrenamiento(usuario_id, duracion=50)))
+    assert _esperar(cola, ids[3:]) == [CONFIRMADO]
+    assert _entrenamientos(cursor, usuario_id) == [30, 50]
+    assert wal.read_text() == ""
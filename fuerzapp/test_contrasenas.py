@@ -0,0 +1,70 @@
+# fuerzapp/test_contrasenas.py
+###########################################################################################################################
+# Pruebas del hash de contraseñas (fuerzapp.contrasenas): scrypt, hashes SHA-256 viejos y cuándo se rehacen.
+# Se usa un n chico para que las pruebas sean rápidas.
+#######################################################
+import hashlib
+
+import pytest
+
+from fuerzapp.contrasenas import Contrasenas, HasherScrypt, HasherSHA256Legado, identificar
+
+
+@pytest.fixture
+def contrasenas():
+    return Contrasenas(HasherScrypt(n=2**10, r=8, p=1), hilos=2)
+
+
+def test_scrypt_lleva_sus_parametros_y_sal(contrasenas):
+    codificado = contrasenas.generar("secreta")
+    assert codificado.startswith("scrypt$1024$8$1$")
+    assert identificar(codificado) == "scrypt"
+    # Misma contraseña, otra sal
+    assert contrasenas.generar("secreta") != codificado
+
+
+def test_verificar_scrypt(contrasenas):
+    codificado = contrasenas.generar("secreta")
+    assert contrasenas.verificar("secreta", codificado) == (True, False)
+    assert contrasenas.verificar("otra", codificado) == (False, False)
+
+
+def test_sha256_viejo_se_acepta_y_pide_rehash(contrasenas):
+    viejo = hashlib.sha256(b"secreta").hexdigest()
+    assert identificar(viejo) == "sha256"
+    assert contrasenas.verificar("secreta", viejo) == (True, True)
+    assert contrasenas.verificar("secreta", viejo.upper()) == (True, True)
+    assert contrasenas.verificar("otra", viejo) == (False, False)
+
+
+def test_parametros_distintos_piden_rehash(contrasenas):
+    anterior = Contrasenas(HasherScrypt(n=2**9, r=8, p=1), hilos=1).generar("secreta")
+    assert contrasenas.verificar("secreta", anterior) == (True, True)
+    # El hash nuevo ya usa los parámetros actuales
+    assert contrasenas.verificar("secreta", contrasenas.generar("secreta")) == (True, False)
+
+
+def test_usuario_inexistente_y_hash_desconocido(contrasenas):
+    assert contrasenas.verificar("secreta", None) == (False, False)
+    assert contrasenas.verificar("secreta", "md5$abc") == (False, False)
+    assert identificar("no es un hash") is None
+
+
+@pytest.mark.parametrize("codificado", [
+    "scrypt$1024$8$1$c2Fs",                       # faltan campos
+    "scrypt$1024$8$1$c2Fs$aGFzaA$extra",          # sobran campos
+    "scrypt$mil$8$1$c2Fs$aGFzaA",                 # parámetro no numérico
+    "scrypt$1000$8$1$c2Fs$aGFzaA",                # n no es potencia de 2
+    "scrypt$1024$8$1$c2Fs$a",                     # base64 inválido
+])
+def test_scrypt_mal_formado_no_verifica(contrasenas, codificado):
+    assert contrasenas.verificar("secreta", codificado) == (False, False)
+
+
+def test_el_legado_solo_verifica():
+    assert not hasattr(HasherSHA256Legado, "generar")
+
+
+def test_n_debe_ser_potencia_de_2():
+    with pytest.raises(ValueError):
+        HasherScrypt(n=1000)
@@ -0,0 +1,102 @@
+# fuerzapp/test_datos.py
+###########################################################################################################################
+# Pruebas de los paneles "Últimos ..." (fuerzapp.datos.ultimos_registros): una sola consulta para todas las tablas,
+# orden y tipos de cada DataFrame, y la caché por tabla. Necesitan FUERZAPP_DB_URL (con las migraciones aplicadas)
+# y se saltean sin ella; los registros se confirman, así que cada prueba crea su usuario y lo borra al terminar.
+#######################################################
+import os
+import uuid
+from datetime import date, timedelta
+
+import pandas as pd
+import psycopg2
+import pytest
+
+from fuerzapp import datos
+
+
+@pytest.fixture
+def usuario():
+    dsn = os.environ.get("FUERZAPP_DB_URL")
+    if not dsn:
+        pytest.skip("FUERZAPP_DB_URL no está definida")
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO usuarios (nombre, email, contraseña) VALUES (%s, %s, %s) RETURNING id",
+                   ("Prueba", f"datos-{uuid.uuid4().hex}@prueba", "-"))
+    usuario_id = cursor.fetchone()[0]
+    try:
+        yield cursor, usuario_id
+    finally:
+        for tabla in ("entrenamientos", "comidas", "medidas"):
+            cursor.execute(f"DELETE FROM {tabla} WHERE usuario_id = %s", (usuario_id,))
+        cursor.execute("DELETE FROM usuarios WHERE id = %s", (usuario_id,))
+        conn.close()
+
+
+@pytest.fixture
+def consultas(monkeypatch):
+    # Anota, por cada conexión que ultimos_registros pide al pool, las tablas que entraron en su consulta
+    pedidas, tablas = [], []
+    conexion, subconsulta = datos.get_connection, datos._subconsulta_ultimos
+
+    def contar_tabla(tabla):
+        tablas.append(tabla)
+        return subconsulta(tabla)
+
+    def contar_conexion(*args, **kwargs):
+        pedidas.append(tablas[:])
+        tablas.clear()
+        return conexion(*args, **kwargs)
+
+    monkeypatch.setattr(datos, "get_connection", contar_conexion)
+    monkeypatch.setattr(datos, "_subconsulta_ultimos", contar_tabla)
+    return pedidas
+
+
+def test_una_consulta_para_todas_las_tablas(usuario, consultas):
+    cursor, usuario_id = usuario
+    inicio = date(2024, 3, 1)
+    for dia in range(7):
+        cursor.execute("INSERT INTO entrenamientos (usuario_id, fecha, tipo, duracion, calorias) VALUES (%s, %s, %s, %s, %s)",
+                       (usuario_id, inicio + timedelta(days=dia), "Fuerza", 30 + dia, 200))
+    cursor.execute("INSERT INTO medidas (usuario_id, fecha, peso) VALUES (%s, %s, %s)", (usuario_id, inicio, 80.5))
+
+    resultado = datos.ultimos_registros(usuario_id, limite=5)
+    assert consultas == [list(datos.TABLAS)]
+    assert list(resultado) == list(datos.TABLAS)
+
+    entrenamientos = resultado["entrenamientos"]
+    assert list(entrenamientos.columns) == list(datos.ESQUEMAS["entrenamientos"])
+    # Los 5 más recientes, del más nuevo al más viejo
+    assert entrenamientos["duracion"].tolist() == [36, 35, 34, 33, 32]
+    assert entrenamientos["fecha"].iloc[0] == pd.Timestamp(inicio + timedelta(days=6))
+    assert str(entrenamientos["duracion"].dtype) == "Int64"
+    assert entrenamientos["notas"].isna().all()
+    # Una tabla sin registros llega vacía pero con sus columnas y tipos
+    assert resultado["comidas"].empty
+    assert list(resultado["comidas"].columns) == list(datos.ESQUEMAS["comidas"])
+    assert resultado["medidas"]["peso"].tolist() == [80.5]
+    assert str(resultado["medidas"]["cintura"].dtype) == "Float64"
+
+
+def test_solo_consulta_las_tablas_invalidadas(usuario, consultas):
+    cursor, usuario_id = usuario
+    datos.ultimos_registros(usuario_id)
+    # Todo en caché: ninguna consulta
+    datos.ultimos_registros(usuario_id)
+    assert consultas == [list(datos.TABLAS)]
+
+    cursor.execute("INSERT INTO comidas (usuario_id, fecha, tipo_comida, alimento, calorias) VALUES (%s, %s, %s, %s, %s)",
+                   (usuario_id, date(2024, 3, 1), "Otro", "Banana", 105))
+    datos.invalidar(usuario_id, "comidas")
+    resultado = datos.ultimos_registros(usuario_id)
+    assert consultas[1:] == [["comidas"]]
+    assert resultado["comidas"]["alimento"].tolist() == ["Banana"]
+
+
+def test_tabla_desconocida():
+    with pytest.raises(ValueError):
+        datos.ultimos_registros(1, tablas=("usuarios",))
+
@@ -0,0 +1,122 @@
+# fuerzapp/test_imagenes.py
+###########################################################################################################################
+# Pruebas de las fotos de perfil (fuerzapp.imagenes): validación y miniaturas, deduplicación por hash, caché en
+# memoria y almacenamiento S3 (con el cliente en memoria).
+#######################################################
+import io
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from fuerzapp import imagenes
+from fuerzapp.imagenes import (TAMANOS, AlmacenamientoS3, ClienteS3Memoria, ImagenInvalidaError, Imagenes,
+                               _CacheBytes, crear_miniaturas)
+
+
+def _imagen(formato="PNG", tamano=(300, 200), color=(200, 30, 30)):
+    salida = io.BytesIO()
+    Image.new("RGB", tamano, color).save(salida, formato)
+    return salida.getvalue()
+
+
+def _bomba(ancho=30_000, alto=30_000):
+    # PNG de pocos bytes que declara ancho × alto píxeles: se reescribe el IHDR de uno de 1x1 (con su CRC)
+    datos = bytearray(_imagen(tamano=(1, 1)))
+    ihdr = struct.pack(">II", ancho, alto) + bytes(datos[24:29])
+    datos[16:29] = ihdr
+    datos[29:33] = struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+    return bytes(datos)
+
+
+def test_miniaturas_webp_cuadradas_de_cada_tamano():
+    miniaturas = crear_miniaturas(_imagen("JPEG"))
+    assert sorted(miniaturas) == sorted(TAMANOS)
+    for tamano, datos in miniaturas.items():
+        with Image.open(io.BytesIO(datos)) as miniatura:
+            assert miniatura.format == "WEBP"
+            assert miniatura.size == (tamano, tamano)
+
+
+@pytest.mark.parametrize("datos", [
+    b"no es una imagen",
+    _imagen("BMP"),                # formato no admitido
+    _imagen()[:60],                # PNG cortado
+])
+def test_rechaza_lo_que_no_es_imagen(datos):
+    with pytest.raises(ImagenInvalidaError):
+        crear_miniaturas(datos)
+
+
+def test_rechaza_imagenes_demasiado_grandes():
+    with pytest.raises(ImagenInvalidaError, match="demasiado grande"):
+        crear_miniaturas(_imagen(tamano=(300, 200)), max_pixeles=300 * 199)
+    with pytest.raises(ImagenInvalidaError):
+        Imagenes(AlmacenamientoS3(ClienteS3Memoria(), "b"), max_bytes=100).subir(_imagen())
+
+
+def test_rechaza_bombas_de_descompresion():
+    bomba = _bomba()
+    assert len(bomba) < 100
+    with pytest.raises(ImagenInvalidaError):
+        crear_miniaturas(bomba)
+
+
+def test_subir_deduplica_por_contenido(monkeypatch):
+    cliente = ClienteS3Memoria()
+    servicio = Imagenes(AlmacenamientoS3(cliente, "b"))
+    datos = _imagen()
+    referencia = servicio.subir(datos)
+    assert referencia.startswith(imagenes.PREFIJO)
+    assert len(cliente._objetos) == len(TAMANOS)
+
+    # La misma imagen ya tiene sus miniaturas: no se vuelve a procesar ni a guardar
+    def no_llamar(*_):
+        raise AssertionError("se volvió a procesar la imagen")
+
+    monkeypatch.setattr(imagenes, "crear_miniaturas", no_llamar)
+    assert servicio.subir(datos) == referencia
+    assert Imagenes(AlmacenamientoS3(cliente, "b")).subir(datos) == referencia
+    assert len(cliente._objetos) == len(TAMANOS)
+
+
+def test_la_cache_no_supera_su_limite():
+    cache = _CacheBytes(10)
+    cache.guardar("a", b"1234")
+    cache.guardar("b", b"1234")
+    assert cache.obtener("a") == b"1234"      # "a" pasa a ser la más reciente
+    cache.guardar("c", b"1234")
+    assert cache.obtener("b") is None
+    assert cache._total == 8
+    # Reemplazar una entrada descuenta la anterior
+    cache.guardar("a", b"12")
+    assert cache._total == 6
+    # Una entrada más grande que todo el límite no se guarda ni desaloja a las demás
+    cache.guardar("d", b"12345678901")
+    assert cache.obtener("d") is None
+    assert cache.obtener("a") == b"12" and cache.obtener("c") == b"1234"
+    assert cache._total == sum(len(v) for v in cache._entradas.values()) <= 10
+
+
+def test_almacenamiento_s3_en_memoria():
+    cliente = ClienteS3Memoria()
+    almacenamiento = AlmacenamientoS3(cliente, "fotos", prefijo="app/")
+    assert not almacenamiento.existe("miniaturas/x_50.webp")
+    assert almacenamiento.leer("miniaturas/x_50.webp") is None
+    almacenamiento.guardar("miniaturas/x_50.webp", b"webp", "image/webp")
+    assert almacenamiento.existe("miniaturas/x_50.webp")
+    assert almacenamiento.leer("miniaturas/x_50.webp") == b"webp"
+    assert list(cliente._objetos) == [("fotos", "app/miniaturas/x_50.webp")]
+
+
+def test_miniatura_se_lee_del_almacenamiento():
+    cliente = ClienteS3Memoria()
+    referencia = Imagenes(AlmacenamientoS3(cliente, "b")).subir(_imagen())
+    # Otro proceso (caché vacía) lee las miniaturas de S3
+    servicio = Imagenes(AlmacenamientoS3(cliente, "b"))
+    for tamano in TAMANOS:
+        with Image.open(io.BytesIO(servicio.miniatura(referencia, tamano))) as miniatura:
+            assert miniatura.size == (tamano, tamano)
+    assert servicio.miniatura(imagenes.PREFIJO + "0" * 64, TAMANOS[0]) is None
+    assert servicio.miniatura(None, TAMANOS[0]) is None
@@ -0,0 +1,86 @@
+# fuerzapp/test_importacion.py
+###########################################################################################################################
+# Pruebas de la importación de CSV (fuerzapp.importacion): validación de bloques y, con FUERZAPP_DB_URL, qué pasa
+# cuando la base rechaza un bloque.
+#######################################################
+import io
+import os
+import uuid
+from datetime import date
+
+import pandas as pd
+import psycopg2
+import pytest
+
+from fuerzapp.importacion import ImportacionError, importar_csv, validar_bloque
+
+
+def _bloque(**columnas):
+    return pd.DataFrame(columnas)
+
+
+def test_fechas_iso_y_con_dia_primero():
+    # 2024-01-05 es la que escribe la exportación: no debe leerse como 1 de mayo
+    df, errores = validar_bloque("entrenamientos", _bloque(fecha=["2024-01-05", "05/01/2024", "2024-02-10"],
+                                                           tipo=["Fuerza"] * 3), 2)
+    assert errores == []
+    assert df["fecha"].tolist() == [date(2024, 1, 5), date(2024, 1, 5), date(2024, 2, 10)]
+
+
+def test_exportacion_reimportada_conserva_las_fechas():
+    fechas = pd.Series(pd.date_range("2024-01-01", "2024-12-31", freq="D"))
+    exportado = fechas.dt.strftime("%Y-%m-%d")
+    df, errores = validar_bloque("medidas", _bloque(fecha=exportado, peso=["70"] * len(fechas)), 2)
+    assert errores == []
+    assert df["fecha"].tolist() == fechas.dt.date.tolist()
+
+
+def test_lineas_invalidas_se_informan_con_su_numero():
+    df, errores = validar_bloque("entrenamientos", _bloque(
+        fecha=["2024-01-05", "no es fecha", "2024-01-07", "2024-01-08"],
+        tipo=["Fuerza", "Fuerza", "", "Cardio"],
+        duracion=["30", "30", "30", "-5"],
+    ), 2)
+    assert errores == ["línea 3: fecha inválida", "línea 4: falta tipo", "línea 5: duracion negativo"]
+    assert df["duracion"].tolist() == [30]
+
+
+def test_numeros_con_coma_decimal_y_vacios():
+    df, errores = validar_bloque("medidas", _bloque(fecha=["2024-01-05", "2024-01-06"], peso=["70,5", ""],
+                                                    cintura=["", "80"]), 2)
+    assert errores == []
+    assert df["peso"].tolist()[0] == 70.5
+    assert pd.isna(df["peso"].tolist()[1])
+
+
+def test_un_bloque_rechazado_por_la_base_informa_la_linea_y_lo_ya_importado():
+    dsn = os.environ.get("FUERZAPP_DB_URL")
+    if not dsn:
+        pytest.skip("FUERZAPP_DB_URL no está definida")
+    conn = psycopg2.connect(dsn)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO usuarios (nombre, email, contraseña) VALUES (%s, %s, %s) RETURNING id",
+                   ("Prueba", f"importacion-{uuid.uuid4().hex}@prueba", "-"))
+    usuario_id = cursor.fetchone()[0]
+    conn.commit()
+    csv = io.StringIO("\n".join([
+        "fecha,tipo,duracion",
+        "2024-01-01,Fuerza,30",
+        "2024-01-02,Fuerza,40",
+        "2024-01-03,Fuerza,-5",             # la descarta la validación
+        "2024-01-04,Fuerza,99999999999",    # no entra en INTEGER: la rechaza el COPY
+        "2024-01-05,Fuerza,50",
+    ]))
+    try:
+        with pytest.raises(ImportacionError, match="línea 5") as error:
+            importar_csv(conn, csv, "entrenamientos", usuario_id, tamano_bloque=2)
+        # El primer bloque quedó confirmado; el segundo se revirtió entero
+        assert error.value.importadas == 2
+        cursor.execute("SELECT duracion FROM entrenamientos WHERE usuario_id = %s ORDER BY fecha", (usuario_id,))
+        assert [fila[0] for fila in cursor.fetchall()] == [30, 40]
+    finally:
+        conn.rollback()
+        cursor.execute("DELETE FROM entrenamientos WHERE usuario_id = %s", (usuario_id,))
+        cursor.execute("DELETE FROM usuarios WHERE id = %s", (usuario_id,))
+        conn.commit()
+        conn.close()
@@ -0,0 +1,54 @@
+# fuerzapp/test_limites.py
+###########################################################################################################################
+# Pruebas del límite de intentos de login (fuerzapp.limites).
+#######################################################
+from fuerzapp import limites
+from fuerzapp.limites import LimitadorTokens, cliente_desde
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def test_rafaga_y_recarga(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(limites.time, "monotonic", reloj)
+    limitador = LimitadorTokens(capacidad=3, por_segundo=0.5)
+    assert [limitador.permitir("ana")[0] for _ in range(3)] == [True, True, True]
+    permitido, espera = limitador.permitir("ana")
+    assert not permitido and espera == 2.0
+    # Otra clave tiene su propio balde
+    assert limitador.permitir("beto")[0]
+    reloj.ahora += 2
+    assert limitador.permitir("ana")[0]
+    assert not limitador.permitir("ana")[0]
+    # La recarga no supera la capacidad
+    reloj.ahora += 3600
+    assert [limitador.permitir("ana")[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_descarta_los_baldes_menos_usados():
+    limitador = LimitadorTokens(capacidad=1, por_segundo=0.001, maximo_claves=2)
+    limitador.permitir("a")
+    limitador.permitir("b")
+    limitador.permitir("c")
+    # "a" se descartó: vuelve con el balde lleno
+    assert limitador.permitir("a")[0]
+    assert not limitador.permitir("c")[0]
+
+
+def test_cliente_sin_proxies_confiables_usa_la_conexion():
+    assert cliente_desde("1.1.1.1", "10.0.0.5", 0) == "10.0.0.5"
+    assert cliente_desde(None, None, 0) == "desconocido"
+
+
+def test_cliente_detras_de_un_proxy_usa_el_salto_del_proxy():
+    # El cliente puede inventar los saltos de la izquierda; el último lo agregó el proxy
+    assert cliente_desde("6.6.6.6, 203.0.113.7", "10.0.0.1", 1) == "203.0.113.7"
+    assert cliente_desde("7.7.7.7, 6.6.6.6, 203.0.113.7", "10.0.0.1", 1) == "203.0.113.7"
+    assert cliente_desde("6.6.6.6, 203.0.113.7, 10.0.0.9", "10.0.0.1", 2) == "203.0.113.7"
+    assert cliente_desde("", "10.0.0.1", 1) == "10.0.0.1"
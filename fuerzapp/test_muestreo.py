@@ -0,0 +1,46 @@
+# fuerzapp/test_muestreo.py
+###########################################################################################################################
+# Pruebas de la reducción de series para gráficos (fuerzapp.muestreo).
+#######################################################
+import numpy as np
+import pandas as pd
+import pytest
+
+from fuerzapp.muestreo import lttb, reducir
+
+
+def test_series_cortas_quedan_enteras():
+    assert lttb([1, 2, 3], [5, 6, 7], 10).tolist() == [0, 1, 2]
+
+
+def test_conserva_extremos_y_picos():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[400], y[700] = 50, -30
+    indices = lttb(x, y, 20)
+    assert len(indices) == 20
+    assert indices[0] == 0 and indices[-1] == 999
+    assert 400 in indices and 700 in indices
+    assert (np.diff(indices) > 0).all()
+
+
+def test_necesita_al_menos_3_puntos():
+    with pytest.raises(ValueError):
+        lttb(np.arange(10), np.arange(10), 2)
+
+
+def test_reducir_por_grupo_con_fechas():
+    fechas = pd.date_range("2024-01-01", periods=500, freq="D")
+    df = pd.concat([
+        pd.DataFrame({"periodo": fechas, "valor": np.sin(np.arange(500) / 10), "tipo": "Fuerza"}),
+        pd.DataFrame({"periodo": fechas[:30], "valor": np.arange(30.0), "tipo": "Cardio"}),
+    ], ignore_index=True)
+    df.loc[505, "valor"] = np.nan  # una fila de Cardio sin valor: se descarta
+    reducido = reducir(df, "periodo", "valor", 50, por="tipo")
+    tamanos = reducido.groupby("tipo").size()
+    # Fuerza (500 puntos) se reduce a 50; Cardio (30, uno sin valor) queda entero
+    assert tamanos["Fuerza"] == 50
+    assert tamanos["Cardio"] == 29
+    assert fechas[5] not in set(reducido.loc[reducido["tipo"] == "Cardio", "periodo"])
+    assert reducido["valor"].notna().all()
+    assert reducido.groupby("tipo")["periodo"].is_monotonic_increasing.all()
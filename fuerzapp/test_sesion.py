@@ -0,0 +1,62 @@
+# fuerzapp/test_sesion.py
+###########################################################################################################################
+# Pruebas de los tokens de sesión firmados (fuerzapp.sesion), sin base de datos: el usuario y su versión de sesión
+# se reemplazan por un diccionario.
+#######################################################
+import pytest
+
+from fuerzapp import sesion
+
+USUARIO = (7, "Ana", "ana@mail.com", "scrypt$hash", None)
+
+
+@pytest.fixture
+def base(monkeypatch):
+    versiones = {USUARIO[0]: (USUARIO, 0)}
+    monkeypatch.setattr(sesion, "_usuario_y_version", versiones.get)
+    return versiones
+
+
+@pytest.fixture
+def sin_base(monkeypatch):
+    # Para tokens que se rechazan por la firma: no deben llegar a buscar al usuario
+    def no_buscar(usuario_id):
+        raise AssertionError(f"se buscó al usuario {usuario_id}")
+
+    monkeypatch.setattr(sesion, "_usuario_y_version", no_buscar)
+
+
+def test_token_valido(base):
+    assert sesion.leer_token(sesion.crear_token(USUARIO, 0)) == USUARIO
+
+
+def test_token_vencido(base, monkeypatch):
+    token = sesion.crear_token(USUARIO, 0)
+    ahora = sesion.time.time()
+    monkeypatch.setattr(sesion.time, "time", lambda: ahora + sesion.DURACION + 1)
+    assert sesion.leer_token(token) is None
+
+
+def test_cerrar_sesion_revoca_los_tokens(base):
+    token = sesion.crear_token(USUARIO, 0)
+    base[USUARIO[0]] = (USUARIO, 1)
+    assert sesion.leer_token(token) is None
+    assert sesion.leer_token(sesion.crear_token(USUARIO, 1)) == USUARIO
+
+
+def test_cambio_de_contrasena_invalida_el_token(base):
+    token = sesion.crear_token(USUARIO, 0)
+    base[USUARIO[0]] = ((*USUARIO[:3], "scrypt$otro", None), 0)
+    assert sesion.leer_token(token) is None
+
+
+@pytest.mark.parametrize("token", ["", "basura", "7.1.2", "7.1.2.3", "x.y.z.w", None])
+def test_tokens_mal_formados(sin_base, token):
+    assert sesion.leer_token(token) is None
+
+
+def test_firma_alterada(sin_base):
+    usuario_id, vence, sello, firma = sesion.crear_token(USUARIO, 0).split(".")
+    assert sesion.leer_token(f"{usuario_id}.{int(vence) + 3600}.{sello}.{firma}") is None
+    assert sesion.leer_token(f"{int(usuario_id) + 1}.{vence}.{sello}.{firma}") is None
+    assert sesion.leer_token(f"{usuario_id}.{vence}.{'0' * len(sello)}.{firma}") is None